@@ -0,0 +1,38 @@
+"""add_score_recalculation_checkpoints
+
+Revision ID: 003_add_recalc_checkpoints
+Revises: 002_add_trading_license
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_add_recalc_checkpoints'
+down_revision = '002_add_trading_license'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create score_recalculation_checkpoints table (bulk recalculation progress)
+    op.create_table(
+        'score_recalculation_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_name', sa.String(), nullable=False),
+        sa.Column('last_user_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_score_recalculation_checkpoints_id'), 'score_recalculation_checkpoints', ['id'], unique=False)
+    op.create_index(op.f('ix_score_recalculation_checkpoints_job_name'), 'score_recalculation_checkpoints', ['job_name'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_score_recalculation_checkpoints_job_name'), table_name='score_recalculation_checkpoints')
+    op.drop_index(op.f('ix_score_recalculation_checkpoints_id'), table_name='score_recalculation_checkpoints')
+    op.drop_table('score_recalculation_checkpoints')
@@ -0,0 +1,46 @@
+"""add_credit_score_components
+
+Revision ID: 004_add_score_components
+Revises: 003_add_recalc_checkpoints
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_add_score_components'
+down_revision = '003_add_recalc_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create credit_score_components table (running per-user scoring totals).
+    # Rows are rebuilt from history on first use, or for everyone at once by
+    # running recalculate_scores.py.
+    op.create_table(
+        'credit_score_components',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('document_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('other_document_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('on_time_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('default_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('early_repayment_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('paid_loan_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_credit_score_components_id'), 'credit_score_components', ['id'], unique=False)
+    op.create_index(op.f('ix_credit_score_components_user_id'), 'credit_score_components', ['user_id'], unique=True)
+    op.create_foreign_key('fk_credit_score_components_user_id', 'credit_score_components', 'users', ['user_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_credit_score_components_user_id', 'credit_score_components', type_='foreignkey')
+    op.drop_index(op.f('ix_credit_score_components_user_id'), table_name='credit_score_components')
+    op.drop_index(op.f('ix_credit_score_components_id'), table_name='credit_score_components')
+    op.drop_table('credit_score_components')
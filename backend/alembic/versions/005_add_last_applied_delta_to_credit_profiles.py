@@ -0,0 +1,24 @@
+"""add_last_applied_delta_to_credit_profiles
+
+Revision ID: 005_add_last_applied_delta
+Revises: 004_add_score_components
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_add_last_applied_delta'
+down_revision = '004_add_score_components'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Clamped change applied by the last atomic score update (score_before = score - last_applied_delta)
+    op.add_column('credit_profiles', sa.Column('last_applied_delta', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('credit_profiles', 'last_applied_delta')
@@ -0,0 +1,28 @@
+"""add_payment_streak_to_score_components
+
+Revision ID: 006_add_payment_streak
+Revises: 005_add_last_applied_delta
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_add_payment_streak'
+down_revision = '005_add_last_applied_delta'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Current on-time streak and last payment outcome per user.
+    # Existing rows start at 0 / NULL; run backfill_payment_streaks.py to
+    # derive them from the event history.
+    op.add_column('credit_score_components', sa.Column('on_time_streak', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('credit_score_components', sa.Column('last_payment_outcome', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('credit_score_components', 'last_payment_outcome')
+    op.drop_column('credit_score_components', 'on_time_streak')
@@ -0,0 +1,46 @@
+"""add_scoring_policy_versions
+
+Revision ID: 007_add_scoring_policy_versions
+Revises: 006_add_payment_streak
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_add_scoring_policy_versions'
+down_revision = '006_add_payment_streak'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create scoring_policy_versions table (published scoring parameters).
+    # With no rows, the built-in credit_config policy (version 0) is active.
+    op.create_table(
+        'scoring_policy_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('parameters', sa.JSON(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('activated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_scoring_policy_versions_id'), 'scoring_policy_versions', ['id'], unique=False)
+    op.create_index(op.f('ix_scoring_policy_versions_version'), 'scoring_policy_versions', ['version'], unique=True)
+    op.create_index(op.f('ix_scoring_policy_versions_is_active'), 'scoring_policy_versions', ['is_active'], unique=False)
+
+    # Policy version that produced each score event (NULL for events before versioning)
+    op.add_column('credit_score_events', sa.Column('policy_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('credit_score_events', 'policy_version')
+    op.drop_index(op.f('ix_scoring_policy_versions_is_active'), table_name='scoring_policy_versions')
+    op.drop_index(op.f('ix_scoring_policy_versions_version'), table_name='scoring_policy_versions')
+    op.drop_index(op.f('ix_scoring_policy_versions_id'), table_name='scoring_policy_versions')
+    op.drop_table('scoring_policy_versions')
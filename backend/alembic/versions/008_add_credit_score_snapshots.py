@@ -0,0 +1,59 @@
+"""add_credit_score_snapshots
+
+Revision ID: 008_add_credit_score_snapshots
+Revises: 007_add_scoring_policy_versions
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_add_credit_score_snapshots'
+down_revision = '007_add_scoring_policy_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create credit_score_snapshots table (periodic per-user state, written by
+    # create_score_snapshots.py, so point-in-time queries replay few events)
+    op.create_table(
+        'credit_score_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('last_event_id', sa.Integer(), nullable=False),
+        sa.Column('last_event_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('tier', sa.String(), nullable=False),
+        sa.Column('max_bnpl_limit', sa.Numeric(15, 2), nullable=False),
+        sa.Column('policy_version', sa.Integer(), nullable=True),
+        sa.Column('document_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('other_document_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('on_time_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('default_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('early_repayment_points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('on_time_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_payment_outcome', sa.String(), nullable=True),
+        sa.Column('event_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('last_event_id'),
+    )
+    op.create_index(op.f('ix_credit_score_snapshots_id'), 'credit_score_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_credit_score_snapshots_user_id'), 'credit_score_snapshots', ['user_id'], unique=False)
+    op.create_index('ix_credit_score_snapshots_user_id_last_event_at', 'credit_score_snapshots', ['user_id', 'last_event_at'], unique=False)
+    op.create_foreign_key('fk_credit_score_snapshots_user_id', 'credit_score_snapshots', 'users', ['user_id'], ['id'])
+
+    # Point-in-time lookups and replays walk one user's events in order
+    op.create_index('ix_credit_score_events_user_id_created_at', 'credit_score_events', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_credit_score_events_user_id_created_at', table_name='credit_score_events')
+    op.drop_constraint('fk_credit_score_snapshots_user_id', 'credit_score_snapshots', type_='foreignkey')
+    op.drop_index('ix_credit_score_snapshots_user_id_last_event_at', table_name='credit_score_snapshots')
+    op.drop_index(op.f('ix_credit_score_snapshots_user_id'), table_name='credit_score_snapshots')
+    op.drop_index(op.f('ix_credit_score_snapshots_id'), table_name='credit_score_snapshots')
+    op.drop_table('credit_score_snapshots')
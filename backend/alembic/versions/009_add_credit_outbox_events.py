@@ -0,0 +1,46 @@
+"""add_credit_outbox_events
+
+Revision ID: 009_add_credit_outbox_events
+Revises: 008_add_credit_score_snapshots
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_add_credit_outbox_events'
+down_revision = '008_add_credit_score_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create credit_outbox_events table (domain events drained by run_credit_worker.py)
+    op.create_table(
+        'credit_outbox_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_credit_outbox_events_id'), 'credit_outbox_events', ['id'], unique=False)
+    op.create_index(op.f('ix_credit_outbox_events_user_id'), 'credit_outbox_events', ['user_id'], unique=False)
+    op.create_index('ix_credit_outbox_events_processed_at_id', 'credit_outbox_events', ['processed_at', 'id'], unique=False)
+    op.create_index('ix_credit_outbox_events_user_id_id', 'credit_outbox_events', ['user_id', 'id'], unique=False)
+    op.create_foreign_key('fk_credit_outbox_events_user_id', 'credit_outbox_events', 'users', ['user_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_credit_outbox_events_user_id', 'credit_outbox_events', type_='foreignkey')
+    op.drop_index('ix_credit_outbox_events_user_id_id', table_name='credit_outbox_events')
+    op.drop_index('ix_credit_outbox_events_processed_at_id', table_name='credit_outbox_events')
+    op.drop_index(op.f('ix_credit_outbox_events_user_id'), table_name='credit_outbox_events')
+    op.drop_index(op.f('ix_credit_outbox_events_id'), table_name='credit_outbox_events')
+    op.drop_table('credit_outbox_events')
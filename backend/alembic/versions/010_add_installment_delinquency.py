@@ -0,0 +1,28 @@
+"""add_installment_delinquency
+
+Revision ID: 010_add_installment_delinquency
+Revises: 009_add_credit_outbox_events
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_add_installment_delinquency'
+down_revision = '009_add_credit_outbox_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Penalty level already applied to an unpaid installment by the delinquency sweep
+    op.add_column('installments', sa.Column('delinquency_level', sa.String(), nullable=True))
+
+    # The sweep reads unpaid installments in due-date order
+    op.create_index('ix_installments_paid_due_date', 'installments', ['paid', 'due_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_installments_paid_due_date', table_name='installments')
+    op.drop_column('installments', 'delinquency_level')
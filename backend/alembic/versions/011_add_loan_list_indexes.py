@@ -0,0 +1,29 @@
+"""add_loan_list_indexes
+
+Revision ID: 011_add_loan_list_indexes
+Revises: 010_add_installment_delinquency
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011_add_loan_list_indexes'
+down_revision = '010_add_installment_delinquency'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset-paginated loan lists per lender (optionally by status) and per customer
+    op.create_index('ix_loans_lender_id_status_id', 'loans', ['lender_id', 'status', 'id'], unique=False)
+    op.create_index('ix_loans_customer_id_id', 'loans', ['customer_id', 'id'], unique=False)
+
+    # Installments of a page of loans are loaded with loan_id IN (...)
+    op.create_index('ix_installments_loan_id', 'installments', ['loan_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_installments_loan_id', table_name='installments')
+    op.drop_index('ix_loans_customer_id_id', table_name='loans')
+    op.drop_index('ix_loans_lender_id_status_id', table_name='loans')
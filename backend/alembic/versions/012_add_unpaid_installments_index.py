@@ -0,0 +1,31 @@
+"""add_unpaid_installments_index
+
+Revision ID: 012_add_unpaid_installments_index
+Revises: 011_add_loan_list_indexes
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_add_unpaid_installments_index'
+down_revision = '011_add_loan_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial index on unpaid installments per loan (lender aging buckets)
+    op.create_index(
+        'ix_installments_unpaid_loan_id_due_date',
+        'installments',
+        ['loan_id', 'due_date'],
+        unique=False,
+        postgresql_where=sa.text('paid = false'),
+        sqlite_where=sa.text('paid = 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_installments_unpaid_loan_id_due_date', table_name='installments')
@@ -0,0 +1,46 @@
+"""add_lender_portfolio_stats
+
+Revision ID: 013_add_lender_portfolio_stats
+Revises: 012_add_unpaid_installments_index
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_add_lender_portfolio_stats'
+down_revision = '012_add_unpaid_installments_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create lender_portfolio_stats table (dashboard rollup, filled by
+    # `lender_portfolio_stats.py rebuild` and kept up to date incrementally)
+    op.create_table(
+        'lender_portfolio_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lender_id', sa.Integer(), nullable=False),
+        sa.Column('active_loans_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_principal_outstanding', sa.Numeric(18, 2), nullable=False, server_default='0'),
+        sa.Column('total_interest_earned', sa.Numeric(18, 2), nullable=False, server_default='0'),
+        sa.Column('current_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_1_30', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_31_60', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_61_plus', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('buckets_as_of', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_lender_portfolio_stats_id'), 'lender_portfolio_stats', ['id'], unique=False)
+    op.create_index(op.f('ix_lender_portfolio_stats_lender_id'), 'lender_portfolio_stats', ['lender_id'], unique=True)
+    op.create_foreign_key('fk_lender_portfolio_stats_lender_id', 'lender_portfolio_stats', 'lenders', ['lender_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_lender_portfolio_stats_lender_id', 'lender_portfolio_stats', type_='foreignkey')
+    op.drop_index(op.f('ix_lender_portfolio_stats_lender_id'), table_name='lender_portfolio_stats')
+    op.drop_index(op.f('ix_lender_portfolio_stats_id'), table_name='lender_portfolio_stats')
+    op.drop_table('lender_portfolio_stats')
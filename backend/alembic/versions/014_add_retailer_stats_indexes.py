@@ -0,0 +1,25 @@
+"""add_retailer_stats_indexes
+
+Revision ID: 014_add_retailer_stats_indexes
+Revises: 013_add_lender_portfolio_stats
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '014_add_retailer_stats_indexes'
+down_revision = '013_add_lender_portfolio_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Retailer dashboard: products per retailer, loans per product by creation time
+    op.create_index('ix_products_retailer_id', 'products', ['retailer_id'], unique=False)
+    op.create_index('ix_loans_product_id_created_at', 'loans', ['product_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_loans_product_id_created_at', table_name='loans')
+    op.drop_index('ix_products_retailer_id', table_name='products')
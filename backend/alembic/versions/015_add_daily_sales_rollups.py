@@ -0,0 +1,51 @@
+"""add_daily_sales_rollups
+
+Revision ID: 015_add_daily_sales_rollups
+Revises: 014_add_retailer_stats_indexes
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_add_daily_sales_rollups'
+down_revision = '014_add_retailer_stats_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create daily_sales_rollups table (filled by `sales_rollups.py rebuild`
+    # and kept up to date on loan creation)
+    op.create_table(
+        'daily_sales_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('retailer_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('loan_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_amount', sa.Numeric(18, 2), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_daily_sales_rollups_id'), 'daily_sales_rollups', ['id'], unique=False)
+    op.create_index(
+        'ix_daily_sales_rollups_retailer_id_day_product_id',
+        'daily_sales_rollups',
+        ['retailer_id', 'day', 'product_id'],
+        unique=True,
+    )
+    op.create_index('ix_daily_sales_rollups_day', 'daily_sales_rollups', ['day'], unique=False)
+    op.create_foreign_key('fk_daily_sales_rollups_retailer_id', 'daily_sales_rollups', 'retailers', ['retailer_id'], ['id'])
+    op.create_foreign_key('fk_daily_sales_rollups_product_id', 'daily_sales_rollups', 'products', ['product_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_daily_sales_rollups_product_id', 'daily_sales_rollups', type_='foreignkey')
+    op.drop_constraint('fk_daily_sales_rollups_retailer_id', 'daily_sales_rollups', type_='foreignkey')
+    op.drop_index('ix_daily_sales_rollups_day', table_name='daily_sales_rollups')
+    op.drop_index('ix_daily_sales_rollups_retailer_id_day_product_id', table_name='daily_sales_rollups')
+    op.drop_index(op.f('ix_daily_sales_rollups_id'), table_name='daily_sales_rollups')
+    op.drop_table('daily_sales_rollups')
@@ -0,0 +1,45 @@
+"""add_product_view_counts
+
+Revision ID: 016_add_product_view_counts
+Revises: 015_add_daily_sales_rollups
+Create Date: 2026-10-16 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_add_product_view_counts'
+down_revision = '015_add_daily_sales_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create product_view_counts table (hourly view counters, flushed in
+    # batches by each API worker)
+    op.create_table(
+        'product_view_counts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('retailer_id', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('view_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_product_view_counts_id'), 'product_view_counts', ['id'], unique=False)
+    op.create_index('ix_product_view_counts_product_id_hour', 'product_view_counts', ['product_id', 'hour'], unique=True)
+    op.create_index('ix_product_view_counts_retailer_id_hour', 'product_view_counts', ['retailer_id', 'hour'], unique=False)
+    op.create_foreign_key('fk_product_view_counts_product_id', 'product_view_counts', 'products', ['product_id'], ['id'])
+    op.create_foreign_key('fk_product_view_counts_retailer_id', 'product_view_counts', 'retailers', ['retailer_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_product_view_counts_retailer_id', 'product_view_counts', type_='foreignkey')
+    op.drop_constraint('fk_product_view_counts_product_id', 'product_view_counts', type_='foreignkey')
+    op.drop_index('ix_product_view_counts_retailer_id_hour', table_name='product_view_counts')
+    op.drop_index('ix_product_view_counts_product_id_hour', table_name='product_view_counts')
+    op.drop_index(op.f('ix_product_view_counts_id'), table_name='product_view_counts')
+    op.drop_table('product_view_counts')
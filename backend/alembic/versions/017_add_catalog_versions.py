@@ -0,0 +1,31 @@
+"""add_catalog_versions
+
+Revision ID: 017_add_catalog_versions
+Revises: 016_add_product_view_counts
+Create Date: 2026-10-16 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_add_catalog_versions'
+down_revision = '016_add_product_view_counts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create catalog_versions table (one row, bumped by every product write and
+    # polled by the API workers' catalog indexes)
+    op.create_table(
+        'catalog_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_versions')
@@ -0,0 +1,83 @@
+"""add_product_search_index
+
+Revision ID: 018_add_product_search_index
+Revises: 017_add_catalog_versions
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '018_add_product_search_index'
+down_revision = '017_add_catalog_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Product full-text search: a generated tsvector column with a GIN index on
+    # PostgreSQL, an FTS5 table kept in sync by triggers on SQLite
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            """
+            ALTER TABLE products ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+            ) STORED
+            """
+        )
+        op.create_index(
+            'ix_products_search_vector',
+            'products',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+        )
+    else:
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE products_fts USING fts5(
+                name, description, content='products', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name, description)
+                VALUES (new.id, new.name, coalesce(new.description, ''));
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, coalesce(old.description, ''));
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, coalesce(old.description, ''));
+                INSERT INTO products_fts(rowid, name, description)
+                VALUES (new.id, new.name, coalesce(new.description, ''));
+            END
+            """
+        )
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_products_search_vector', table_name='products')
+        op.drop_column('products', 'search_vector')
+    else:
+        op.execute("DROP TRIGGER IF EXISTS products_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_ai")
+        op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,27 @@
+"""add_product_sku
+
+Revision ID: 019_add_product_sku
+Revises: 018_add_product_search_index
+Create Date: 2026-10-17 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '019_add_product_sku'
+down_revision = '018_add_product_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Retailer's own SKU, the key of bulk catalog imports (unique per retailer;
+    # products without one are not constrained)
+    op.add_column('products', sa.Column('sku', sa.String(), nullable=True))
+    op.create_index('ix_products_retailer_id_sku', 'products', ['retailer_id', 'sku'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_retailer_id_sku', table_name='products')
+    op.drop_column('products', 'sku')
@@ -0,0 +1,61 @@
+"""add_document_counts_to_score_components
+
+Revision ID: 020_add_document_counts
+Revises: 019_add_product_sku
+Create Date: 2026-10-17 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020_add_document_counts'
+down_revision = '019_add_product_sku'
+branch_labels = None
+depends_on = None
+
+DOCUMENT_TYPES = [
+    'MOBILE_MONEY_STATEMENT',
+    'BANK_STATEMENT',
+    'PROOF_OF_ADDRESS',
+    'PAYSLIP',
+    'EMPLOYMENT_CONTRACT',
+    'BUSINESS_REGISTRATION',
+    'LC1_LETTER',
+    'OTHER',
+]
+
+
+def _count_column(document_type: str) -> str:
+    return f'{document_type.lower()}_documents'
+
+
+def upgrade() -> None:
+    # Approved documents are stored as per-type counts instead of points, so
+    # the components no longer depend on the scoring policy's weights. The
+    # counts follow the document reviews; existing rows are counted from the
+    # approved documents.
+    for document_type in DOCUMENT_TYPES:
+        column = _count_column(document_type)
+        op.add_column('credit_score_components', sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+        op.execute(
+            f"UPDATE credit_score_components SET {column} = ("
+            f"SELECT COUNT(*) FROM credit_documents "
+            f"WHERE credit_documents.user_id = credit_score_components.user_id "
+            f"AND credit_documents.status = 'APPROVED' "
+            f"AND credit_documents.document_type = '{document_type}')"
+        )
+
+    for table in ('credit_score_components', 'credit_score_snapshots'):
+        op.drop_column(table, 'other_document_points')
+        op.drop_column(table, 'document_points')
+
+
+def downgrade() -> None:
+    # Points start at 0; run recalculate_scores.py and create_score_snapshots.py to rebuild them
+    for table in ('credit_score_components', 'credit_score_snapshots'):
+        op.add_column(table, sa.Column('document_points', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('other_document_points', sa.Integer(), nullable=False, server_default='0'))
+
+    for document_type in DOCUMENT_TYPES:
+        op.drop_column('credit_score_components', _count_column(document_type))
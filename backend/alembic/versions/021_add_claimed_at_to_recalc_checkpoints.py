@@ -0,0 +1,24 @@
+"""add_claimed_at_to_recalc_checkpoints
+
+Revision ID: 021_add_recalc_claimed_at
+Revises: 020_add_document_counts
+Create Date: 2026-10-17 03:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021_add_recalc_claimed_at'
+down_revision = '020_add_document_counts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Set while a run holds a bulk recalculation job (renewed per chunk)
+    op.add_column('score_recalculation_checkpoints', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('score_recalculation_checkpoints', 'claimed_at')
@@ -0,0 +1,155 @@
+"""
+Authenticated User Cache
+
+`get_current_user` resolves a token to the user and the IDs of their retailer
+and lender profiles (joined in one query), and caches the result per worker for
+AUTH_CACHE_TTL_SECONDS, keyed by (user_id, token iat). In the steady state an
+authenticated request makes no database round trip for authentication.
+
+Commits that deactivate a user or change their role drop the user's entries
+on the worker that made the commit (SQLAlchemy session events). Other workers
+pick the change up when their entries expire, so the TTL bounds how long a
+deactivated user can still be served there.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.models import User, UserRole
+
+CacheKey = Tuple[int, Optional[int]]  # (user_id, token iat)
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Snapshot of the authenticated user (the User fields handlers use) and their profile IDs."""
+    id: int
+    name: str
+    username: Optional[str]
+    email: str
+    role: UserRole
+    is_active: bool
+    retailer_id: Optional[int]
+    lender_id: Optional[int]
+
+
+class AuthCache:
+    """Thread-safe LRU cache of authenticated users with a TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[float, AuthenticatedUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[AuthenticatedUser]:
+        """A cached user that has not expired (counted as a hit or a miss)."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            if cached is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, user: AuthenticatedUser) -> None:
+        """Store a user, evicting the least recently used entries beyond max_entries."""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every entry of a user (all their tokens)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters and the number of cached entries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# This worker's cache
+auth_cache = AuthCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+async def load_user(db: AsyncSession, user_id: int, *relationships) -> Optional[User]:
+    """
+    Load a user with their retailer and lender profiles (and any other
+    `relationships` of User, e.g. User.credit_profile) joined in one query.
+    """
+    options = [joinedload(User.retailer_profile), joinedload(User.lender_profile)]
+    options += [joinedload(relationship) for relationship in relationships]
+    result = await db.execute(select(User).options(*options).where(User.id == user_id))
+    return result.unique().scalar_one_or_none()
+
+
+def authenticated_user(user: User) -> AuthenticatedUser:
+    """Snapshot of a user loaded by `load_user`."""
+    return AuthenticatedUser(
+        id=user.id,
+        name=user.name,
+        username=user.username,
+        email=user.email,
+        role=user.role,
+        is_active=bool(user.is_active),
+        retailer_id=user.retailer_profile.id if user.retailer_profile else None,
+        lender_id=user.lender_profile.id if user.lender_profile else None,
+    )
+
+
+async def get_authenticated_user(
+    db: AsyncSession, user_id: int, issued_at: Optional[int]
+) -> Optional[AuthenticatedUser]:
+    """The user of a token from the cache, loaded on a miss (None when the user does not exist)."""
+    key = (user_id, issued_at)
+    user = auth_cache.get(key)
+    if user is None:
+        db_user = await load_user(db, user_id)
+        if db_user is None:
+            return None
+        user = authenticated_user(db_user)
+        auth_cache.put(key, user)
+    return user
+
+
+_CHANGED_USERS_KEY = "auth_cache_changed_users"
+
+
+@event.listens_for(User, "after_update")
+def _remember_access_change(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if state.attrs.is_active.history.has_changes() or state.attrs.role.history.has_changes():
+        state.session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    # After the commit, so a concurrent request can't cache the old row again
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        auth_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS_KEY, None)
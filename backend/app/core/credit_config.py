@@ -3,6 +3,10 @@ Credit Scoring Configuration Module
 
 This module contains all configurable parameters for the credit scoring system.
 Adjust these values to tune scoring behavior without modifying core logic.
+
+These constants form the built-in scoring policy (version 0). Scoring code
+reads the active, possibly newer, version through
+`app.core.scoring_policy.get_scoring_policy()`.
 """
 from decimal import Decimal
 from typing import Dict
@@ -65,6 +69,9 @@ DEFAULT_PENALTY = -100  # Loan defaulted
 LATE_PAYMENT_DAYS = 3
 SEVERELY_LATE_DAYS = 30
 
+# Days an installment may stay unpaid before the delinquency sweep defaults its loan
+DEFAULT_DAYS = 90
+
 
 # ============================================================================
 # USAGE & STABILITY SCORING (20% of score - simplified for v1)
@@ -105,18 +112,13 @@ MAX_BNPL_LIMITS: Dict[str, Decimal] = {
 # ============================================================================
 
 def compute_tier_from_score(score: int) -> str:
-    """Compute credit tier from score."""
-    score = max(0, min(1000, score))  # Clamp to 0-1000
-    
-    for tier, (min_score, max_score) in TIER_BANDS.items():
-        if min_score <= score <= max_score:
-            return tier
-    
-    # Fallback (shouldn't happen)
-    return "TIER_0"
+    """Compute credit tier from score (lookup in the active policy's score->tier table)."""
+    from app.core.scoring_policy import get_scoring_policy
+    return get_scoring_policy().tier_for_score(score)
 
 
 def compute_limit_from_tier(tier: str) -> Decimal:
-    """Compute max BNPL limit from tier."""
-    return MAX_BNPL_LIMITS.get(tier, Decimal("0"))
+    """Compute max BNPL limit from tier (per the active policy)."""
+    from app.core.scoring_policy import get_scoring_policy
+    return get_scoring_policy().limit_for_tier(tier)
 
@@ -1,14 +1,50 @@
+from typing import Any, AsyncIterator, Dict, Type
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from app.core.config import settings
+from app.core.pool_metrics import PoolMetrics, instrument_pool_events, metered_pool_class
+
+
+def pool_options(url: str, pool_class: Type[Pool], metrics: PoolMetrics) -> Dict[str, Any]:
+    """
+    Pool arguments of an engine on `url`, sized from settings and recording into `metrics`.
+
+    In-memory SQLite databases keep SQLAlchemy's single-connection pool ({}).
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": metered_pool_class(pool_class, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Pool counters of this worker's engines (GET /internal/metrics)
+pool_metrics = {
+    "sync": PoolMetrics(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+    "async": PoolMetrics(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+}
 
 # SQLite requires check_same_thread=False for FastAPI
 connect_args = {}
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args=connect_args,
+    **pool_options(settings.DATABASE_URL, QueuePool, pool_metrics["sync"]),
+)
+instrument_pool_events(engine, pool_metrics["sync"])
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -22,3 +58,59 @@ def get_db():
     finally:
         db.close()
 
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    The async driver URL of a database URL (asyncpg on PostgreSQL, aiosqlite on SQLite).
+
+    URLs that already name an async driver are returned unchanged.
+    """
+    parsed = make_url(url)
+    backend = "postgresql" if parsed.get_backend_name() in ("postgres", "postgresql") else parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    if parsed.drivername in ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# Async engine for the request path: handlers await their queries, so the
+# requests of a worker interleave while they wait on the database. Services
+# and background threads keep using the synchronous engine above.
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **pool_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, pool_metrics["async"]),
+)
+instrument_pool_events(async_engine.sync_engine, pool_metrics["async"])
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+
+def dialect_insert(db):
+    """
+    Return the dialect-specific insert() construct for the session's database.
+
+    Unlike the generic insert(), these support ON CONFLICT clauses
+    (on_conflict_do_nothing / on_conflict_do_update) on PostgreSQL and SQLite.
+    """
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect_name}")
+    return insert
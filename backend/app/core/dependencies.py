@@ -1,43 +1,60 @@
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.auth_cache import (
+    AuthenticatedUser, auth_cache, authenticated_user, get_authenticated_user, load_user,
+)
+from app.core.database import get_async_db
 from app.core.security import decode_access_token
 from app.models.user import User, UserRole
+from app.models.retailer import Retailer
+from app.models.lender import Lender
+from app.models.credit_profile import CreditProfile
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _token_claims(token: str) -> Tuple[int, Optional[int]]:
+    """(user_id, iat) of a valid JWT token."""
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     user_id: Optional[int] = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
+        raise _credentials_exception()
+    try:
+        return int(user_id), payload.get("iat")
+    except (TypeError, ValueError):
+        raise _credentials_exception()
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedUser:
+    """Get the current authenticated user from JWT token (cached per worker, see auth_cache)."""
+    user_id, issued_at = _token_claims(token)
+    user = await get_authenticated_user(db, user_id, issued_at)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     return user
 
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+async def get_current_active_user(
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -46,7 +63,7 @@ def get_current_active_user(
 
 def require_role(allowed_roles: list[UserRole]):
     """Dependency factory for role-based access control."""
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    async def role_checker(current_user: AuthenticatedUser = Depends(get_current_active_user)) -> AuthenticatedUser:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -55,3 +72,57 @@ def require_role(allowed_roles: list[UserRole]):
         return current_user
     return role_checker
 
+
+
+def _role_profile_dependency(role: UserRole, relationship, model, not_found_detail: str):
+    """
+    Dependency factory returning the current user's role profile row.
+
+    The user (with the profile, through `relationship`) is loaded in one
+    joined query on an auth cache miss; on a hit only the profile is read.
+    """
+    async def profile_loader(
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        user_id, issued_at = _token_claims(token)
+        user = auth_cache.get((user_id, issued_at))
+        db_user = None
+        if user is None:
+            db_user = await load_user(db, user_id, relationship)
+            if db_user is None:
+                raise _credentials_exception()
+            user = authenticated_user(db_user)
+            auth_cache.put((user_id, issued_at), user)
+
+        if not user.is_active:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        if user.role != role:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+
+        if db_user is not None:
+            profile = getattr(db_user, relationship.key)
+        else:
+            profile = await db.scalar(select(model).where(model.user_id == user.id))
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=not_found_detail,
+            )
+        return profile
+    return profile_loader
+
+
+# Current user's role profile (403 for other roles, 404 without a profile)
+get_current_retailer = _role_profile_dependency(
+    UserRole.RETAILER, User.retailer_profile, Retailer, "Retailer profile not found"
+)
+get_current_lender = _role_profile_dependency(
+    UserRole.LENDER, User.lender_profile, Lender, "Lender profile not found"
+)
+get_current_customer_profile = _role_profile_dependency(
+    UserRole.CUSTOMER, User.credit_profile, CreditProfile, "Credit profile not found"
+)
@@ -0,0 +1,125 @@
+"""
+Database Pool Metrics
+
+Each engine's connection pool is sized from settings (DB_POOL_SIZE,
+DB_MAX_OVERFLOW, ...) and instrumented per worker:
+
+- pool events (checkout, checkin, connect, invalidate) count checkouts,
+  connections in use (and their peak), checkouts beyond DB_POOL_SIZE
+  (overflow) and new and invalidated connections;
+- the pool class times each checkout, including the wait for a free
+  connection, and counts checkouts that timed out. SQLAlchemy has no event
+  before a checkout, so the timing wraps `Pool.connect`.
+
+`GET /internal/metrics` reports them to size pools for the number of workers:
+at most (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers connections per engine
+reach the database.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Type
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+CHECKOUT_WAIT_SAMPLES = 1024  # Most recent checkout waits kept for percentiles
+
+
+class PoolMetrics:
+    """Thread-safe counters of one engine's connection pool."""
+
+    def __init__(self, pool_size: int, max_overflow: int):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._waits = deque(maxlen=CHECKOUT_WAIT_SAMPLES)  # Seconds
+        self._max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if self.in_use > self.pool_size:
+                self.overflow_checkouts += 1
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self._max_wait = max(self._max_wait, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, connections in use and checkout wait percentiles (ms, over the recent checkouts)."""
+        with self._lock:
+            waits = sorted(self._waits)
+
+            def percentile(percent: float) -> float:
+                if not waits:
+                    return 0.0
+                return round(waits[min(len(waits) - 1, int(len(waits) * percent / 100))] * 1000, 3)
+
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkout_wait_p50_ms": percentile(50),
+                "checkout_wait_p99_ms": percentile(99),
+                "checkout_wait_max_ms": round(self._max_wait * 1000, 3),
+            }
+
+
+def metered_pool_class(pool_class: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """A subclass of `pool_class` recording how long each checkout takes (and timeouts) in `metrics`."""
+
+    class MeteredPool(pool_class):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                connection = super().connect()
+            except PoolTimeoutError:
+                metrics.record_timeout()
+                raise
+            metrics.record_wait(time.perf_counter() - started)
+            return connection
+
+    MeteredPool.__name__ = f"Metered{pool_class.__name__}"
+    return MeteredPool
+
+
+def instrument_pool_events(engine: Engine, metrics: PoolMetrics) -> None:
+    """Count the checkouts, checkins, new connections and invalidations of an engine's pool."""
+    event.listen(engine, "checkout", lambda *args: metrics.record_checkout())
+    event.listen(engine, "checkin", lambda *args: metrics.record_checkin())
+    event.listen(engine, "connect", lambda *args: metrics.record_connect())
+    event.listen(engine, "invalidate", lambda *args: metrics.record_invalidation())
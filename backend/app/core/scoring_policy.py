@@ -0,0 +1,185 @@
+"""
+Compiled Scoring Policy
+
+A `ScoringPolicy` is an immutable, versioned snapshot of every scoring
+parameter in credit_config, compiled into lookup tables: the tier of each
+score 0-1000 and the max BNPL limit of each tier. Scoring code reads the
+active policy through `get_scoring_policy()` instead of the module constants,
+so a new version published to the `scoring_policy_versions` table (see
+app/services/scoring_policies.py) is swapped in by every worker without a
+restart.
+
+Version 0 is the built-in policy made of the credit_config constants; it is
+active until a version is published.
+"""
+from decimal import Decimal
+from typing import Dict, Any, Tuple
+
+from app.core import credit_config
+from app.models.credit_document import DocumentType
+
+DEFAULT_POLICY_VERSION = 0
+
+# credit_config constants that make up a policy
+POLICY_PARAMETERS = (
+    "INITIAL_SCORE",
+    "INITIAL_TIER",
+    "INITIAL_MAX_BNPL_LIMIT",
+    "DOCUMENT_WEIGHTS",
+    "MAX_OTHER_DOCUMENT_POINTS",
+    "ON_TIME_PAYMENT_POINTS",
+    "MAX_ON_TIME_PAYMENT_POINTS",
+    "CONSECUTIVE_ON_TIME_STREAK_BONUS",
+    "STREAK_THRESHOLD",
+    "EARLY_REPAYMENT_BONUS_SMALL",
+    "EARLY_REPAYMENT_BONUS_MEDIUM",
+    "EARLY_REPAYMENT_BONUS_LARGE",
+    "EARLY_REPAYMENT_THRESHOLD_SMALL",
+    "EARLY_REPAYMENT_THRESHOLD_LARGE",
+    "LATE_PAYMENT_PENALTY",
+    "SEVERELY_LATE_PENALTY",
+    "DEFAULT_PENALTY",
+    "LATE_PAYMENT_DAYS",
+    "SEVERELY_LATE_DAYS",
+    "DEFAULT_DAYS",
+    "SUCCESSFUL_BNPL_PURCHASE_BONUS",
+    "MAX_USAGE_BONUS_POINTS",
+    "TIER_BANDS",
+    "MAX_BNPL_LIMITS",
+)
+
+# Parameters holding money amounts (Decimal) and tier names (str); the rest are ints
+_DECIMAL_PARAMETERS = (
+    "INITIAL_MAX_BNPL_LIMIT",
+    "EARLY_REPAYMENT_THRESHOLD_SMALL",
+    "EARLY_REPAYMENT_THRESHOLD_LARGE",
+)
+_STRING_PARAMETERS = ("INITIAL_TIER",)
+
+
+def _coerce(name: str, value: Any) -> Any:
+    """Convert a JSON-style parameter value to the type used by credit_config."""
+    if name == "DOCUMENT_WEIGHTS":
+        return {DocumentType(key): int(weight) for key, weight in value.items()}
+    elif name == "TIER_BANDS":
+        return {tier: (int(band[0]), int(band[1])) for tier, band in value.items()}
+    elif name == "MAX_BNPL_LIMITS":
+        return {tier: Decimal(str(limit)) for tier, limit in value.items()}
+    elif name in _DECIMAL_PARAMETERS:
+        return Decimal(str(value))
+    elif name in _STRING_PARAMETERS:
+        return str(value)
+    return int(value)
+
+
+class ScoringPolicy:
+    """
+    Immutable scoring parameters plus their precomputed lookup tables.
+
+    Parameters are available as attributes named like the credit_config
+    constants (e.g. `policy.LATE_PAYMENT_PENALTY`) and as the `parameters`
+    dict (name -> value, as passed to the constructor). Scoring functions take
+    the policy object itself (`compute_score_from_components(..., policy=policy)`).
+    DOCUMENT_WEIGHTS are applied to approved-document counts when a score is
+    computed; stored scoring components never depend on a policy.
+    """
+
+    def __init__(self, version: int, parameters: Dict[str, Any]):
+        missing = [name for name in POLICY_PARAMETERS if name not in parameters]
+        if missing:
+            raise ValueError(f"Missing scoring parameters: {', '.join(missing)}")
+
+        self.version = version
+        self.parameters = {name: parameters[name] for name in POLICY_PARAMETERS}
+        for name, value in self.parameters.items():
+            setattr(self, name, value)
+
+        # Compiled lookups: same first-match rule and TIER_0 fallback as before
+        tiers = []
+        for score in range(1001):
+            for tier, (min_score, max_score) in self.TIER_BANDS.items():
+                if min_score <= score <= max_score:
+                    tiers.append(tier)
+                    break
+            else:
+                tiers.append("TIER_0")
+        self.tier_by_score: Tuple[str, ...] = tuple(tiers)
+        self.limit_by_tier: Dict[str, Decimal] = dict(self.MAX_BNPL_LIMITS)
+
+    def tier_for_score(self, score: int) -> str:
+        """Credit tier of a score (clamped to 0-1000)."""
+        return self.tier_by_score[max(0, min(1000, score))]
+
+    def limit_for_tier(self, tier: str) -> Decimal:
+        """Max BNPL limit of a tier."""
+        return self.limit_by_tier.get(tier, Decimal("0"))
+
+    def with_overrides(self, overrides: Dict[str, Any], version: int) -> "ScoringPolicy":
+        """
+        Return a new policy with some parameters changed.
+
+        Dict parameters (DOCUMENT_WEIGHTS, TIER_BANDS, MAX_BNPL_LIMITS) are
+        merged key by key. JSON-style values are accepted (document types and
+        tiers as strings, amounts as numbers or strings).
+        """
+        parameters = dict(self.parameters)
+        for name, value in overrides.items():
+            if name not in POLICY_PARAMETERS:
+                raise ValueError(f"Unknown scoring parameter: {name}")
+            value = _coerce(name, value)
+            if isinstance(value, dict):
+                value = {**parameters[name], **value}
+            parameters[name] = value
+        return ScoringPolicy(version, parameters)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Parameters as JSON-serializable values (inverse of `from_json`)."""
+        data: Dict[str, Any] = {}
+        for name, value in self.parameters.items():
+            if name == "DOCUMENT_WEIGHTS":
+                value = {document_type.value: weight for document_type, weight in value.items()}
+            elif name == "TIER_BANDS":
+                value = {tier: list(band) for tier, band in value.items()}
+            elif name == "MAX_BNPL_LIMITS":
+                value = {tier: str(limit) for tier, limit in value.items()}
+            elif isinstance(value, Decimal):
+                value = str(value)
+            data[name] = value
+        return data
+
+    @classmethod
+    def from_json(cls, version: int, data: Dict[str, Any]) -> "ScoringPolicy":
+        """
+        Build a policy from stored JSON parameters.
+
+        Parameters added after the version was published take their built-in value.
+        """
+        parameters = {name: getattr(credit_config, name) for name in POLICY_PARAMETERS}
+        parameters.update({name: _coerce(name, value) for name, value in data.items()})
+        return cls(version, parameters)
+
+    def __repr__(self):
+        return f"<ScoringPolicy version={self.version}>"
+
+
+def default_policy() -> ScoringPolicy:
+    """The built-in policy made of the credit_config constants."""
+    return ScoringPolicy(
+        DEFAULT_POLICY_VERSION,
+        {name: getattr(credit_config, name) for name in POLICY_PARAMETERS},
+    )
+
+
+# Replaced as a whole by set_scoring_policy; readers never see a half-built policy
+_active_policy = default_policy()
+
+
+def get_scoring_policy() -> ScoringPolicy:
+    """Return the policy currently used for scoring."""
+    return _active_policy
+
+
+def set_scoring_policy(policy: ScoringPolicy) -> None:
+    """Atomically make `policy` the one used for scoring in this process."""
+    global _active_policy
+    _active_policy = policy
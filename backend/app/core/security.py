@@ -1,9 +1,14 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 from jose import JWTError, jwt
 import bcrypt
 from app.core.config import settings
 
+T = TypeVar("T")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -18,6 +23,69 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+class HashingPoolBusy(Exception):
+    """The password hashing pool has too many pending jobs."""
+
+
+class HashingPool:
+    """
+    Bounded thread pool for bcrypt (which releases the GIL while hashing).
+
+    Runs password hashing and verification off the event loop on `workers`
+    threads. At most `max_pending` jobs (running or queued) are accepted;
+    beyond that `run` fails fast with HashingPoolBusy instead of queueing
+    requests for seconds.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def pending(self) -> int:
+        """Jobs running or waiting for a thread."""
+        with self._lock:
+            return self._pending
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Run `func(*args)` on the pool and wait for its result without blocking the event loop."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingPoolBusy()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            executor = self._executor
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the threads (after the jobs already accepted)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+hashing_pool = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing pool. Raises HashingPoolBusy when it is full."""
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the hashing pool. Raises HashingPoolBusy when it is full."""
+    return await hashing_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -25,7 +93,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
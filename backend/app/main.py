@@ -1,12 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, engine, Base
+from app.core.security import hashing_pool
 from app.core.seed import seed_dev_accounts
-from app.routers import auth, credit_profile, products, loans, credit, lender, retailer
+from app.services.scoring_policies import start_policy_watcher
+from app.services.credit_outbox import start_outbox_worker
+from app.services.catalog_index import start_catalog_watcher
+from app.services.product_search import ensure_search_index
+from app.services.view_counter import flush_view_counts, start_view_flusher
+from app.routers import auth, credit_profile, products, loans, credit, lender, retailer, internal
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+ensure_search_index(engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -24,6 +31,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
 
 # Register routers
@@ -34,6 +42,7 @@ app.include_router(products.router, prefix="/products", tags=["Products"])
 app.include_router(loans.router, prefix="/loans", tags=["Loans"])
 app.include_router(lender.router, prefix="/lender", tags=["Lender"])
 app.include_router(retailer.router, prefix="/retailer", tags=["Retailer"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"])
 
 
 @app.get("/")
@@ -64,3 +73,30 @@ async def startup_event():
     else:
         print("[STARTUP] DEV_SEED is disabled, skipping development account seeding")
 
+    # Load the active scoring policy and keep it up to date without restarts
+    if settings.SCORING_POLICY_REFRESH_SECONDS > 0:
+        start_policy_watcher(settings.SCORING_POLICY_REFRESH_SECONDS)
+
+    if settings.CREDIT_OUTBOX_IN_PROCESS_WORKER:
+        print("[STARTUP] Draining the credit scoring outbox in-process")
+        start_outbox_worker(settings.CREDIT_OUTBOX_POLL_SECONDS)
+
+    if settings.PRODUCT_VIEW_FLUSH_SECONDS > 0:
+        start_view_flusher(settings.PRODUCT_VIEW_FLUSH_SECONDS)
+
+    # Keep the in-memory product catalog index in sync with the products table
+    if settings.CATALOG_REFRESH_SECONDS > 0:
+        start_catalog_watcher(settings.CATALOG_REFRESH_SECONDS)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write the product views counted since the last flush, stop the hashing threads and close the async pool."""
+    try:
+        flushed = flush_view_counts()
+        print(f"[SHUTDOWN] Flushed {flushed} product views")
+    except Exception as e:
+        print(f"[SHUTDOWN] Error flushing product views: {e}")
+    hashing_pool.shutdown()
+    await async_engine.dispose()
+
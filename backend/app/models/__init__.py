@@ -1,26 +1,44 @@
 from app.models.user import User, UserRole
 from app.models.retailer import Retailer
 from app.models.lender import Lender
+from app.models.lender_portfolio_stats import LenderPortfolioStats
 from app.models.credit_profile import CreditProfile
 from app.models.credit_score_event import CreditScoreEvent
+from app.models.credit_score_components import CreditScoreComponents
+from app.models.credit_score_snapshot import CreditScoreSnapshot
+from app.models.credit_outbox_event import CreditOutboxEvent
 from app.models.credit_document import CreditDocument, DocumentType, DocumentStatus
 from app.models.product import Product
+from app.models.catalog_version import CatalogVersion
+from app.models.product_view_count import ProductViewCount
+from app.models.daily_sales_rollup import DailySalesRollup
 from app.models.loan import Loan, LoanStatus
 from app.models.installment import Installment
+from app.models.score_recalculation_checkpoint import ScoreRecalculationCheckpoint
+from app.models.scoring_policy_version import ScoringPolicyVersion
 
 __all__ = [
     "User",
     "UserRole",
     "Retailer",
     "Lender",
+    "LenderPortfolioStats",
     "CreditProfile",
     "CreditScoreEvent",
+    "CreditScoreComponents",
+    "CreditScoreSnapshot",
+    "CreditOutboxEvent",
     "CreditDocument",
     "DocumentType",
     "DocumentStatus",
     "Product",
+    "CatalogVersion",
+    "ProductViewCount",
+    "DailySalesRollup",
     "Loan",
     "LoanStatus",
     "Installment",
+    "ScoreRecalculationCheckpoint",
+    "ScoringPolicyVersion",
 ]
 
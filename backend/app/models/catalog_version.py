@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CatalogVersion(Base):
+    """
+    Single row (id 1) whose version is bumped in the same transaction as every
+    product write; API workers poll it to know when to rebuild their catalog index.
+    """
+    __tablename__ = "catalog_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CatalogVersion {self.version}>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CreditOutboxEvent(Base):
+    """A domain event awaiting credit scoring, written in the business transaction."""
+    __tablename__ = "credit_outbox_events"
+    __table_args__ = (
+        # The worker reads pending events oldest first, and each user's in order
+        Index("ix_credit_outbox_events_processed_at_id", "processed_at", "id"),
+        Index("ix_credit_outbox_events_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # Customer whose score is affected
+    event_type = Column(String, nullable=False)  # "DOCUMENT_APPROVED", "DOCUMENT_REVOKED", "INSTALLMENT_PAID" or "LOAN_STATUS_CHANGED"
+    payload = Column(JSON, nullable=False)  # Ids and values the handler needs (e.g., document_id)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)  # Null while pending
+    failed_at = Column(DateTime(timezone=True), nullable=True)  # Set once attempts are exhausted
+
+    def __repr__(self):
+        return f"<CreditOutboxEvent id={self.id} user_id={self.user_id} type={self.event_type}>"
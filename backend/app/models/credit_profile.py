@@ -12,6 +12,9 @@ class CreditProfile(Base):
     score = Column(Integer, nullable=False, default=300)  # 0-1000
     tier = Column(String, nullable=False, default="TIER_1")  # e.g., "TIER_0", "TIER_1", etc.
     max_bnpl_limit = Column(Numeric(15, 2), nullable=False, default=200000.00)
+    # Change actually applied by the last atomic score update (after clamping),
+    # so score_before can be derived from the UPDATE ... RETURNING row
+    last_applied_delta = Column(Integer, nullable=False, default=0)
     last_recalculated_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CreditScoreComponents(Base):
+    """Running per-user totals of the inputs to `recalculate_full_score`."""
+    __tablename__ = "credit_score_components"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False, index=True)
+    # Approved documents per type (weighted by the scoring policy when scored)
+    mobile_money_statement_documents = Column(Integer, nullable=False, default=0)
+    bank_statement_documents = Column(Integer, nullable=False, default=0)
+    proof_of_address_documents = Column(Integer, nullable=False, default=0)
+    payslip_documents = Column(Integer, nullable=False, default=0)
+    employment_contract_documents = Column(Integer, nullable=False, default=0)
+    business_registration_documents = Column(Integer, nullable=False, default=0)
+    lc1_letter_documents = Column(Integer, nullable=False, default=0)
+    other_documents = Column(Integer, nullable=False, default=0)
+    on_time_count = Column(Integer, nullable=False, default=0)
+    late_count = Column(Integer, nullable=False, default=0)  # LATE_PAYMENT + SEVERELY_LATE_PAYMENT
+    default_count = Column(Integer, nullable=False, default=0)
+    early_repayment_points = Column(Integer, nullable=False, default=0)  # Sum of EARLY_LOAN_REPAYMENT deltas
+    paid_loan_count = Column(Integer, nullable=False, default=0)
+    on_time_streak = Column(Integer, nullable=False, default=0)  # On-time payments since the last late one
+    last_payment_outcome = Column(String, nullable=True)  # Event type of the last payment event
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CreditScoreComponents user_id={self.user_id} on_time={self.on_time_count} late={self.late_count}>"
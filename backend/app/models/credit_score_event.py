@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -6,6 +6,10 @@ from app.core.database import Base
 
 class CreditScoreEvent(Base):
     __tablename__ = "credit_score_events"
+    __table_args__ = (
+        # Point-in-time lookups and replays walk one user's events in order
+        Index("ix_credit_score_events_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -14,6 +18,7 @@ class CreditScoreEvent(Base):
     score_before = Column(Integer, nullable=False)
     score_after = Column(Integer, nullable=False)
     event_metadata = Column(JSON, nullable=True)  # Extra details (e.g., document_id, loan_id, installment_id)
+    policy_version = Column(Integer, nullable=True)  # Scoring policy version that produced the event (null before versioning)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
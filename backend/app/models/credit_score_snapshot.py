@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CreditScoreSnapshot(Base):
+    """A user's credit state right after one of their score events."""
+    __tablename__ = "credit_score_snapshots"
+    __table_args__ = (
+        # Nearest snapshot at or before a point in time
+        Index("ix_credit_score_snapshots_user_id_last_event_at", "user_id", "last_event_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    last_event_id = Column(Integer, nullable=False, unique=True)  # Last event folded into this snapshot
+    last_event_at = Column(DateTime(timezone=True), nullable=True)  # created_at of that event
+    score = Column(Integer, nullable=False)
+    tier = Column(String, nullable=False)
+    max_bnpl_limit = Column(Numeric(15, 2), nullable=False)
+    policy_version = Column(Integer, nullable=True)  # Policy of the last event
+    # Event-sourced scoring components (documents and paid loans are not included)
+    on_time_count = Column(Integer, nullable=False, default=0)
+    late_count = Column(Integer, nullable=False, default=0)
+    default_count = Column(Integer, nullable=False, default=0)
+    early_repayment_points = Column(Integer, nullable=False, default=0)
+    on_time_streak = Column(Integer, nullable=False, default=0)
+    last_payment_outcome = Column(String, nullable=True)
+    event_count = Column(Integer, nullable=False, default=0)  # Events up to and including last_event_id
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<CreditScoreSnapshot user_id={self.user_id} last_event_id={self.last_event_id} score={self.score}>"
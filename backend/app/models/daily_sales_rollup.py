@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, Date, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DailySalesRollup(Base):
+    """BNPL sales per retailer, product and day (UTC), summed by the sales analytics queries."""
+    __tablename__ = "daily_sales_rollups"
+    __table_args__ = (
+        # One row per retailer, day and product; retailer windows are a range scan
+        Index("ix_daily_sales_rollups_retailer_id_day_product_id", "retailer_id", "day", "product_id", unique=True),
+        # Platform-wide windows
+        Index("ix_daily_sales_rollups_day", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    retailer_id = Column(Integer, ForeignKey("retailers.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    loan_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)  # Sum of Loan.total_amount
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DailySalesRollup retailer_id={self.retailer_id} product_id={self.product_id} day={self.day}>"
@@ -1,18 +1,31 @@
-from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.core.database import Base
 
 
 class Installment(Base):
     __tablename__ = "installments"
+    __table_args__ = (
+        # The delinquency sweep reads unpaid installments in due-date order
+        Index("ix_installments_paid_due_date", "paid", "due_date"),
+        # Unpaid installments per loan (lender aging buckets); paid ones are not indexed
+        Index(
+            "ix_installments_unpaid_loan_id_due_date",
+            "loan_id",
+            "due_date",
+            postgresql_where=text("paid = false"),
+            sqlite_where=text("paid = 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    loan_id = Column(Integer, ForeignKey("loans.id"), nullable=False)
+    loan_id = Column(Integer, ForeignKey("loans.id"), nullable=False, index=True)
     due_date = Column(DateTime(timezone=True), nullable=False)
     amount = Column(Numeric(15, 2), nullable=False)
     paid = Column(Boolean, default=False)
     paid_at = Column(DateTime(timezone=True), nullable=True)
+    delinquency_level = Column(String, nullable=True)  # "LATE" or "SEVERELY_LATE" once penalized while unpaid
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
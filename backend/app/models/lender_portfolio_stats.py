@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class LenderPortfolioStats(Base):
+    """Running per-lender dashboard totals, read by `GET /lender/stats`."""
+    __tablename__ = "lender_portfolio_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lender_id = Column(Integer, ForeignKey("lenders.id"), unique=True, nullable=False, index=True)
+    active_loans_count = Column(Integer, nullable=False, default=0)
+    total_principal_outstanding = Column(Numeric(18, 2), nullable=False, default=0)  # Principal of active loans
+    total_interest_earned = Column(Numeric(18, 2), nullable=False, default=0)  # total - principal of all loans
+    # Unpaid installments of active loans by whole days overdue at buckets_as_of
+    current_count = Column(Integer, nullable=False, default=0)  # Not yet due
+    late_1_30 = Column(Integer, nullable=False, default=0)
+    late_31_60 = Column(Integer, nullable=False, default=0)
+    late_61_plus = Column(Integer, nullable=False, default=0)
+    buckets_as_of = Column(DateTime(timezone=True), nullable=False)  # Moved forward by the daily roll-forward
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<LenderPortfolioStats lender_id={self.lender_id} active={self.active_loans_count}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -15,6 +15,13 @@ class LoanStatus(str, enum.Enum):
 
 class Loan(Base):
     __tablename__ = "loans"
+    __table_args__ = (
+        # Keyset-paginated loan lists per lender (optionally by status) and per customer
+        Index("ix_loans_lender_id_status_id", "lender_id", "status", "id"),
+        Index("ix_loans_customer_id_id", "customer_id", "id"),
+        # Retailer dashboard: loans per product, recent ones by created_at
+        Index("ix_loans_product_id_created_at", "product_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -31,7 +38,12 @@ class Loan(Base):
     customer = relationship("User", back_populates="loans", foreign_keys=[customer_id])
     lender = relationship("Lender", back_populates="loans")
     product = relationship("Product", back_populates="loans")
-    installments = relationship("Installment", back_populates="loan", cascade="all, delete-orphan")
+    installments = relationship(
+        "Installment",
+        back_populates="loan",
+        cascade="all, delete-orphan",
+        order_by="Installment.due_date",
+    )
 
     def __repr__(self):
         return f"<Loan {self.id} - {self.status}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Numeric, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Numeric, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -6,10 +6,15 @@ from app.core.database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Retailer-supplied SKUs are unique per retailer (bulk import upsert key)
+        Index("ix_products_retailer_id_sku", "retailer_id", "sku", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    retailer_id = Column(Integer, ForeignKey("retailers.id"), nullable=False)
+    retailer_id = Column(Integer, ForeignKey("retailers.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
+    sku = Column(String, nullable=True)  # Retailer's own SKU
     description = Column(Text, nullable=True)
     price = Column(Numeric(15, 2), nullable=False)
     bnpl_eligible = Column(Boolean, default=True)
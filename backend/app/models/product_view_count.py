@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ProductViewCount(Base):
+    """Product detail views per product and hour (UTC), flushed in batches by the view counter."""
+    __tablename__ = "product_view_counts"
+    __table_args__ = (
+        # One row per product and hour (upsert target)
+        Index("ix_product_view_counts_product_id_hour", "product_id", "hour", unique=True),
+        # Retailer conversion windows
+        Index("ix_product_view_counts_retailer_id_hour", "retailer_id", "hour"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    retailer_id = Column(Integer, ForeignKey("retailers.id"), nullable=False)
+    hour = Column(DateTime(timezone=True), nullable=False)  # Start of the hour
+    view_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ProductViewCount product_id={self.product_id} hour={self.hour} views={self.view_count}>"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ScoreRecalculationCheckpoint(Base):
+    __tablename__ = "score_recalculation_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String, unique=True, nullable=False, index=True)
+    last_user_id = Column(Integer, nullable=False, default=0)  # Highest user_id already recalculated
+    processed_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)  # Null while the run is in progress
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # Set while a run holds the job, renewed per chunk
+
+    def __repr__(self):
+        return f"<ScoreRecalculationCheckpoint job={self.job_name} last_user_id={self.last_user_id}>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ScoringPolicyVersion(Base):
+    """A published set of scoring parameters (see app/core/scoring_policy.py)."""
+    __tablename__ = "scoring_policy_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(Integer, unique=True, nullable=False, index=True)
+    parameters = Column(JSON, nullable=False)  # Every credit_config parameter, JSON-encoded
+    description = Column(String, nullable=True)
+    is_active = Column(Boolean, nullable=False, default=False, index=True)  # At most one active version
+    created_by = Column(Integer, nullable=True)  # Admin user_id, if published through the API
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    activated_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ScoringPolicyVersion version={self.version} active={self.is_active}>"
@@ -1,9 +1,13 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import (
+    HashingPoolBusy, verify_password_async, get_password_hash_async, create_access_token,
+)
 from app.core.config import settings
+from app.core.auth_cache import AuthenticatedUser
 from app.core.dependencies import get_current_active_user
 from app.models.user import User, UserRole
 from app.models.credit_profile import CreditProfile
@@ -14,8 +18,17 @@ from app.schemas.auth import UserRegister, UserLogin, Token, UserMe
 router = APIRouter()
 
 
+def _hashing_busy() -> HTTPException:
+    print("[AUTH] Password hashing pool is full, rejecting request")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Register a new user. Supports CUSTOMER, RETAILER, and LENDER roles.
     
     LENDER role requires admin_code for due diligence verification.
@@ -47,7 +60,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
                 )
         
         # Check if email already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_data.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -56,7 +69,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         
         # Check if username is provided and if it already exists
         if user_data.username:
-            existing_username = db.query(User).filter(User.username == user_data.username).first()
+            existing_username = await db.scalar(select(User).where(User.username == user_data.username))
             if existing_username:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -64,7 +77,12 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
                 )
 
         # Create new user with specified role
-        hashed_password = get_password_hash(user_data.password)
+        # Don't hold a pooled connection while waiting for the hashing pool
+        await db.rollback()
+        try:
+            hashed_password = await get_password_hash_async(user_data.password)
+        except HashingPoolBusy:
+            raise _hashing_busy()
         db_user = User(
             name=user_data.name,
             email=user_data.email,
@@ -74,7 +92,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
             role=requested_role,
         )
         db.add(db_user)
-        db.flush()
+        await db.flush()
 
         # Create role-specific profiles
         if requested_role == UserRole.CUSTOMER:
@@ -107,13 +125,13 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
             db.add(lender)
             print(f"[REGISTER] Created Lender profile for LENDER: {db_user.email}")
         
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         print(f"[REGISTER] User created successfully: {db_user.email}, Role: {db_user.role}")
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"[REGISTER ERROR] {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -144,7 +162,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login and get access token. Accepts either email or username."""
     try:
         print(f"[LOGIN] Attempting login for: {user_data.email_or_username}")
@@ -155,15 +173,15 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         # Check if input contains @ to determine if it's likely an email
         if "@" in user_data.email_or_username:
             # It's likely an email - try email first
-            user = db.query(User).filter(User.email == user_data.email_or_username).first()
+            user = await db.scalar(select(User).where(User.email == user_data.email_or_username))
             print(f"[LOGIN] Searched by email: {user_data.email_or_username}, found: {user is not None}")
         else:
             # No @ symbol - try username first, then email as fallback
-            user = db.query(User).filter(User.username == user_data.email_or_username).first()
+            user = await db.scalar(select(User).where(User.username == user_data.email_or_username))
             print(f"[LOGIN] Searched by username: {user_data.email_or_username}, found: {user is not None}")
             # If not found by username, try email (in case user entered email without @)
             if not user:
-                user = db.query(User).filter(User.email == user_data.email_or_username).first()
+                user = await db.scalar(select(User).where(User.email == user_data.email_or_username))
                 print(f"[LOGIN] Fallback search by email: {user_data.email_or_username}, found: {user is not None}")
         
         if not user:
@@ -174,7 +192,14 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        if not verify_password(user_data.password, user.password_hash):
+        # Don't hold a pooled connection while waiting for the hashing pool
+        db.expunge(user)
+        await db.rollback()
+        try:
+            password_ok = await verify_password_async(user_data.password, user.password_hash)
+        except HashingPoolBusy:
+            raise _hashing_busy()
+        if not password_ok:
             print(f"[LOGIN] Password verification failed for user: {user.email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -220,7 +245,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserMe)
-async def get_me(current_user: User = Depends(get_current_active_user)):
+async def get_me(current_user: AuthenticatedUser = Depends(get_current_active_user)):
     """Get current user info."""
     return UserMe(
         id=current_user.id,
@@ -3,20 +3,19 @@ Credit Scoring API Router
 
 Endpoints for credit profile, documents, and scoring events.
 """
-import os
 import uuid
 from pathlib import Path
-from typing import List, Optional
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.auth_cache import AuthenticatedUser
 from app.core.dependencies import get_current_active_user, require_role
 from app.models import (
-    User, UserRole, CreditProfile, CreditScoreEvent, CreditDocument,
+    UserRole, CreditScoreEvent, CreditDocument,
     DocumentType, DocumentStatus
 )
 from app.schemas.credit import (
@@ -28,12 +27,35 @@ from app.schemas.credit import (
     DocumentReviewRequest,
     DocumentStatusSummary,
     DocumentStatusListResponse,
+    BulkRecalculationStatus,
+    AsOfCreditProfileResponse,
+    OutboxStatsResponse,
+    ScoringPolicyResponse,
+    ScoringPolicyPublishRequest,
+)
+from app.services.bulk_scoring import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_JOB_NAME,
+    claim_checkpoint,
+    get_checkpoint,
+    run_recalculation_job,
 )
 from app.services.credit_scoring import (
     get_or_create_credit_profile,
-    handle_document_approved,
     recalculate_full_score,
 )
+from app.services.scoring_policies import (
+    get_active_policy_version,
+    publish_scoring_policy,
+)
+from app.services.credit_outbox import enqueue_document_approved, enqueue_document_revoked, get_outbox_stats
+from app.services.score_snapshots import (
+    DEFAULT_SNAPSHOT_INTERVAL,
+    get_profile_as_of,
+    run_snapshot_job,
+)
+from app.services.score_components import record_document_review
+from app.core.scoring_policy import default_policy
 
 router = APIRouter()
 
@@ -44,8 +66,8 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 @router.get("/profile/me", response_model=CreditProfileResponse)
 async def get_my_credit_profile(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get current user's credit profile (CUSTOMER only).
@@ -56,16 +78,72 @@ async def get_my_credit_profile(
             detail="Only customers have credit profiles",
         )
 
-    profile = get_or_create_credit_profile(db, current_user.id)
+    profile = await db.run_sync(get_or_create_credit_profile, current_user.id)
     return profile
 
 
+@router.get("/profile/{user_id}/as-of", response_model=AsOfCreditProfileResponse)
+async def get_credit_profile_as_of(
+    user_id: int,
+    ts: datetime,
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get a customer's score, tier and limit as they were at `ts` - ADMIN only.
+    
+    Built from the nearest score snapshot at or before `ts` plus the events
+    after it (e.g. "what was the limit when loan X was approved"). Naive
+    timestamps are taken as UTC.
+    """
+    result = await db.run_sync(get_profile_as_of, user_id, ts)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No credit profile at that time",
+        )
+    return result
+
+
+@router.post("/snapshots", status_code=status.HTTP_202_ACCEPTED)
+async def create_score_snapshots_endpoint(
+    background_tasks: BackgroundTasks,
+    interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+):
+    """
+    Snapshot customer scores in the background - ADMIN only.
+    
+    Adds a snapshot after every `interval`-th event not yet covered, so
+    point-in-time lookups replay at most `interval` events past the last run.
+    """
+    if interval <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="interval must be positive",
+        )
+
+    background_tasks.add_task(run_snapshot_job, interval=interval)
+    return {"message": "Snapshot job started", "interval": interval}
+
+
+@router.get("/outbox/stats", response_model=OutboxStatsResponse)
+async def get_credit_outbox_stats(
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the credit scoring outbox backlog and lag - ADMIN only.
+    """
+    return await db.run_sync(get_outbox_stats)
+
+
 @router.get("/events/me", response_model=CreditScoreEventListResponse)
 async def get_my_credit_events(
     page: int = 1,
     page_size: int = 20,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get paginated list of credit score events for current user (CUSTOMER only).
@@ -80,12 +158,14 @@ async def get_my_credit_events(
     offset = (page - 1) * page_size
 
     # Query events
-    events_query = db.query(CreditScoreEvent).filter(
-        CreditScoreEvent.user_id == current_user.id
-    ).order_by(desc(CreditScoreEvent.created_at))
-
-    total = events_query.count()
-    events = events_query.offset(offset).limit(page_size).all()
+    total = await db.scalar(
+        select(func.count()).select_from(CreditScoreEvent).where(CreditScoreEvent.user_id == current_user.id)
+    )
+    events = (await db.scalars(
+        select(CreditScoreEvent).where(
+            CreditScoreEvent.user_id == current_user.id
+        ).order_by(desc(CreditScoreEvent.created_at)).offset(offset).limit(page_size)
+    )).all()
 
     return CreditScoreEventListResponse(
         events=[CreditScoreEventResponse.model_validate(e) for e in events],
@@ -99,8 +179,8 @@ async def get_my_credit_events(
 async def upload_document(
     document_type: DocumentType = Form(...),
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Upload a credit document (CUSTOMER only).
@@ -139,16 +219,16 @@ async def upload_document(
         status=DocumentStatus.PENDING,
     )
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    await db.commit()
+    await db.refresh(document)
 
     return document
 
 
 @router.get("/documents/me", response_model=CreditDocumentListResponse)
 async def get_my_documents(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get list of all documents uploaded by current user (CUSTOMER only).
@@ -159,9 +239,11 @@ async def get_my_documents(
             detail="Only customers can view their documents",
         )
 
-    documents = db.query(CreditDocument).filter(
-        CreditDocument.user_id == current_user.id
-    ).order_by(desc(CreditDocument.uploaded_at)).all()
+    documents = (await db.scalars(
+        select(CreditDocument).where(
+            CreditDocument.user_id == current_user.id
+        ).order_by(desc(CreditDocument.uploaded_at))
+    )).all()
 
     return CreditDocumentListResponse(
         documents=[CreditDocumentResponse.model_validate(d) for d in documents],
@@ -171,8 +253,8 @@ async def get_my_documents(
 
 @router.get("/documents/status", response_model=DocumentStatusListResponse)
 async def get_document_status_summary(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get status summary for all document types (CUSTOMER only).
@@ -186,9 +268,9 @@ async def get_document_status_summary(
         )
 
     # Get all documents for user
-    user_documents = db.query(CreditDocument).filter(
-        CreditDocument.user_id == current_user.id
-    ).all()
+    user_documents = (await db.scalars(
+        select(CreditDocument).where(CreditDocument.user_id == current_user.id)
+    )).all()
 
     # Create a map of document_type -> document
     doc_map = {doc.document_type: doc for doc in user_documents}
@@ -221,15 +303,16 @@ async def get_document_status_summary(
 async def review_document(
     document_id: int,
     review_data: DocumentReviewRequest,
-    current_user: User = Depends(require_role([UserRole.ADMIN])),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Review a document (APPROVE or REJECT) - ADMIN only.
     
-    If approved, the credit score will be updated automatically.
+    If approved (or no longer approved), the credit score update is queued in
+    the same transaction and applied by the credit worker shortly after.
     """
-    document = db.query(CreditDocument).filter(CreditDocument.id == document_id).first()
+    document = await db.scalar(select(CreditDocument).where(CreditDocument.id == document_id))
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -242,20 +325,25 @@ async def review_document(
     document.reviewer_id = current_user.id
     document.notes = review_data.notes
 
-    # If approved, apply score change
+    # Approved-document counts change with the review; the score change is
+    # queued with it: points for an approval, points taken back when an
+    # approved document is rejected or reset
+    await db.run_sync(record_document_review, document, previous_status)
     if review_data.status == DocumentStatus.APPROVED and previous_status != DocumentStatus.APPROVED:
-        handle_document_approved(db, document)
-    else:
-        db.commit()
-        db.refresh(document)
+        await db.run_sync(enqueue_document_approved, document)
+    elif previous_status == DocumentStatus.APPROVED and review_data.status != DocumentStatus.APPROVED:
+        await db.run_sync(enqueue_document_revoked, document)
+
+    await db.commit()
+    await db.refresh(document)
 
     return document
 
 
 @router.post("/recalculate/me", response_model=CreditProfileResponse)
 async def recalculate_my_score(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Recalculate credit score from scratch (CUSTOMER or ADMIN).
@@ -268,20 +356,132 @@ async def recalculate_my_score(
             detail="Only customers and admins can recalculate scores",
         )
 
-    profile = recalculate_full_score(db, current_user.id)
+    profile = await db.run_sync(recalculate_full_score, current_user.id)
     return profile
 
 
+@router.post("/recalculate/all", response_model=BulkRecalculationStatus, status_code=status.HTTP_202_ACCEPTED)
+async def recalculate_all_scores_endpoint(
+    background_tasks: BackgroundTasks,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    restart: bool = False,
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Start (or resume) a bulk recalculation of every customer's score - ADMIN only.
+    
+    The job runs in the background and commits a checkpoint after each chunk,
+    so calling this again after an interruption resumes from the last chunk.
+    Pass restart=true to start over from the first customer. Returns 409
+    while a run is in progress.
+    """
+    if chunk_size <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="chunk_size must be positive",
+        )
+
+    # Claimed here, so a concurrent request (or restart=true) can't touch a running job
+    if not await db.run_sync(claim_checkpoint, DEFAULT_JOB_NAME):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A bulk recalculation is already running",
+        )
+
+    checkpoint = await db.run_sync(get_checkpoint, DEFAULT_JOB_NAME)
+    background_tasks.add_task(
+        run_recalculation_job,
+        chunk_size=chunk_size,
+        job_name=DEFAULT_JOB_NAME,
+        restart=restart,
+        claimed=True,
+    )
+    return checkpoint
+
+
+@router.get("/recalculate/all", response_model=BulkRecalculationStatus)
+async def get_recalculate_all_status(
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get progress of the bulk score recalculation job - ADMIN only.
+    """
+    checkpoint = await db.run_sync(get_checkpoint, DEFAULT_JOB_NAME)
+    if not checkpoint:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No bulk recalculation has been started",
+        )
+    return checkpoint
+
+
+@router.get("/policies/active", response_model=ScoringPolicyResponse)
+async def get_active_scoring_policy(
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the scoring policy currently in force - ADMIN only.
+    
+    Version 0 is the built-in policy from credit_config, used until a
+    version is published.
+    """
+    row = await db.run_sync(get_active_policy_version)
+    if row is None:
+        policy = default_policy()
+        return ScoringPolicyResponse(
+            version=policy.version,
+            parameters=policy.to_json(),
+            description="Built-in credit_config defaults",
+            is_active=True,
+        )
+    return row
+
+
+@router.post("/policies", response_model=ScoringPolicyResponse, status_code=status.HTTP_201_CREATED)
+async def publish_scoring_policy_endpoint(
+    policy_data: ScoringPolicyPublishRequest,
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Publish a new scoring policy version and make it active - ADMIN only.
+    
+    Only the changed parameters are sent; the rest are copied from the
+    active policy. Every worker switches to the new version on its next
+    policy refresh, without a restart. Existing scores are not recalculated
+    (use POST /credit/recalculate/all for that).
+    """
+    try:
+        row = await db.run_sync(
+            publish_scoring_policy,
+            policy_data.overrides,
+            description=policy_data.description,
+            created_by=current_user.id,
+        )
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid scoring policy: {str(e)}",
+        )
+
+    print(f"[SCORING POLICY] Version {row.version} published by user {current_user.id}")
+    return row
+
+
 @router.get("/documents/{document_id}/download")
 async def download_document(
     document_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Download a document (CUSTOMER can download their own, ADMIN can download any).
     """
-    document = db.query(CreditDocument).filter(CreditDocument.id == document_id).first()
+    document = await db.scalar(select(CreditDocument).where(CreditDocument.id == document_id))
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,46 @@
+from typing import Dict
+from fastapi import APIRouter, Depends
+from app.core.auth_cache import AuthenticatedUser, auth_cache
+from app.core.database import pool_metrics
+from app.core.dependencies import require_role
+from app.models.user import UserRole
+from pydantic import BaseModel
+
+router = APIRouter()
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    entries: int
+
+
+class PoolStats(BaseModel):
+    pool_size: int
+    max_overflow: int
+    in_use: int
+    peak_in_use: int
+    checkouts: int
+    overflow_checkouts: int  # Checkouts beyond pool_size
+    timeouts: int  # Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS
+    connects: int
+    invalidations: int
+    checkout_wait_p50_ms: float
+    checkout_wait_p99_ms: float
+    checkout_wait_max_ms: float
+
+
+class WorkerMetrics(BaseModel):
+    auth_cache: CacheStats
+    db_pools: Dict[str, PoolStats]  # By engine: "sync" and "async"
+
+
+@router.get("/metrics", response_model=WorkerMetrics)
+async def get_metrics(
+    current_user: AuthenticatedUser = Depends(require_role([UserRole.ADMIN])),
+):
+    """Counters of the worker serving the request (ADMIN only)."""
+    return WorkerMetrics(
+        auth_cache=CacheStats(**auth_cache.stats()),
+        db_pools={name: PoolStats(**metrics.stats()) for name, metrics in pool_metrics.items()},
+    )
@@ -1,17 +1,22 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.dependencies import get_current_active_user, require_role
-from app.models.user import User, UserRole
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.auth_cache import AuthenticatedUser
+from app.core.dependencies import get_current_active_user, get_current_customer_profile, get_current_lender
+from app.models.user import UserRole
 from app.models.lender import Lender
 from app.models.product import Product
 from app.models.loan import Loan, LoanStatus
 from app.models.installment import Installment
 from app.models.credit_profile import CreditProfile
 from app.schemas.loan import BNPLRequest, LoanResponse, InstallmentResponse
+from app.services.loan_queries import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, list_loans_page
+from app.services.portfolio_stats import record_loan_created
+from app.services.sales_rollups import record_loan_sale
 
 router = APIRouter()
 
@@ -19,35 +24,18 @@ router = APIRouter()
 @router.post("/bnpl-requests", response_model=LoanResponse, status_code=status.HTTP_201_CREATED)
 async def create_bnpl_request(
     request: BNPLRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    credit_profile: CreditProfile = Depends(get_current_customer_profile),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a BNPL request (CUSTOMER only)."""
-    if current_user.role != UserRole.CUSTOMER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only customers can create BNPL requests",
-        )
-
     # Get product
-    product = db.query(Product).filter(Product.id == request.product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == request.product_id))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found",
         )
 
-    # Get customer's credit profile
-    credit_profile = db.query(CreditProfile).filter(
-        CreditProfile.user_id == current_user.id
-    ).first()
-
-    if not credit_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Credit profile not found",
-        )
-
     # Validate eligibility
     if not product.bnpl_eligible:
         raise HTTPException(
@@ -68,7 +56,7 @@ async def create_bnpl_request(
         )
 
     # Pick a lender (for now, just get the first active lender)
-    lender = db.query(Lender).first()
+    lender = await db.scalar(select(Lender).limit(1))
     if not lender:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -86,7 +74,7 @@ async def create_bnpl_request(
 
     # Create loan
     loan = Loan(
-        customer_id=current_user.id,
+        customer_id=credit_profile.user_id,
         lender_id=lender.id,
         product_id=product.id,
         principal_amount=principal_amount,
@@ -95,7 +83,7 @@ async def create_bnpl_request(
         status=LoanStatus.ACTIVE,
     )
     db.add(loan)
-    db.flush()
+    await db.flush()
 
     # Generate installment schedule (3 installments, monthly)
     installment_amount = total_amount / Decimal("3")
@@ -109,11 +97,15 @@ async def create_bnpl_request(
         )
         db.add(installment)
 
-    db.commit()
-    db.refresh(loan)
+    # Lender dashboard totals and sales rollups change in the same transaction as the loan
+    await db.run_sync(record_loan_created, loan)
+    await db.run_sync(record_loan_sale, loan)
+
+    await db.commit()
+    await db.refresh(loan)
 
     # Load installments
-    installments = db.query(Installment).filter(Installment.loan_id == loan.id).all()
+    installments = (await db.scalars(select(Installment).where(Installment.loan_id == loan.id))).all()
 
     return LoanResponse(
         id=loan.id,
@@ -138,81 +130,69 @@ async def create_bnpl_request(
 
 @router.get("/me", response_model=List[LoanResponse])
 async def get_my_loans(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    loan_status: Optional[LoanStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get current customer's loans."""
+    """
+    Get current customer's loans, one page at a time.
+    
+    Pass the X-Next-Cursor response header as `cursor` to get the next page
+    (the header is absent on the last page).
+    """
     if current_user.role != UserRole.CUSTOMER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only customers can view their loans",
         )
 
-    loans = db.query(Loan).filter(Loan.customer_id == current_user.id).all()
-
-    result = []
-    for loan in loans:
-        installments = db.query(Installment).filter(Installment.loan_id == loan.id).all()
-        result.append(LoanResponse(
-            id=loan.id,
-            customer_id=loan.customer_id,
-            lender_id=loan.lender_id,
-            product_id=loan.product_id,
-            principal_amount=loan.principal_amount,
-            deposit_amount=loan.deposit_amount,
-            total_amount=loan.total_amount,
-            status=loan.status,
-            created_at=loan.created_at,
-            installments=[InstallmentResponse(
-                id=inst.id,
-                loan_id=inst.loan_id,
-                due_date=inst.due_date,
-                amount=inst.amount,
-                paid=inst.paid,
-                paid_at=inst.paid_at,
-            ) for inst in installments],
-        ))
-
-    return result
+    loans, next_cursor = await db.run_sync(
+        list_loans_page,
+        customer_id=current_user.id,
+        status=loan_status,
+        created_from=created_from,
+        created_to=created_to,
+        cursor=cursor,
+        limit=limit,
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
+    return [LoanResponse.model_validate(loan) for loan in loans]
 
 
 @router.get("/lender/loans", response_model=List[LoanResponse])
 async def get_lender_loans(
-    current_user: User = Depends(require_role([UserRole.LENDER])),
-    db: Session = Depends(get_db),
+    response: Response,
+    loan_status: Optional[LoanStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    lender: Lender = Depends(get_current_lender),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get loans for the current lender."""
-    lender = db.query(Lender).filter(Lender.user_id == current_user.id).first()
-    if not lender:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lender profile not found",
-        )
-
-    loans = db.query(Loan).filter(Loan.lender_id == lender.id).all()
-
-    result = []
-    for loan in loans:
-        installments = db.query(Installment).filter(Installment.loan_id == loan.id).all()
-        result.append(LoanResponse(
-            id=loan.id,
-            customer_id=loan.customer_id,
-            lender_id=loan.lender_id,
-            product_id=loan.product_id,
-            principal_amount=loan.principal_amount,
-            deposit_amount=loan.deposit_amount,
-            total_amount=loan.total_amount,
-            status=loan.status,
-            created_at=loan.created_at,
-            installments=[InstallmentResponse(
-                id=inst.id,
-                loan_id=inst.loan_id,
-                due_date=inst.due_date,
-                amount=inst.amount,
-                paid=inst.paid,
-                paid_at=inst.paid_at,
-            ) for inst in installments],
-        ))
-
-    return result
+    """
+    Get loans for the current lender, one page at a time.
+    
+    Pass the X-Next-Cursor response header as `cursor` to get the next page
+    (the header is absent on the last page).
+    """
+    loans, next_cursor = await db.run_sync(
+        list_loans_page,
+        lender_id=lender.id,
+        status=loan_status,
+        created_from=created_from,
+        created_to=created_to,
+        cursor=cursor,
+        limit=limit,
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
 
+    return [LoanResponse.model_validate(loan) for loan in loans]
@@ -1,103 +1,117 @@
-from typing import List
-from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.dependencies import get_current_active_user, require_role
-from app.models.user import User, UserRole
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.auth_cache import AuthenticatedUser
+from app.core.dependencies import get_current_active_user, get_current_customer_profile, get_current_retailer
 from app.models.retailer import Retailer
 from app.models.product import Product
-from app.models.lender import Lender
 from app.models.credit_profile import CreditProfile
-from app.schemas.product import (
-    ProductCreate, ProductUpdate, ProductResponse, ProductDetailResponse,
-    ProductPrice, ProductBNPL, ProductStock, ProductRetailer
-)
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductDetailResponse
+from app.services.catalog_index import bump_catalog_version, get_catalog_async, refresh_catalog_async
+from app.services.product_detail import etag_matches, get_product_detail
+from app.services.product_search import search_products
+from app.services.view_counter import record_product_view
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
 
 @router.get("", response_model=List[ProductResponse])
 async def get_products(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    sort: str = Query("price_asc", pattern="^(price_asc|price_desc|newest|name)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    credit_profile: CreditProfile = Depends(get_current_customer_profile),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get products available for BNPL (CUSTOMER only, filtered by credit profile)."""
-    if current_user.role != UserRole.CUSTOMER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only customers can view products",
-        )
-
-    # Get customer's credit profile
-    credit_profile = db.query(CreditProfile).filter(
-        CreditProfile.user_id == current_user.id
-    ).first()
-
-    if not credit_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Credit profile not found",
-        )
-
-    # Filter products based on eligibility
-    query = db.query(Product).filter(
-        Product.bnpl_eligible == True,
-        Product.stock > 0,
+    """
+    Get products available for BNPL (CUSTOMER only, filtered by credit profile).
+
+    Served from this worker's in-memory catalog index. The total number of
+    eligible products is returned in the X-Total-Count header.
+    """
+    # Eligible, in-stock products priced within the BNPL limit whose
+    # min_required_score (if set) the customer's score meets
+    catalog = await get_catalog_async(db, max_age_seconds=2 * settings.CATALOG_REFRESH_SECONDS)
+    products, total = catalog.page(
+        credit_profile.score,
+        credit_profile.max_bnpl_limit,
+        sort=sort,
+        offset=offset,
+        limit=limit,
     )
-
-    # Filter by min_required_score if set
-    if credit_profile.score is not None:
-        query = query.filter(
-            (Product.min_required_score.is_(None)) |
-            (Product.min_required_score <= credit_profile.score)
-        )
-
-    # Filter by max_bnpl_limit
-    query = query.filter(Product.price <= credit_profile.max_bnpl_limit)
-
-    products = query.all()
+    response.headers["X-Total-Count"] = str(total)
+    return [ProductResponse.model_validate(product) for product in products]
+
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_products_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    credit_profile: CreditProfile = Depends(get_current_customer_profile),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Full-text search over the products available for BNPL (CUSTOMER only).
+
+    Results are ranked by relevance and filtered by the customer's credit
+    profile like `GET /products`. The total number of matches is returned in
+    the X-Total-Count header.
+    """
+    products, total = await db.run_sync(
+        search_products,
+        q,
+        credit_profile.score,
+        credit_profile.max_bnpl_limit,
+        offset=offset,
+        limit=limit,
+    )
+    response.headers["X-Total-Count"] = str(total)
     return products
 
 
 @router.get("/retailer/products", response_model=List[ProductResponse])
 async def get_retailer_products(
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """List retailer's own products."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
-    products = db.query(Product).filter(Product.retailer_id == retailer.id).all()
-    return products
+    products = await db.scalars(select(Product).where(Product.retailer_id == retailer.id))
+    return products.all()
 
 
 @router.post("/retailer/products", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new product."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
     db_product = Product(
         retailer_id=retailer.id,
         **product_data.model_dump(),
     )
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.run_sync(bump_catalog_version)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A product with this SKU already exists",
+        )
+    await db.refresh(db_product)
+    await refresh_catalog_async(db)
     return db_product
 
 
@@ -105,21 +119,14 @@ async def create_product(
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update a product."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
-    db_product = db.query(Product).filter(
+    db_product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.retailer_id == retailer.id,
-    ).first()
+    ))
 
     if not db_product:
         raise HTTPException(
@@ -131,29 +138,31 @@ async def update_product(
     for field, value in update_data.items():
         setattr(db_product, field, value)
 
-    db.commit()
-    db.refresh(db_product)
+    await db.run_sync(bump_catalog_version)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A product with this SKU already exists",
+        )
+    await db.refresh(db_product)
+    await refresh_catalog_async(db)
     return db_product
 
 
 @router.delete("/retailer/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a product."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
-    db_product = db.query(Product).filter(
+    db_product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.retailer_id == retailer.id,
-    ).first()
+    ))
 
     if not db_product:
         raise HTTPException(
@@ -161,18 +170,27 @@ async def delete_product(
             detail="Product not found",
         )
 
-    db.delete(db_product)
-    db.commit()
+    await db.delete(db_product)
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    await refresh_catalog_async(db)
     return None
 
 
 @router.get("/{product_id}", response_model=ProductDetailResponse)
 async def get_product(
     product_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get detailed product information for checkout."""
+    """
+    Get detailed product information for checkout.
+
+    Responses carry an ETag; send it back in If-None-Match to get a 304 when
+    the product did not change.
+    """
     try:
         product_id_int = int(product_id)
     except ValueError:
@@ -181,65 +199,20 @@ async def get_product(
             detail="Invalid product ID format",
         )
 
-    # Get product with retailer relationship
-    product = db.query(Product).filter(Product.id == product_id_int).first()
-    if not product:
+    # Cached per worker until the next product write (catalog version) or rate change
+    catalog = await get_catalog_async(db, max_age_seconds=2 * settings.CATALOG_REFRESH_SECONDS)
+    entry = await db.run_sync(get_product_detail, product_id_int, catalog.version)
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="PRODUCT_NOT_FOUND",
         )
 
-    # Get retailer info
-    retailer = db.query(Retailer).filter(Retailer.id == product.retailer_id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer not found",
-        )
-
-    # Get lender for BNPL configuration (use first lender or defaults)
-    lender = db.query(Lender).first()
-    
-    # Calculate BNPL details
-    # Default: 20% deposit (as per loan creation logic)
-    min_deposit_percent = 20.0
-    # Default: 3 months tenure (as per loan creation logic - 3 installments)
-    max_tenure_months = 3
-    # Use lender's interest rate if available, otherwise default to 10%
-    interest_rate_percent_per_month = float(lender.base_interest_rate) if lender else 10.0
-
-    # Generate SKU from product ID (fallback if not in DB)
-    sku = f"PRD-{product.id:06d}"
-
-    # Format dates
-    created_at_str = product.created_at.isoformat() if product.created_at else ""
-    updated_at_str = product.updated_at.isoformat() if product.updated_at else created_at_str
-
-    return ProductDetailResponse(
-        id=str(product.id),
-        name=product.name,
-        sku=sku,
-        description=product.description or "",
-        price=ProductPrice(
-            currency="UGX",  # Default currency
-            amount=float(product.price)
-        ),
-        bnpl=ProductBNPL(
-            eligible=product.bnpl_eligible,
-            min_deposit_percent=min_deposit_percent,
-            max_tenure_months=max_tenure_months,
-            interest_rate_percent_per_month=interest_rate_percent_per_month
-        ),
-        stock=ProductStock(
-            available_quantity=product.stock,
-            is_active=product.stock > 0
-        ),
-        retailer=ProductRetailer(
-            id=str(retailer.id),
-            name=retailer.business_name
-        ),
-        images=[],  # Empty array for now - can be extended later
-        created_at=created_at_str,
-        updated_at=updated_at_str
-    )
+    # Counted in memory, written in batches (conversion rates)
+    record_product_view(product_id_int, entry.retailer_id)
 
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return entry.detail
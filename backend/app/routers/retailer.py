@@ -1,20 +1,34 @@
-from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.dependencies import require_role
-from app.models.user import User, UserRole
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import SessionLocal, get_async_db
+from app.core.dependencies import get_current_retailer
 from app.models.retailer import Retailer
 from app.models.product import Product
-from app.models.loan import Loan
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, CatalogImportReport
+from app.services.catalog_import import CatalogImporter
+from app.services.catalog_index import bump_catalog_version, refresh_catalog, refresh_catalog_async
+from app.services.sales_rollups import get_sales_series, get_sales_totals, get_top_products
+from app.services.view_counter import get_view_totals
 from pydantic import BaseModel
 
 
 router = APIRouter()
 
+MAX_SALES_WINDOW_DAYS = 731  # Two years of daily periods
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
 
 class BestSellingProduct(BaseModel):
     product_id: str
@@ -35,96 +49,66 @@ class RetailerStats(BaseModel):
     updated_at: str
 
 
+class SalesPeriod(BaseModel):
+    period: date  # First day of the day or month
+    bnpl_sales_count: int
+    bnpl_sales_amount: float
+
+
+class RetailerSalesSeries(BaseModel):
+    retailer_id: str
+    currency: str
+    granularity: str
+    start: date
+    end: date
+    total_bnpl_sales_count: int
+    total_bnpl_sales_amount: float
+    periods: List[SalesPeriod]
+
+
 @router.get("/stats", response_model=RetailerStats)
 async def get_retailer_stats(
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get retailer dashboard statistics."""
     try:
-        # Get retailer profile
-        retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-        if not retailer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Retailer profile not found",
-            )
-
-        # Get all products for this retailer
-        products = db.query(Product).filter(Product.retailer_id == retailer.id).all()
-        product_ids = [p.id for p in products]
-
-        if not product_ids:
-            # No products, return empty stats
-            return RetailerStats(
-                retailer_id=str(retailer.id),
-                currency="UGX",
-                total_bnpl_sales=0.0,
-                bnpl_transactions_30d=0,
-                avg_ticket_size_30d=0.0,
-                conversion_rate_30d=0.0,
-                best_selling_products=[],
-                updated_at=datetime.utcnow().isoformat()
-            )
-
-        # Get all loans for products from this retailer
-        all_loans = db.query(Loan).filter(Loan.product_id.in_(product_ids)).all()
-
-        # Calculate total BNPL sales (sum of all loan amounts)
-        total_bnpl_sales = sum(float(loan.total_amount) for loan in all_loans)
+        # Sales totals and best sellers from the daily rollups
+        today = datetime.now(timezone.utc).date()
+        total_sales = await db.run_sync(get_sales_totals, retailer_id=retailer.id)
+        sales_30d = await db.run_sync(
+            get_sales_totals, start_day=today - timedelta(days=29), end_day=today, retailer_id=retailer.id
+        )
 
-        # Calculate 30-day stats
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        loans_30d = [
-            loan for loan in all_loans
-            if loan.created_at and loan.created_at >= thirty_days_ago
-        ]
+        total_bnpl_sales = float(total_sales["total_amount"])
+        bnpl_transactions_30d = sales_30d["loan_count"]
 
-        bnpl_transactions_30d = len(loans_30d)
-        
         # Calculate average ticket size for last 30 days
-        if loans_30d:
-            total_sales_30d = sum(float(loan.total_amount) for loan in loans_30d)
-            avg_ticket_size_30d = total_sales_30d / bnpl_transactions_30d
+        if bnpl_transactions_30d:
+            avg_ticket_size_30d = float(sales_30d["total_amount"]) / bnpl_transactions_30d
         else:
             avg_ticket_size_30d = 0.0
 
-        # Calculate conversion rate (loans / total products views would require tracking)
-        # For now, use a simple metric: loans / total products
-        # This is a placeholder - in production you'd track actual product views
-        conversion_rate_30d = 0.0  # Default to 0, can be enhanced with view tracking
-
-        # Get best selling products (top 5 by sales amount)
-        product_sales = {}
-        for loan in all_loans:
-            product_id = loan.product_id
-            if product_id not in product_sales:
-                product_sales[product_id] = {
-                    'count': 0,
-                    'amount': Decimal('0')
-                }
-            product_sales[product_id]['count'] += 1
-            product_sales[product_id]['amount'] += loan.total_amount
-
-        # Sort by sales amount and get top 5
-        sorted_products = sorted(
-            product_sales.items(),
-            key=lambda x: float(x[1]['amount']),
-            reverse=True
-        )[:5]
-
-        best_selling_products = []
-        for product_id, sales_data in sorted_products:
-            product = db.query(Product).filter(Product.id == product_id).first()
-            if product:
-                sku = f"PRD-{product.id:06d}"
-                best_selling_products.append(BestSellingProduct(
-                    product_id=str(product_id),
-                    name=product.name,
-                    sku=sku,
-                    bnpl_sales_count=sales_data['count'],
-                    bnpl_sales_amount=float(sales_data['amount'])
-                ))
+        # Conversion rate: BNPL loans per product detail view over the same 30 days
+        views_30d = await db.run_sync(
+            get_view_totals,
+            start=datetime.combine(today - timedelta(days=29), time.min, tzinfo=timezone.utc),
+            retailer_id=retailer.id,
+        )
+        conversion_rate_30d = min(1.0, bnpl_transactions_30d / views_30d) if views_30d else 0.0
+
+        # Best selling products (top 5 by sales amount)
+        top_products = await db.run_sync(get_top_products, retailer_id=retailer.id, limit=5)
+        best_selling_products = [
+            BestSellingProduct(
+                product_id=str(product_id),
+                name=name,
+                sku=sku or f"PRD-{product_id:06d}",
+                bnpl_sales_count=sales_count,
+                bnpl_sales_amount=float(amount),
+            )
+            for product_id, name, sku, sales_count, amount in top_products
+        ]
 
         return RetailerStats(
             retailer_id=str(retailer.id),
@@ -146,44 +130,133 @@ async def get_retailer_stats(
         )
 
 
-@router.get("/products", response_model=List[ProductResponse])
-async def get_retailer_products_alias(
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+@router.get("/sales", response_model=RetailerSalesSeries)
+async def get_retailer_sales(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: str = Query("day", pattern="^(day|month)$"),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Alias route: /retailer/products -> forwards to /products/retailer/products logic."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
+    """
+    BNPL sales per day or month of a window (default: the last 30 days), for trend charts.
+
+    Days are UTC days, read from the daily sales rollups.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+    if (end - start).days >= MAX_SALES_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The window can span at most {MAX_SALES_WINDOW_DAYS} days",
         )
 
-    products = db.query(Product).filter(Product.retailer_id == retailer.id).all()
-    return products
+    series = await db.run_sync(get_sales_series, start, end, retailer_id=retailer.id, granularity=granularity)
+    return RetailerSalesSeries(
+        retailer_id=str(retailer.id),
+        currency="UGX",
+        granularity=granularity,
+        start=start,
+        end=end,
+        total_bnpl_sales_count=sum(entry["loan_count"] for entry in series),
+        total_bnpl_sales_amount=float(sum(entry["total_amount"] for entry in series)),
+        periods=[
+            SalesPeriod(
+                period=entry["period"],
+                bnpl_sales_count=entry["loan_count"],
+                bnpl_sales_amount=float(entry["total_amount"]),
+            )
+            for entry in series
+        ],
+    )
+
+
+@router.post("/products/import", response_model=CatalogImportReport)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bulk import products from a CSV or NDJSON body, upserted by `sku`.
+
+    The format comes from `format` or the Content-Type (text/csv,
+    application/x-ndjson). The body is processed as it streams in, in
+    transactions of a few thousand rows; invalid rows are skipped and
+    reported. The importer runs on a sync session in the threadpool, off the
+    event loop; the async session of the profile lookup gives its connection
+    back first, so the upload holds one connection.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_CONTENT_TYPES.get(content_type)
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or set format",
+            )
+
+    retailer_id = retailer.id
+    await db.close()
+
+    import_db = SessionLocal()
+    try:
+        importer = CatalogImporter(import_db, retailer_id, format)
+        try:
+            async for chunk in request.stream():
+                await run_in_threadpool(importer.feed, chunk)
+            report = await run_in_threadpool(importer.finish)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+        finally:
+            await run_in_threadpool(refresh_catalog, import_db)
+    finally:
+        import_db.close()
+    return report
+
+
+@router.get("/products", response_model=List[ProductResponse])
+async def get_retailer_products_alias(
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Alias route: /retailer/products -> forwards to /products/retailer/products logic."""
+    products = await db.scalars(select(Product).where(Product.retailer_id == retailer.id))
+    return products.all()
 
 
 @router.post("/products", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product_alias(
     product_data: ProductCreate,
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Alias route: /retailer/products (POST) -> forwards to /products/retailer/products logic."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
     db_product = Product(
         retailer_id=retailer.id,
         **product_data.model_dump(),
     )
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.run_sync(bump_catalog_version)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A product with this SKU already exists",
+        )
+    await db.refresh(db_product)
+    await refresh_catalog_async(db)
     return db_product
 
 
@@ -191,21 +264,14 @@ async def create_product_alias(
 async def update_product_alias(
     product_id: int,
     product_data: ProductUpdate,
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Alias route: /retailer/products/{id} (PUT) -> forwards to /products/retailer/products/{id} logic."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
-    db_product = db.query(Product).filter(
+    db_product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.retailer_id == retailer.id,
-    ).first()
+    ))
 
     if not db_product:
         raise HTTPException(
@@ -217,29 +283,31 @@ async def update_product_alias(
     for field, value in update_data.items():
         setattr(db_product, field, value)
 
-    db.commit()
-    db.refresh(db_product)
+    await db.run_sync(bump_catalog_version)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A product with this SKU already exists",
+        )
+    await db.refresh(db_product)
+    await refresh_catalog_async(db)
     return db_product
 
 
 @router.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product_alias(
     product_id: int,
-    current_user: User = Depends(require_role([UserRole.RETAILER])),
-    db: Session = Depends(get_db),
+    retailer: Retailer = Depends(get_current_retailer),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Alias route: /retailer/products/{id} (DELETE) -> forwards to /products/retailer/products/{id} logic."""
-    retailer = db.query(Retailer).filter(Retailer.user_id == current_user.id).first()
-    if not retailer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Retailer profile not found",
-        )
-
-    db_product = db.query(Product).filter(
+    db_product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.retailer_id == retailer.id,
-    ).first()
+    ))
 
     if not db_product:
         raise HTTPException(
@@ -247,7 +315,9 @@ async def delete_product_alias(
             detail="Product not found",
         )
 
-    db.delete(db_product)
-    db.commit()
+    await db.delete(db_product)
+    await db.run_sync(bump_catalog_version)
+    await db.commit()
+    await refresh_catalog_async(db)
     return None
 
@@ -27,6 +27,68 @@ class CreditProfileResponse(BaseModel):
         from_attributes = True
 
 
+class AsOfCreditProfileResponse(BaseModel):
+    """A customer's credit profile as it was at a point in time."""
+    user_id: int
+    as_of: datetime
+    score: int = Field(..., ge=0, le=1000)
+    tier: str
+    max_bnpl_limit: Decimal
+    policy_version: Optional[int] = Field(None, description="Scoring policy version of the last event")
+    last_event_id: Optional[int] = Field(None, description="Last score event at or before as_of")
+    snapshot_id: Optional[int] = Field(None, description="Snapshot the replay started from")
+    replayed_events: int = Field(..., description="Events replayed on top of the snapshot")
+    components: Dict[str, Any] = Field(default_factory=dict, description="Event-sourced scoring components")
+
+
+class OutboxStatsResponse(BaseModel):
+    """Backlog of the credit scoring outbox."""
+    pending: int = Field(..., description="Events waiting for the worker")
+    failed: int = Field(..., description="Events parked after repeated failures")
+    oldest_pending_at: Optional[datetime] = None
+    lag_seconds: float = Field(..., description="Age of the oldest pending event")
+
+
+class BulkRecalculationStatus(BaseModel):
+    """Progress of a bulk score recalculation run."""
+    job_name: str
+    last_user_id: int = Field(..., description="Highest user_id already recalculated")
+    processed_count: int
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    claimed_at: Optional[datetime] = Field(None, description="Set while a run holds the job")
+
+    class Config:
+        from_attributes = True
+
+
+# ============================================================================
+# Scoring Policy Schemas
+# ============================================================================
+
+class ScoringPolicyResponse(BaseModel):
+    """A published scoring policy version."""
+    version: int
+    parameters: Dict[str, Any] = Field(..., description="Every scoring parameter, JSON-encoded")
+    description: Optional[str] = None
+    is_active: bool
+    created_at: Optional[datetime] = None
+    activated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScoringPolicyPublishRequest(BaseModel):
+    """Request schema for publishing a new scoring policy version."""
+    overrides: Dict[str, Any] = Field(
+        ...,
+        description="Parameters that change relative to the active policy, e.g. {\"LATE_PAYMENT_PENALTY\": -20}",
+    )
+    description: Optional[str] = Field(None, max_length=500)
+
+
 # ============================================================================
 # Credit Score Event Schemas
 # ============================================================================
@@ -40,6 +102,7 @@ class CreditScoreEventResponse(BaseModel):
     score_before: int
     score_after: int
     event_metadata: Dict[str, Any] = Field(default_factory=dict, alias="metadata")
+    policy_version: Optional[int] = Field(None, description="Scoring policy version that produced the event")
     created_at: datetime
 
     class Config:
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional, List
@@ -6,6 +6,7 @@ from typing import Optional, List
 
 class ProductCreate(BaseModel):
     name: str
+    sku: Optional[str] = None
     description: Optional[str] = None
     price: Decimal
     bnpl_eligible: bool = True
@@ -15,6 +16,7 @@ class ProductCreate(BaseModel):
 
 class ProductUpdate(BaseModel):
     name: Optional[str] = None
+    sku: Optional[str] = None
     description: Optional[str] = None
     price: Optional[Decimal] = None
     bnpl_eligible: Optional[bool] = None
@@ -26,6 +28,7 @@ class ProductResponse(BaseModel):
     id: int
     retailer_id: int
     name: str
+    sku: Optional[str] = None
     description: Optional[str]
     price: Decimal
     bnpl_eligible: bool
@@ -74,3 +77,22 @@ class ProductDetailResponse(BaseModel):
     created_at: str
     updated_at: str
 
+
+# Bulk catalog import
+class ProductImportRow(ProductCreate):
+    sku: str = Field(..., min_length=1, max_length=64)
+
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row (CSV) or line (NDJSON)
+    sku: Optional[str] = None
+    errors: List[str]
+
+
+class CatalogImportReport(BaseModel):
+    rows: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False  # More failed rows than reported
+
@@ -0,0 +1,333 @@
+"""
+Batched Credit Score Changes
+
+Applies many score changes in one unit of work instead of one
+`apply_score_change` call (and one commit) per event. Changes are grouped per
+user and processed one chunk of users at a time: the chunk's components rows
+and profiles are locked (components first, then profiles, in user_id order -
+the same order as the single-event path), every change is applied in memory
+with the usual 0-1000 clamp, the `CreditScoreEvent` rows are bulk inserted and
+the chunk is committed once.
+
+`handle_installment_payments` and `handle_loan_status_changes` are the bulk
+counterparts of the handlers in `credit_scoring.py`, e.g. for a day's payment
+file.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+
+from app.models import (
+    CreditProfile, CreditScoreEvent, CreditScoreComponents,
+    Loan, Installment, LoanStatus,
+)
+from app.core.database import dialect_insert
+from app.core.scoring_policy import ScoringPolicy, get_scoring_policy
+from app.services.credit_scoring import installment_payment_change, early_repayment_bonus
+from app.services.score_components import (
+    apply_event_to_components,
+    ensure_score_components,
+)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+@dataclass
+class ScoreChange:
+    """
+    One queued score change.
+
+    `event_type` may be None for a change that only adjusts component totals.
+    `source_changes` are component increments for state already written to the
+    source tables (e.g. a loan's PAID status); they are skipped for a user whose
+    components row is rebuilt from those tables in the same batch.
+    """
+    user_id: int
+    delta: int = 0
+    event_type: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    source_changes: Dict[str, int] = field(default_factory=dict)
+
+
+def _lock_chunk_rows(
+    db: Session,
+    user_ids: List[int],
+    policy: ScoringPolicy,
+) -> Tuple[Dict[int, CreditScoreComponents], Dict[int, CreditProfile], set]:
+    """
+    Lock (creating if missing) the components rows and profiles of a chunk.
+
+    Returns:
+        (components by user_id, profiles by user_id, user_ids whose components
+        row was rebuilt from history)
+    """
+    def load_components():
+        return {
+            row.user_id: row for row in db.query(CreditScoreComponents).filter(
+                CreditScoreComponents.user_id.in_(user_ids)
+            ).order_by(CreditScoreComponents.user_id).with_for_update().populate_existing().all()
+        }
+
+    def load_profiles():
+        return {
+            row.user_id: row for row in db.query(CreditProfile).filter(
+                CreditProfile.user_id.in_(user_ids)
+            ).order_by(CreditProfile.user_id).with_for_update().populate_existing().all()
+        }
+
+    components = load_components()
+    rebuilt = set(user_ids) - set(components)
+    if rebuilt:
+        for user_id in sorted(rebuilt):
+            ensure_score_components(db, user_id)
+        components = load_components()
+
+    profiles = load_profiles()
+    missing_profiles = [user_id for user_id in user_ids if user_id not in profiles]
+    if missing_profiles:
+        insert_stmt = dialect_insert(db)
+        db.execute(
+            insert_stmt(CreditProfile).values([
+                {
+                    "user_id": user_id,
+                    "score": policy.INITIAL_SCORE,
+                    "tier": policy.INITIAL_TIER,
+                    "max_bnpl_limit": policy.INITIAL_MAX_BNPL_LIMIT,
+                    "last_applied_delta": 0,
+                }
+                for user_id in missing_profiles
+            ]).on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        profiles = load_profiles()
+
+    return components, profiles, rebuilt
+
+
+def _apply_chunk(db: Session, changes_by_user: Dict[int, List[ScoreChange]]) -> Dict[int, CreditProfile]:
+    """Apply the queued changes of one chunk of users (no commit)."""
+    policy = get_scoring_policy()
+    user_ids = sorted(changes_by_user)
+    components, profiles, rebuilt = _lock_chunk_rows(db, user_ids, policy)
+
+    now = datetime.now(timezone.utc)
+    event_rows: List[Dict[str, Any]] = []
+
+    for user_id in user_ids:
+        row = components[user_id]
+        profile = profiles[user_id]
+        score = profile.score
+        last_applied_delta = profile.last_applied_delta
+
+        for change in changes_by_user[user_id]:
+            if user_id not in rebuilt:
+                for field_name, amount in change.source_changes.items():
+                    setattr(row, field_name, (getattr(row, field_name) or 0) + amount)
+
+            if change.event_type is None:
+                continue
+
+            score_before = score
+            score = max(0, min(1000, score + change.delta))
+            last_applied_delta = score - score_before
+            apply_event_to_components(row, change.event_type, change.delta, change.metadata)
+            event_rows.append({
+                "user_id": user_id,
+                "event_type": change.event_type,
+                "delta": change.delta,
+                "score_before": score_before,
+                "score_after": score,
+                "event_metadata": change.metadata,
+                "policy_version": policy.version,
+            })
+
+        row.updated_at = now
+        if score != profile.score or last_applied_delta != profile.last_applied_delta:
+            profile.score = score
+            profile.tier = policy.tier_for_score(score)
+            profile.max_bnpl_limit = policy.limit_for_tier(profile.tier)
+            profile.last_applied_delta = last_applied_delta
+            profile.updated_at = now
+
+    if event_rows:
+        db.execute(insert(CreditScoreEvent), event_rows)
+
+    return profiles
+
+
+def apply_score_changes(
+    db: Session,
+    changes: Iterable[ScoreChange],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[int, CreditProfile]:
+    """
+    Apply many score changes with one commit per chunk of users.
+
+    Changes for the same user are applied in the order given, each clamped to
+    0-1000 on top of the previous one, exactly as consecutive
+    `apply_score_change` calls would.
+
+    Args:
+        db: Database session
+        changes: Changes to apply
+        chunk_size: Number of users locked, applied and committed per transaction
+
+    Returns:
+        Updated CreditProfile per affected user_id
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    changes_by_user: Dict[int, List[ScoreChange]] = defaultdict(list)
+    for change in changes:
+        changes_by_user[change.user_id].append(change)
+
+    # Components rebuilt from history must see the caller's pending changes
+    db.flush()
+
+    user_ids = sorted(changes_by_user)
+    profiles: Dict[int, CreditProfile] = {}
+
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = {user_id: changes_by_user[user_id] for user_id in user_ids[start:start + chunk_size]}
+        try:
+            profiles.update(_apply_chunk(db, chunk))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return profiles
+
+
+def handle_installment_payments(
+    db: Session,
+    installments: List[Installment],
+    paid_at: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[int, CreditProfile]:
+    """
+    Bulk counterpart of `handle_installment_payment`.
+
+    Each installment is scored at its own paid_at (falling back to `paid_at`,
+    then now). A customer's payments are applied in the order given.
+    Customers are processed in chunks: each chunk's components rows are
+    locked before their on-time streaks are read, so a payment scored
+    elsewhere meanwhile can't make a streak stale.
+
+    Args:
+        db: Database session
+        installments: Paid installments (loans are loaded in one query if needed)
+        paid_at: Default payment timestamp
+        chunk_size: Number of users committed per transaction
+
+    Returns:
+        Updated CreditProfile per customer that received a score event
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if any(not installment.paid for installment in installments):
+        raise ValueError("Installment must be marked as paid")
+
+    loan_ids = {installment.loan_id for installment in installments}
+    customer_by_loan = dict(
+        db.query(Loan.id, Loan.customer_id).filter(Loan.id.in_(loan_ids)).all()
+    ) if loan_ids else {}
+
+    payments_by_customer: Dict[int, List[Installment]] = defaultdict(list)
+    for installment in installments:
+        customer_id = customer_by_loan.get(installment.loan_id)
+        if customer_id is None:
+            raise ValueError("Installment not found")
+        payments_by_customer[customer_id].append(installment)
+
+    # Components rebuilt from history must see the caller's pending changes
+    db.flush()
+
+    policy = get_scoring_policy()
+    default_paid_at = paid_at or datetime.now(timezone.utc)
+    customer_ids = sorted(payments_by_customer)
+    profiles: Dict[int, CreditProfile] = {}
+
+    for start in range(0, len(customer_ids), chunk_size):
+        chunk_ids = customer_ids[start:start + chunk_size]
+        try:
+            # Streaks are read from the locked rows and stay put until the commit
+            components, _, _ = _lock_chunk_rows(db, chunk_ids, policy)
+            changes_by_user: Dict[int, List[ScoreChange]] = {}
+
+            for customer_id in chunk_ids:
+                streak = components[customer_id].on_time_streak or 0
+                for installment in payments_by_customer[customer_id]:
+                    change = installment_payment_change(
+                        installment,
+                        installment.paid_at or default_paid_at,
+                        streak,
+                    )
+                    if change is None:
+                        continue
+
+                    delta, event_type, metadata = change
+                    streak = streak + 1 if event_type == "ON_TIME_PAYMENT" else 0
+                    changes_by_user.setdefault(customer_id, []).append(
+                        ScoreChange(customer_id, delta, event_type, metadata)
+                    )
+
+            if changes_by_user:
+                profiles.update(_apply_chunk(db, changes_by_user))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return profiles
+
+
+def handle_loan_status_changes(
+    db: Session,
+    transitions: List[Tuple[Loan, LoanStatus, LoanStatus]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[int, CreditProfile]:
+    """
+    Bulk counterpart of `handle_loan_status_change`.
+
+    Args:
+        db: Database session
+        transitions: (loan, previous_status, new_status) per changed loan
+        chunk_size: Number of users committed per transaction
+
+    Returns:
+        Updated CreditProfile per affected customer
+    """
+    # Installments of every loan that may earn the early repayment bonus, in one query
+    repaid_loan_ids = [
+        loan.id for loan, previous_status, new_status in transitions
+        if new_status == LoanStatus.PAID and previous_status == LoanStatus.ACTIVE
+    ]
+    installments_by_loan: Dict[int, List[Installment]] = defaultdict(list)
+    if repaid_loan_ids:
+        for installment in db.query(Installment).filter(Installment.loan_id.in_(repaid_loan_ids)).all():
+            installments_by_loan[installment.loan_id].append(installment)
+
+    policy = get_scoring_policy()
+    changes: List[ScoreChange] = []
+
+    for loan, previous_status, new_status in transitions:
+        metadata = {"loan_id": loan.id, "loan_amount": float(loan.total_amount)}
+
+        # Keep the paid-loan total in sync (paid loans emit no event of their own)
+        if (new_status == LoanStatus.PAID) != (previous_status == LoanStatus.PAID):
+            paid_change = {"paid_loan_count": 1 if new_status == LoanStatus.PAID else -1}
+            changes.append(ScoreChange(loan.customer_id, source_changes=paid_change))
+
+        if new_status == LoanStatus.PAID and previous_status == LoanStatus.ACTIVE:
+            delta = early_repayment_bonus(loan, installments_by_loan[loan.id])
+            if delta is not None:
+                changes.append(ScoreChange(loan.customer_id, delta, "EARLY_LOAN_REPAYMENT", metadata))
+
+        elif new_status == LoanStatus.DEFAULTED:
+            changes.append(ScoreChange(loan.customer_id, policy.DEFAULT_PENALTY, "LOAN_DEFAULT", metadata))
+
+    return apply_score_changes(db, changes, chunk_size=chunk_size)
@@ -0,0 +1,281 @@
+"""
+Bulk Credit Score Recalculation
+
+Recalculates every customer's score with grouped aggregate queries instead of
+the per-user queries used by `recalculate_full_score`. Customers are processed
+in user_id order, one chunk at a time: each component is aggregated for the
+whole chunk with a single GROUP BY query, the scoring rules are applied in
+memory and the profiles are written back with bulk inserts/updates. The
+per-user `CreditScoreComponents` rows are refreshed from the same aggregates,
+and each changed score gets a RECALCULATED event (bulk inserted) so the event
+log keeps every score the profile had.
+
+Progress is stored in a `ScoreRecalculationCheckpoint` row that is committed
+together with each chunk, so an interrupted run resumes where it stopped. A
+run first claims the row (`claim_checkpoint`), so two runs of the same job
+never interleave; the claim is renewed with every chunk and released at the
+end, and a claim left by a run that died expires after CLAIM_TIMEOUT_SECONDS.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, insert, update
+
+from app.models import (
+    User, UserRole, CreditProfile, CreditScoreComponents, CreditScoreEvent,
+    ScoreRecalculationCheckpoint,
+)
+from app.core.database import dialect_insert
+from app.core.scoring_policy import get_scoring_policy
+from app.services.credit_scoring import compute_score_from_components, recalculation_event_values
+from app.services.score_components import aggregate_components, component_inputs
+from app.services.scoring_policies import refresh_scoring_policy
+
+DEFAULT_JOB_NAME = "full_recalculation"
+DEFAULT_CHUNK_SIZE = 1000
+CLAIM_TIMEOUT_SECONDS = 15 * 60  # A claim not renewed for this long belongs to a run that died
+
+
+def get_checkpoint(db: Session, job_name: str = DEFAULT_JOB_NAME) -> Optional[ScoreRecalculationCheckpoint]:
+    """Get the checkpoint row for a bulk recalculation job, if any."""
+    return db.query(ScoreRecalculationCheckpoint).filter(
+        ScoreRecalculationCheckpoint.job_name == job_name
+    ).first()
+
+
+def claim_checkpoint(db: Session, job_name: str = DEFAULT_JOB_NAME) -> bool:
+    """
+    Claim a bulk recalculation job for one run, creating its checkpoint if needed.
+
+    The claim is a guarded UPDATE that only succeeds if no other run holds
+    the job (or its claim expired), so concurrent callers can't both get it.
+    Commits.
+
+    Returns:
+        False if another run holds the job
+    """
+    now = datetime.now(timezone.utc)
+    insert_stmt = dialect_insert(db)
+    db.execute(
+        insert_stmt(ScoreRecalculationCheckpoint)
+        .values(job_name=job_name, last_user_id=0, processed_count=0, started_at=now)
+        .on_conflict_do_nothing(index_elements=["job_name"])
+    )
+    result = db.execute(
+        update(ScoreRecalculationCheckpoint)
+        .where(
+            and_(
+                ScoreRecalculationCheckpoint.job_name == job_name,
+                or_(
+                    ScoreRecalculationCheckpoint.claimed_at.is_(None),
+                    ScoreRecalculationCheckpoint.claimed_at < now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS),
+                ),
+            )
+        )
+        .values(claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def release_checkpoint(db: Session, job_name: str = DEFAULT_JOB_NAME) -> None:
+    """Release a job claimed with `claim_checkpoint`. Commits."""
+    db.execute(
+        update(ScoreRecalculationCheckpoint)
+        .where(ScoreRecalculationCheckpoint.job_name == job_name)
+        .values(claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _start_or_resume(db: Session, job_name: str, restart: bool) -> ScoreRecalculationCheckpoint:
+    """Return the checkpoint to continue from, starting a new run when needed."""
+    checkpoint = get_checkpoint(db, job_name)
+    now = datetime.now(timezone.utc)
+
+    if checkpoint is None:
+        checkpoint = ScoreRecalculationCheckpoint(
+            job_name=job_name,
+            last_user_id=0,
+            processed_count=0,
+            started_at=now,
+        )
+        db.add(checkpoint)
+    elif restart or checkpoint.completed_at is not None:
+        # Previous run finished (or caller asked for a fresh run): start over
+        checkpoint.last_user_id = 0
+        checkpoint.processed_count = 0
+        checkpoint.started_at = now
+        checkpoint.completed_at = None
+
+    db.commit()
+    db.refresh(checkpoint)
+    return checkpoint
+
+
+def _recalculate_chunk(db: Session, user_ids: List[int]) -> None:
+    """Recalculate and write back the profiles of one chunk of users (no commit)."""
+    first_id, last_id = user_ids[0], user_ids[-1]
+    components = aggregate_components(db, first_id, last_id)
+
+    existing_profiles = {
+        user_id: (profile_id, score) for user_id, profile_id, score in db.query(
+            CreditProfile.user_id, CreditProfile.id, CreditProfile.score
+        ).filter(
+            CreditProfile.user_id.between(first_id, last_id)
+        ).all()
+    }
+    existing_components = dict(
+        db.query(CreditScoreComponents.user_id, CreditScoreComponents.id).filter(
+            CreditScoreComponents.user_id.between(first_id, last_id)
+        ).all()
+    )
+
+    policy = get_scoring_policy()
+    now = datetime.now(timezone.utc)
+    updates: List[Dict[str, Any]] = []
+    inserts: List[Dict[str, Any]] = []
+    component_updates: List[Dict[str, Any]] = []
+    component_inserts: List[Dict[str, Any]] = []
+    events: List[Dict[str, Any]] = []
+
+    for user_id in user_ids:
+        totals = components[user_id]
+        if user_id in existing_components:
+            component_updates.append({"id": existing_components[user_id], **totals, "updated_at": now})
+        else:
+            component_inserts.append({"user_id": user_id, **totals})
+
+        score = compute_score_from_components(**component_inputs(totals), policy=policy)
+        tier = policy.tier_for_score(score)
+        values = {
+            "score": score,
+            "tier": tier,
+            "max_bnpl_limit": policy.limit_for_tier(tier),
+            "last_recalculated_at": now,
+            "updated_at": now,
+        }
+        if user_id in existing_profiles:
+            profile_id, score_before = existing_profiles[user_id]
+            updates.append({"id": profile_id, **values})
+        else:
+            score_before = policy.INITIAL_SCORE
+            inserts.append({"user_id": user_id, **values})
+
+        if score != score_before:
+            events.append(recalculation_event_values(user_id, score_before, score, policy))
+
+    if updates:
+        db.execute(update(CreditProfile), updates)
+    if inserts:
+        db.execute(insert(CreditProfile), inserts)
+    if component_updates:
+        db.execute(update(CreditScoreComponents), component_updates)
+    if component_inserts:
+        db.execute(insert(CreditScoreComponents), component_inserts)
+    if events:
+        db.execute(insert(CreditScoreEvent), events)
+
+
+def recalculate_all_scores(
+    db: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    job_name: str = DEFAULT_JOB_NAME,
+    restart: bool = False,
+    max_chunks: Optional[int] = None,
+    claim: bool = True,
+    verbose: bool = False,
+) -> ScoreRecalculationCheckpoint:
+    """
+    Recalculate the credit score of every customer in chunks.
+
+    Each chunk is committed together with the checkpoint, so calling this again
+    after an interruption resumes from the last committed user_id. The job is
+    claimed for the duration of the call and released at the end.
+
+    Args:
+        db: Database session
+        chunk_size: Number of customers aggregated and written per transaction
+        job_name: Checkpoint name (lets independent runs coexist)
+        restart: Ignore an unfinished checkpoint and start from the first user
+        max_chunks: Optional limit on chunks processed in this call
+        claim: Claim the job first (False when the caller already claimed it)
+        verbose: Print progress after each chunk (for the CLI script; the
+            endpoint reports progress on GET /credit/recalculate/all)
+
+    Returns:
+        The checkpoint after the last processed chunk
+
+    Raises:
+        ValueError: If another run holds the job
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if claim and not claim_checkpoint(db, job_name):
+        raise ValueError(f"Bulk recalculation {job_name} is already running")
+
+    try:
+        # Score with the latest published policy, even in a long-running worker
+        refresh_scoring_policy(db)
+        checkpoint = _start_or_resume(db, job_name, restart)
+        chunks_done = 0
+
+        while max_chunks is None or chunks_done < max_chunks:
+            user_ids = [
+                row[0] for row in db.query(User.id).filter(
+                    and_(
+                        User.role == UserRole.CUSTOMER,
+                        User.id > checkpoint.last_user_id,
+                    )
+                ).order_by(User.id).limit(chunk_size).all()
+            ]
+
+            if not user_ids:
+                checkpoint.completed_at = datetime.now(timezone.utc)
+                db.commit()
+                break
+
+            try:
+                _recalculate_chunk(db, user_ids)
+                checkpoint.last_user_id = user_ids[-1]
+                checkpoint.processed_count += len(user_ids)
+                checkpoint.claimed_at = datetime.now(timezone.utc)  # Renew the claim
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            chunks_done += 1
+            if verbose:
+                print(f"[RECALCULATE] {job_name}: {checkpoint.processed_count} customers processed (last user_id {checkpoint.last_user_id})")
+    finally:
+        release_checkpoint(db, job_name)
+
+    db.refresh(checkpoint)
+    return checkpoint
+
+
+def run_recalculation_job(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    job_name: str = DEFAULT_JOB_NAME,
+    restart: bool = False,
+    claimed: bool = False,
+) -> None:
+    """
+    Run `recalculate_all_scores` with its own session.
+
+    Used as a background task by the admin endpoint, where the request-scoped
+    session is closed before the job finishes. `claimed` means the caller
+    already claimed the job for this run.
+    """
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        recalculate_all_scores(db, chunk_size=chunk_size, job_name=job_name, restart=restart, claim=not claimed)
+    except Exception as e:
+        print(f"[RECALCULATE ERROR] {job_name}: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,200 @@
+"""
+Bulk Catalog Import
+
+Imports a retailer's catalog from CSV (header row with ProductCreate field
+names) or NDJSON (one JSON object per line). The body is fed in chunks as it
+is received (`CatalogImporter.feed`), rows are parsed and validated against
+`ProductImportRow` one at a time, and valid rows are upserted by
+(retailer_id, sku) in batches, one transaction per batch. Invalid rows are
+reported with their row number and never stop the import.
+"""
+import codecs
+import csv
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.models import Product
+from app.core.database import dialect_insert
+from app.schemas.product import ProductImportRow, ImportRowError, CatalogImportReport
+from app.services.catalog_index import bump_catalog_version
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = 2000  # Rows per transaction
+STATEMENT_ROWS = 500  # Rows per INSERT statement (bound parameter limits)
+MAX_REPORTED_ERRORS = 1000
+
+_UPSERT_FIELDS = ("name", "description", "price", "bnpl_eligible", "min_required_score", "stock")
+
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+
+class CatalogImporter:
+    """
+    Incremental importer of one upload.
+
+    Usage:
+        importer = CatalogImporter(db, retailer_id, "csv")
+        for chunk in body_chunks:
+            importer.feed(chunk)
+        report = importer.finish()
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        retailer_id: int,
+        format: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.db = db
+        self.retailer_id = retailer_id
+        self.format = format
+        self.batch_size = batch_size
+
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""  # Text after the last complete line
+        self._record = ""  # CSV lines of a record with a quoted newline
+        self._header: Optional[List[str]] = None
+        self._batch: Dict[str, Dict[str, Any]] = {}  # sku -> row values (last row of a SKU wins)
+        self._batch_rows: Dict[str, int] = {}  # sku -> row number
+        self._batch_count = 0  # Valid rows in the batch, including replaced ones
+
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+
+    def feed(self, chunk: bytes) -> None:
+        """Process the complete lines of the upload received so far."""
+        # The text after the last newline may be a line cut in the middle
+        *lines, self._buffer = (self._buffer + self._decoder.decode(chunk)).split("\n")
+        for line in lines:
+            self._process_line(line + "\n")
+
+    def finish(self) -> CatalogImportReport:
+        """Process the rest of the upload, write the last batch and return the report."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        if self._buffer:
+            self._process_line(self._buffer)
+            self._buffer = ""
+        if self._record:
+            self._fail(self.rows + 1, None, ["Unterminated quoted field"])
+            self._record = ""
+        self._write_batch()
+        return CatalogImportReport(
+            rows=self.rows,
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+    def _process_line(self, line: str) -> None:
+        if self.format == "ndjson":
+            self.rows += 1
+            if not line.strip():
+                return
+            try:
+                values = json.loads(line)
+            except ValueError as e:
+                self._fail(self.rows, None, [f"Invalid JSON: {str(e)}"])
+                return
+            if not isinstance(values, dict):
+                self._fail(self.rows, None, ["Expected a JSON object"])
+                return
+            self._add_row(self.rows, values)
+            return
+
+        # CSV: a record continues while its quotes are unbalanced
+        self._record += line
+        if self._record.count('"') % 2:
+            return
+        record, self._record = self._record, ""
+        if not record.strip():
+            return
+        fields = next(csv.reader([record]))
+
+        if self._header is None:
+            self._header = [name.strip().lower() for name in fields]
+            if "sku" not in self._header:
+                raise ValueError("The CSV header must have a sku column")
+            return
+
+        self.rows += 1
+        if len(fields) > len(self._header):
+            self._fail(self.rows, None, [f"Expected {len(self._header)} columns, got {len(fields)}"])
+            return
+        # Empty cells are missing values
+        values = {name: value for name, value in zip(self._header, fields) if value.strip() != ""}
+        self._add_row(self.rows, values)
+
+    def _add_row(self, row_number: int, values: Dict[str, Any]) -> None:
+        try:
+            product = ProductImportRow.model_validate(values)
+        except ValidationError as e:
+            sku = values.get("sku")
+            self._fail(row_number, str(sku) if sku is not None else None, _error_messages(e))
+            return
+
+        # Same SKU twice in a batch: one statement can't upsert a row twice, the last row wins
+        self._batch[product.sku] = {
+            "retailer_id": self.retailer_id,
+            "sku": product.sku,
+            **{field: getattr(product, field) for field in _UPSERT_FIELDS},
+        }
+        self._batch_rows[product.sku] = row_number
+        self._batch_count += 1
+        if len(self._batch) >= self.batch_size:
+            self._write_batch()
+
+    def _fail(self, row_number: int, sku: Optional[str], errors: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(ImportRowError(row=row_number, sku=sku, errors=errors))
+
+    def _write_batch(self) -> None:
+        """Upsert the batch in one transaction; on a database error report its rows as failed."""
+        if not self._batch:
+            return
+        rows = list(self._batch.values())
+        row_numbers, count = self._batch_rows, self._batch_count
+        self._batch, self._batch_rows, self._batch_count = {}, {}, 0
+
+        try:
+            upsert_products(self.db, rows)
+            bump_catalog_version(self.db)
+            self.db.commit()
+            self.imported += count
+        except Exception as e:
+            self.db.rollback()
+            for row in rows:
+                self._fail(row_numbers[row["sku"]], row["sku"], [f"Database error: {str(e)[:200]}"])
+
+
+def upsert_products(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert products or update them by (retailer_id, sku), STATEMENT_ROWS rows per statement. Does not commit."""
+    insert = dialect_insert(db)
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(rows), STATEMENT_ROWS):
+        insert_stmt = insert(Product).values(rows[start:start + STATEMENT_ROWS])
+        db.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=["retailer_id", "sku"],
+                set_={
+                    **{field: getattr(insert_stmt.excluded, field) for field in _UPSERT_FIELDS},
+                    "updated_at": now,
+                },
+            )
+        )
@@ -0,0 +1,244 @@
+"""
+Product Catalog Index
+
+Each API worker keeps the BNPL-eligible, in-stock products in memory, sorted
+by price, so `GET /products` answers a customer's eligibility query (price up
+to their max BNPL limit, min_required_score up to their score) with a binary
+search and a filter instead of scanning `products`.
+
+Every product write bumps `CatalogVersion` in its own transaction
+(`bump_catalog_version`). Workers poll that single row (`start_catalog_watcher`)
+and rebuild their index only when the version changed; the worker that made
+the write refreshes right away. Reads only go to the database when the index
+was never loaded or the last check is older than the refresh interval (i.e.
+when no watcher runs).
+
+Request handlers on the async session use `get_catalog_async` and
+`refresh_catalog_async`; the watcher and synchronous callers use the
+functions taking a `Session`.
+"""
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import CatalogVersion, Product
+from app.core.database import dialect_insert
+
+SORT_OPTIONS = ("price_asc", "price_desc", "newest", "name")
+
+
+@dataclass(frozen=True)
+class CatalogProduct:
+    """Immutable copy of an indexed product (same fields as ProductResponse)."""
+    id: int
+    retailer_id: int
+    name: str
+    description: Optional[str]
+    price: Decimal
+    bnpl_eligible: bool
+    min_required_score: Optional[int]
+    stock: int
+    sku: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
+class CatalogIndex:
+    """Eligible products of one catalog version, sorted by (price, id)."""
+
+    def __init__(self, version: int, products: List[CatalogProduct]):
+        self.version = version
+        self.products = sorted(products, key=lambda product: (product.price, product.id))
+        self._prices = [product.price for product in self.products]
+        # Precomputed positions for the other sort orders
+        self._newest_rank = {
+            product.id: rank for rank, product in enumerate(
+                sorted(self.products, key=lambda p: (p.created_at.timestamp() if p.created_at else 0, p.id), reverse=True)
+            )
+        }
+        self._name_rank = {
+            product.id: rank for rank, product in enumerate(
+                sorted(self.products, key=lambda p: (p.name.lower(), p.id))
+            )
+        }
+
+    def eligible(self, score: Optional[int], max_bnpl_limit: Decimal) -> List[CatalogProduct]:
+        """Products priced up to `max_bnpl_limit` whose min_required_score is met (in price order)."""
+        candidates = self.products[:bisect_right(self._prices, max_bnpl_limit)]
+        if score is None:
+            return candidates
+        return [
+            product for product in candidates
+            if product.min_required_score is None or product.min_required_score <= score
+        ]
+
+    def page(
+        self,
+        score: Optional[int],
+        max_bnpl_limit: Decimal,
+        sort: str = "price_asc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[CatalogProduct], int]:
+        """
+        One page of a customer's eligible products.
+
+        Returns:
+            (products of the page, total number of eligible products)
+        """
+        if sort not in SORT_OPTIONS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_OPTIONS)}")
+
+        products = self.eligible(score, max_bnpl_limit)
+        if sort == "price_desc":
+            products = products[::-1]
+        elif sort == "newest":
+            products = sorted(products, key=lambda product: self._newest_rank[product.id])
+        elif sort == "name":
+            products = sorted(products, key=lambda product: self._name_rank[product.id])
+
+        end = None if limit is None else offset + limit
+        return products[offset:end], len(products)
+
+
+_catalog: Optional[CatalogIndex] = None
+_checked_at = 0.0  # time.monotonic() of the last version check
+_refresh_lock = threading.Lock()
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Mark the catalog as changed. Call in the transaction of every product write; does not commit."""
+    insert = dialect_insert(db)
+    insert_stmt = insert(CatalogVersion).values(id=1, version=1)
+    db.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "version": CatalogVersion.version + 1,
+                "updated_at": datetime.now(timezone.utc),
+            },
+        )
+    )
+
+
+_ELIGIBLE_PRODUCTS = select(Product).where(
+    Product.bnpl_eligible == True,
+    Product.stock > 0,
+)
+_CATALOG_VERSION = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+
+def _load_catalog(db: Session, version: int) -> CatalogIndex:
+    return _build_catalog(version, db.scalars(_ELIGIBLE_PRODUCTS).all())
+
+
+def _build_catalog(version: int, products: List[Product]) -> CatalogIndex:
+    return CatalogIndex(version, [
+        CatalogProduct(
+            id=product.id,
+            retailer_id=product.retailer_id,
+            name=product.name,
+            description=product.description,
+            price=product.price,
+            bnpl_eligible=product.bnpl_eligible,
+            min_required_score=product.min_required_score,
+            stock=product.stock,
+            sku=product.sku,
+            created_at=product.created_at,
+            updated_at=product.updated_at,
+        )
+        for product in products
+    ])
+
+
+def refresh_catalog(db: Session) -> CatalogIndex:
+    """
+    Rebuild this worker's index if the catalog version changed.
+
+    Only the version is read when nothing changed. The new index is built
+    aside and swapped in, so readers never see a partial index.
+
+    Returns:
+        The index after the refresh
+    """
+    global _catalog, _checked_at
+
+    with _refresh_lock:
+        version = db.scalar(_CATALOG_VERSION) or 0
+        if _catalog is None or _catalog.version != version:
+            # Writes committed after the version read carry a newer version,
+            # so they are picked up by the next refresh at the latest
+            _catalog = _load_catalog(db, version)
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+def get_catalog(db: Session, max_age_seconds: float) -> CatalogIndex:
+    """This worker's index, checking the version first if the last check is older than `max_age_seconds`."""
+    catalog = _catalog
+    if catalog is None or time.monotonic() - _checked_at >= max_age_seconds:
+        catalog = refresh_catalog(db)
+    return catalog
+
+
+async def refresh_catalog_async(db: AsyncSession) -> CatalogIndex:
+    """
+    `refresh_catalog` on an async session.
+
+    The coroutines of an event loop share its thread, so the refresh lock
+    can't be held while awaiting the database: the index is loaded without
+    it and swapped in unless a newer version was installed meanwhile.
+
+    Returns:
+        The index after the refresh
+    """
+    global _catalog, _checked_at
+
+    version = await db.scalar(_CATALOG_VERSION) or 0
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        catalog = _build_catalog(version, (await db.scalars(_ELIGIBLE_PRODUCTS)).all())
+    with _refresh_lock:
+        if _catalog is None or _catalog.version <= catalog.version:
+            _catalog = catalog
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+async def get_catalog_async(db: AsyncSession, max_age_seconds: float) -> CatalogIndex:
+    """`get_catalog` on an async session."""
+    catalog = _catalog
+    if catalog is None or time.monotonic() - _checked_at >= max_age_seconds:
+        catalog = await refresh_catalog_async(db)
+    return catalog
+
+
+def start_catalog_watcher(interval_seconds: float) -> threading.Thread:
+    """
+    Poll the catalog version every `interval_seconds` in a daemon thread.
+
+    The first check runs immediately, so the index is loaded before the first request.
+    """
+    from app.core.database import SessionLocal
+
+    def watch():
+        while True:
+            db = SessionLocal()
+            try:
+                refresh_catalog(db)
+            except Exception as e:
+                print(f"[CATALOG ERROR] Refresh failed: {str(e)}")
+            finally:
+                db.close()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+    thread.start()
+    return thread
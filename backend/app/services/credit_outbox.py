@@ -0,0 +1,347 @@
+"""
+Credit Scoring Outbox
+
+Request handlers don't score inline. They write a `CreditOutboxEvent` (document
+approved or revoked, installment paid, loan status changed) in the same transaction as
+the business change, and a worker (`run_credit_worker.py`) drains the outbox
+in batches through the `credit_scoring` handlers.
+
+Each event is marked processed in the same transaction as its score change:
+the handlers only flush and `process_outbox_batch` commits once per event, so
+a crash never applies it twice or loses it. Events of the same user are
+handled in id order: after a failure, the user's later events wait until the
+failed one succeeds. An event that keeps failing is parked (`failed_at`) and
+holds back that user's later events until it is dealt with. Several workers
+can run side by side by splitting users between them (`user_id % workers`).
+
+A worker claims each event with a guarded UPDATE before running its handler,
+and the claim is committed with the score change. Workers that read the same
+event (the in-process worker of each API process, or two workers started with
+the same share) wait on that row, and only the first one applies it.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Any
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import and_, case, exists, func, update
+
+from app.models import (
+    CreditOutboxEvent, CreditDocument, Installment, Loan, LoanStatus,
+)
+from app.services.credit_scoring import (
+    handle_document_review,
+    handle_installment_payment,
+    handle_loan_status_change,
+)
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+
+
+def enqueue_credit_event(
+    db: Session,
+    user_id: int,
+    event_type: str,
+    payload: Dict[str, Any],
+) -> CreditOutboxEvent:
+    """
+    Add a domain event to the outbox. Does not commit: the event is written
+    with the caller's business change or not at all.
+    """
+    event = CreditOutboxEvent(user_id=user_id, event_type=event_type, payload=payload, attempts=0)
+    db.add(event)
+    return event
+
+
+def enqueue_document_approved(db: Session, document: CreditDocument) -> CreditOutboxEvent:
+    """Queue the score change of an approved document."""
+    return enqueue_credit_event(db, document.user_id, "DOCUMENT_APPROVED", {"document_id": document.id})
+
+
+def enqueue_document_revoked(db: Session, document: CreditDocument) -> CreditOutboxEvent:
+    """Queue taking back the points of a document that is no longer approved."""
+    return enqueue_credit_event(db, document.user_id, "DOCUMENT_REVOKED", {"document_id": document.id})
+
+
+def enqueue_installment_paid(
+    db: Session,
+    installment: Installment,
+    paid_at: Optional[datetime] = None,
+) -> CreditOutboxEvent:
+    """Queue the score change of a paid installment (scored at `paid_at`, default now)."""
+    paid_at = paid_at or installment.paid_at or datetime.now(timezone.utc)
+    return enqueue_credit_event(db, installment.loan.customer_id, "INSTALLMENT_PAID", {
+        "installment_id": installment.id,
+        "paid_at": paid_at.isoformat(),
+    })
+
+
+def enqueue_loan_status_change(
+    db: Session,
+    loan: Loan,
+    previous_status: LoanStatus,
+    new_status: LoanStatus,
+) -> CreditOutboxEvent:
+    """Queue the score change of a loan status transition."""
+    return enqueue_credit_event(db, loan.customer_id, "LOAN_STATUS_CHANGED", {
+        "loan_id": loan.id,
+        "previous_status": previous_status.value,
+        "new_status": new_status.value,
+    })
+
+
+def _process_document_reviewed(db: Session, payload: Dict[str, Any]) -> None:
+    document = db.get(CreditDocument, payload["document_id"])
+    if document is None:
+        raise ValueError("Document not found")
+    # Scores the document's current status (it may have been reviewed again since)
+    handle_document_review(db, document, commit=False)
+
+
+def _process_installment_paid(db: Session, payload: Dict[str, Any]) -> None:
+    installment = db.query(Installment).options(
+        joinedload(Installment.loan)
+    ).filter(Installment.id == payload["installment_id"]).first()
+    if installment is None:
+        raise ValueError("Installment not found")
+    paid_at = datetime.fromisoformat(payload["paid_at"]) if payload.get("paid_at") else None
+    handle_installment_payment(db, installment, paid_at, commit=False)
+
+
+def _process_loan_status_changed(db: Session, payload: Dict[str, Any]) -> None:
+    loan = db.get(Loan, payload["loan_id"])
+    if loan is None:
+        raise ValueError("Loan not found")
+    handle_loan_status_change(
+        db, loan, LoanStatus(payload["previous_status"]), LoanStatus(payload["new_status"]), commit=False
+    )
+
+
+_HANDLERS: Dict[str, Callable[[Session, Dict[str, Any]], None]] = {
+    "DOCUMENT_APPROVED": _process_document_reviewed,
+    "DOCUMENT_REVOKED": _process_document_reviewed,
+    "INSTALLMENT_PAID": _process_installment_paid,
+    "LOAN_STATUS_CHANGED": _process_loan_status_changed,
+}
+
+
+def _pending_events(db: Session, batch_size: int, workers: int, worker_index: int) -> List[CreditOutboxEvent]:
+    """Oldest pending events of this worker's users, skipping users held back by a parked event."""
+    parked = aliased(CreditOutboxEvent)
+    query = db.query(CreditOutboxEvent).filter(
+        and_(
+            CreditOutboxEvent.processed_at.is_(None),
+            CreditOutboxEvent.failed_at.is_(None),
+            ~exists().where(
+                and_(
+                    parked.user_id == CreditOutboxEvent.user_id,
+                    parked.id < CreditOutboxEvent.id,
+                    parked.processed_at.is_(None),
+                    parked.failed_at.isnot(None),
+                )
+            ),
+        )
+    )
+    if workers > 1:
+        query = query.filter(CreditOutboxEvent.user_id % workers == worker_index)
+    return query.order_by(CreditOutboxEvent.id).limit(batch_size).all()
+
+
+def _claim_event(db: Session, event_id: int) -> bool:
+    """
+    Mark a pending event processed, unless another worker already claimed it.
+
+    The UPDATE locks the row until the caller commits or rolls back: a worker
+    claiming the same event waits, then finds it processed (or pending again
+    after a rollback). Does not commit.
+
+    Returns:
+        True if this session claimed the event
+    """
+    result = db.execute(
+        update(CreditOutboxEvent)
+        .where(
+            and_(
+                CreditOutboxEvent.id == event_id,
+                CreditOutboxEvent.processed_at.is_(None),
+                CreditOutboxEvent.failed_at.is_(None),
+            )
+        )
+        .values(
+            processed_at=datetime.now(timezone.utc),
+            attempts=func.coalesce(CreditOutboxEvent.attempts, 0) + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _record_failure(db: Session, event_id: int, error: str, max_attempts: int) -> None:
+    """Count a failed attempt of a still pending event, parking it after `max_attempts`. Does not commit."""
+    attempts = func.coalesce(CreditOutboxEvent.attempts, 0) + 1
+    db.execute(
+        update(CreditOutboxEvent)
+        .where(
+            and_(
+                CreditOutboxEvent.id == event_id,
+                CreditOutboxEvent.processed_at.is_(None),
+            )
+        )
+        .values(
+            attempts=attempts,
+            last_error=error,
+            failed_at=case((attempts >= max_attempts, datetime.now(timezone.utc)), else_=CreditOutboxEvent.failed_at),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def process_outbox_batch(
+    db: Session,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    worker_index: int = 0,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> int:
+    """
+    Run the scoring handler of up to `batch_size` pending events.
+
+    Args:
+        db: Database session
+        batch_size: Events read per batch
+        workers: Number of workers sharing the outbox
+        worker_index: This worker's share (users with user_id % workers == worker_index)
+        max_attempts: Failures after which an event is parked
+
+    Returns:
+        Number of events processed successfully
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    if not 0 <= worker_index < workers:
+        raise ValueError("worker_index must be between 0 and workers - 1")
+
+    processed = 0
+    held_back = set()  # Users with a failed event in this batch
+
+    pending = [(event.id, event.user_id) for event in _pending_events(db, batch_size, workers, worker_index)]
+    for event_id, user_id in pending:
+        if user_id in held_back:
+            continue
+
+        try:
+            if not _claim_event(db, event_id):
+                # Another worker got there first: skip the user unless it applied the event
+                db.rollback()
+                if db.get(CreditOutboxEvent, event_id).processed_at is None:
+                    held_back.add(user_id)
+                continue
+
+            event = db.get(CreditOutboxEvent, event_id)
+            handler = _HANDLERS.get(event.event_type)
+            if handler is None:
+                raise ValueError(f"Unknown outbox event type: {event.event_type}")
+
+            # The handlers only flush: this commit marks the event processed
+            # together with its score change
+            handler(db, event.payload)
+            db.commit()
+            processed += 1
+        except Exception as e:
+            db.rollback()
+            held_back.add(user_id)
+            _record_failure(db, event_id, str(e)[:500], max_attempts)
+            db.commit()
+            print(f"[OUTBOX ERROR] Event {event_id} (user {user_id}) failed: {str(e)}")
+
+    return processed
+
+
+def get_outbox_stats(db: Session) -> Dict[str, Any]:
+    """
+    Outbox backlog metrics.
+
+    Returns:
+        pending (events waiting), failed (parked events), oldest_pending_at and
+        lag_seconds (age of the oldest pending event, 0 when empty)
+    """
+    pending, oldest_pending_at = db.query(
+        func.count(CreditOutboxEvent.id),
+        func.min(CreditOutboxEvent.created_at),
+    ).filter(
+        and_(
+            CreditOutboxEvent.processed_at.is_(None),
+            CreditOutboxEvent.failed_at.is_(None),
+        )
+    ).one()
+
+    failed = db.query(func.count(CreditOutboxEvent.id)).filter(
+        and_(
+            CreditOutboxEvent.processed_at.is_(None),
+            CreditOutboxEvent.failed_at.isnot(None),
+        )
+    ).scalar()
+
+    lag_seconds = 0.0
+    if oldest_pending_at is not None:
+        if oldest_pending_at.tzinfo is None:
+            # SQLite returns naive UTC timestamps
+            oldest_pending_at = oldest_pending_at.replace(tzinfo=timezone.utc)
+        lag_seconds = max(0.0, (datetime.now(timezone.utc) - oldest_pending_at).total_seconds())
+
+    return {
+        "pending": pending,
+        "failed": failed,
+        "oldest_pending_at": oldest_pending_at,
+        "lag_seconds": lag_seconds,
+    }
+
+
+def run_outbox_worker(
+    poll_seconds: float,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    worker_index: int = 0,
+    once: bool = False,
+) -> None:
+    """
+    Drain the outbox until stopped, sleeping `poll_seconds` whenever it is empty.
+
+    Prints the batch size and the outbox lag after every non-empty batch.
+    """
+    from app.core.database import SessionLocal
+
+    while True:
+        db = SessionLocal()
+        try:
+            processed = process_outbox_batch(db, batch_size, workers, worker_index)
+            if processed:
+                stats = get_outbox_stats(db)
+                print(
+                    f"[OUTBOX] Processed {processed} events "
+                    f"(pending {stats['pending']}, failed {stats['failed']}, "
+                    f"lag {stats['lag_seconds']:.1f}s)"
+                )
+        except Exception as e:
+            processed = 0
+            print(f"[OUTBOX ERROR] Batch failed: {str(e)}")
+        finally:
+            db.close()
+
+        if once:
+            return
+        if processed < batch_size:
+            time.sleep(poll_seconds)
+
+
+def start_outbox_worker(poll_seconds: float) -> threading.Thread:
+    """Drain the outbox in a daemon thread of this process (the API's default worker)."""
+    thread = threading.Thread(
+        target=run_outbox_worker,
+        args=(poll_seconds,),
+        name="credit-outbox-worker",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -4,79 +4,172 @@ Credit Scoring Service
 This module contains the core credit scoring logic. It's designed to be modular
 so that ML models can be plugged in later without breaking the API.
 """
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, update
 import sqlalchemy as sa
 
 from app.models import (
-    User, CreditProfile, CreditScoreEvent, CreditDocument, 
+    CreditProfile, CreditScoreEvent, CreditDocument,
     Loan, Installment, LoanStatus, DocumentType, DocumentStatus
 )
-from app.core.credit_config import (
-    INITIAL_SCORE, INITIAL_TIER, INITIAL_MAX_BNPL_LIMIT,
-    DOCUMENT_WEIGHTS, MAX_OTHER_DOCUMENT_POINTS,
-    ON_TIME_PAYMENT_POINTS, MAX_ON_TIME_PAYMENT_POINTS,
-    CONSECUTIVE_ON_TIME_STREAK_BONUS, STREAK_THRESHOLD,
-    EARLY_REPAYMENT_BONUS_SMALL, EARLY_REPAYMENT_BONUS_MEDIUM, EARLY_REPAYMENT_BONUS_LARGE,
-    EARLY_REPAYMENT_THRESHOLD_SMALL, EARLY_REPAYMENT_THRESHOLD_LARGE,
-    LATE_PAYMENT_PENALTY, SEVERELY_LATE_PENALTY, DEFAULT_PENALTY,
-    LATE_PAYMENT_DAYS, SEVERELY_LATE_DAYS,
-    SUCCESSFUL_BNPL_PURCHASE_BONUS, MAX_USAGE_BONUS_POINTS,
-    compute_tier_from_score, compute_limit_from_tier,
+from app.core.database import dialect_insert
+from app.core.scoring_policy import ScoringPolicy, get_scoring_policy
+from app.services.score_components import (
+    get_or_create_score_components,
+    event_component_changes,
+    increment_score_components,
+    ensure_score_components,
+    component_inputs,
 )
 
+# Score events that add or take back the points of a document
+DOCUMENT_EVENT_TYPES = [
+    "DOCUMENT_APPROVED",
+    "DOCUMENT_REVOKED",
+]
 
-def get_or_create_credit_profile(db: Session, user_id: int) -> CreditProfile:
-    """Get or create a credit profile for a user."""
+
+def get_or_create_credit_profile(db: Session, user_id: int, commit: bool = True) -> CreditProfile:
+    """Get or create a credit profile for a user (a new one is only flushed when commit is False)."""
     profile = db.query(CreditProfile).filter(CreditProfile.user_id == user_id).first()
     
     if not profile:
+        policy = get_scoring_policy()
         profile = CreditProfile(
             user_id=user_id,
-            score=INITIAL_SCORE,
-            tier=INITIAL_TIER,
-            max_bnpl_limit=INITIAL_MAX_BNPL_LIMIT,
+            score=policy.INITIAL_SCORE,
+            tier=policy.INITIAL_TIER,
+            max_bnpl_limit=policy.INITIAL_MAX_BNPL_LIMIT,
         )
         db.add(profile)
-        db.commit()
-        db.refresh(profile)
+        if commit:
+            db.commit()
+            db.refresh(profile)
+        else:
+            db.flush()
     
     return profile
 
 
+def _clamped_score_expression(delta: int):
+    """SQL expression for the profile's score after adding delta, clamped to 0-1000."""
+    raw_score = CreditProfile.score + delta
+    return case((raw_score < 0, 0), (raw_score > 1000, 1000), else_=raw_score)
+
+
+def _tier_expression(score_expression, policy: ScoringPolicy):
+    """SQL CASE mapping a score expression to its tier (mirrors policy.tier_for_score)."""
+    return case(
+        *[
+            (score_expression.between(min_score, max_score), tier)
+            for tier, (min_score, max_score) in policy.TIER_BANDS.items()
+        ],
+        else_="TIER_0",
+    )
+
+
+def _limit_expression(score_expression, policy: ScoringPolicy):
+    """SQL CASE mapping a score expression to its tier's max BNPL limit."""
+    return case(
+        *[
+            (score_expression.between(min_score, max_score), policy.limit_for_tier(tier))
+            for tier, (min_score, max_score) in policy.TIER_BANDS.items()
+        ],
+        else_=Decimal("0"),
+    )
+
+
+def _atomic_score_update(db: Session, user_id: int, delta: int, policy: ScoringPolicy):
+    """
+    Add delta to a user's score with a single UPDATE ... RETURNING statement.
+    
+    Clamping, tier and limit are computed by the database from the row's
+    current score, and the UPDATE holds the row lock until commit, so
+    concurrent score changes can't be lost. Does not commit.
+    
+    Returns:
+        Row of (id, score, last_applied_delta), or None if the user has no profile yet
+    """
+    new_score = _clamped_score_expression(delta)
+    stmt = (
+        update(CreditProfile)
+        .where(CreditProfile.user_id == user_id)
+        .values(
+            score=new_score,
+            tier=_tier_expression(new_score, policy),
+            max_bnpl_limit=_limit_expression(new_score, policy),
+            # SET expressions see the old row, so this is the clamped change
+            last_applied_delta=new_score - CreditProfile.score,
+            updated_at=datetime.now(timezone.utc),
+        )
+        .returning(CreditProfile.id, CreditProfile.score, CreditProfile.last_applied_delta)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).first()
+
+
+def _insert_initial_credit_profile(db: Session, user_id: int, policy: ScoringPolicy) -> None:
+    """Create a user's initial profile unless another transaction already did. Does not commit."""
+    insert = dialect_insert(db)
+    db.execute(
+        insert(CreditProfile)
+        .values(
+            user_id=user_id,
+            score=policy.INITIAL_SCORE,
+            tier=policy.INITIAL_TIER,
+            max_bnpl_limit=policy.INITIAL_MAX_BNPL_LIMIT,
+            last_applied_delta=0,
+        )
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+
 def apply_score_change(
     db: Session,
     user_id: int,
     delta: int,
     event_type: str,
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    commit: bool = True,
 ) -> CreditProfile:
     """
     Apply a score change and create an event record.
     
+    The score is updated with one atomic UPDATE ... RETURNING statement and the
+    user's CreditScoreComponents totals with SQL increments, both in the same
+    transaction as the event insert, so concurrent changes to the same user
+    (e.g., two installments paid at once) are never lost. The event records
+    the version of the scoring policy that applied the change.
+    
     Args:
         db: Database session
         user_id: User ID
         delta: Score change (positive or negative)
         event_type: Type of event (e.g., "DOCUMENT_APPROVED", "ON_TIME_PAYMENT")
         metadata: Optional metadata (e.g., document_id, loan_id)
+        commit: Commit the change; False only flushes it into the caller's transaction
     
     Returns:
         Updated CreditProfile
     """
-    profile = get_or_create_credit_profile(db, user_id)
+    policy = get_scoring_policy()
     
-    score_before = profile.score
-    score_after = max(0, min(1000, score_before + delta))  # Clamp to 0-1000
+    # Components first, then profile: every writer locks the rows in this order
+    changes = event_component_changes(event_type, delta, metadata)
+    if not increment_score_components(db, user_id, changes, event_type):
+        ensure_score_components(db, user_id)
+        increment_score_components(db, user_id, changes, event_type)
     
-    # Update profile
-    profile.score = score_after
-    profile.tier = compute_tier_from_score(score_after)
-    profile.max_bnpl_limit = compute_limit_from_tier(profile.tier)
-    profile.updated_at = datetime.now(timezone.utc)
+    updated = _atomic_score_update(db, user_id, delta, policy)
+    if updated is None:
+        _insert_initial_credit_profile(db, user_id, policy)
+        updated = _atomic_score_update(db, user_id, delta, policy)
+    
+    score_after = updated.score
+    score_before = score_after - updated.last_applied_delta
     
     # Create event
     event = CreditScoreEvent(
@@ -86,21 +179,91 @@ def apply_score_change(
         score_before=score_before,
         score_after=score_after,
         event_metadata=metadata or {},
+        policy_version=policy.version,
     )
     db.add(event)
-    db.commit()
-    db.refresh(profile)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     
-    return profile
+    # The UPDATE bypassed the session, so reload any copy it already holds
+    return db.get(CreditProfile, updated.id, populate_existing=True)
 
 
-def handle_document_approved(db: Session, document: CreditDocument) -> CreditProfile:
+def handle_document_review(db: Session, document: CreditDocument, commit: bool = True) -> CreditProfile:
+    """
+    Bring the score in line with a reviewed document's current status.
+    
+    An approved document that is not scored yet gets a DOCUMENT_APPROVED
+    event; a scored document that is no longer approved gets a
+    DOCUMENT_REVOKED event. Either event brings the points of the document's
+    type to its weight times the scored documents (OTHER documents capped), as
+    `compute_score_from_components` counts them. Whether a document is scored
+    is read from its last document event, so a document reviewed several times
+    before the worker catches up (approve -> reject -> approve) is scored once.
+    
+    The approved-document counts on the components row are not changed here:
+    they follow the review itself (`record_document_review`).
+    
+    Args:
+        db: Database session
+        document: Reviewed CreditDocument
+        commit: Commit the change; False only flushes it (see apply_score_change)
+    
+    Returns:
+        Updated CreditProfile
+    """
+    user_id = document.user_id
+    policy = get_scoring_policy()
+    
+    # Document events of the user for this type, oldest first
+    events = db.query(CreditScoreEvent).filter(
+        and_(
+            CreditScoreEvent.user_id == user_id,
+            CreditScoreEvent.event_type.in_(DOCUMENT_EVENT_TYPES),
+            CreditScoreEvent.event_metadata["document_type"].as_string() == document.document_type.value,
+        )
+    ).order_by(CreditScoreEvent.id).all()
+    
+    scored_ids = set()
+    points_in_score = 0  # Points the score holds for documents of this type
+    for event in events:
+        points_in_score += event.delta
+        document_id = (event.event_metadata or {}).get("document_id")
+        if event.event_type == "DOCUMENT_APPROVED":
+            scored_ids.add(document_id)
+        else:
+            scored_ids.discard(document_id)
+    
+    approved = document.status == DocumentStatus.APPROVED
+    if (document.id in scored_ids) == approved:
+        return get_or_create_credit_profile(db, user_id, commit=commit)
+    
+    if approved:
+        scored_ids.add(document.id)
+    else:
+        scored_ids.discard(document.id)
+    points = document_points({document.document_type: len(scored_ids)}, policy)
+    
+    return apply_score_change(
+        db=db,
+        user_id=user_id,
+        delta=points - points_in_score,
+        event_type="DOCUMENT_APPROVED" if approved else "DOCUMENT_REVOKED",
+        metadata={"document_id": document.id, "document_type": document.document_type.value},
+        commit=commit,
+    )
+
+
+def handle_document_approved(db: Session, document: CreditDocument, commit: bool = True) -> CreditProfile:
     """
     Handle document approval and apply score change.
     
     Args:
         db: Database session
         document: Approved CreditDocument
+        commit: Commit the change; False only flushes it (see apply_score_change)
     
     Returns:
         Updated CreditProfile
@@ -108,45 +271,14 @@ def handle_document_approved(db: Session, document: CreditDocument) -> CreditPro
     if document.status != DocumentStatus.APPROVED:
         raise ValueError("Document must be approved to apply score change")
     
-    # Get document weight
-    delta = DOCUMENT_WEIGHTS.get(document.document_type, 0)
-    
-    # Cap "OTHER" documents
-    if document.document_type == DocumentType.OTHER:
-        # Count existing OTHER document points
-        existing_other_points = db.query(
-            func.sum(CreditScoreEvent.delta)
-        ).join(
-            CreditDocument
-        ).filter(
-            and_(
-                CreditScoreEvent.user_id == document.user_id,
-                CreditScoreEvent.event_type == "DOCUMENT_APPROVED",
-                CreditDocument.document_type == DocumentType.OTHER,
-                CreditScoreEvent.id != None  # Placeholder for the new event
-            )
-        ).scalar() or 0
-        
-        # Only apply if under cap
-        if existing_other_points >= MAX_OTHER_DOCUMENT_POINTS:
-            delta = 0
-    
-    if delta > 0:
-        return apply_score_change(
-            db=db,
-            user_id=document.user_id,
-            delta=delta,
-            event_type="DOCUMENT_APPROVED",
-            metadata={"document_id": document.id, "document_type": document.document_type.value}
-        )
-    
-    return get_or_create_credit_profile(db, document.user_id)
+    return handle_document_review(db, document, commit=commit)
 
 
 def handle_installment_payment(
     db: Session,
     installment: Installment,
-    paid_at: Optional[datetime] = None
+    paid_at: Optional[datetime] = None,
+    commit: bool = True,
 ) -> CreditProfile:
     """
     Handle installment payment and apply score change based on timeliness.
@@ -155,6 +287,7 @@ def handle_installment_payment(
         db: Database session
         installment: Installment that was paid (must have loan relationship loaded)
         paid_at: Payment timestamp (defaults to now)
+        commit: Commit the change; False only flushes it (see apply_score_change)
     
     Returns:
         Updated CreditProfile
@@ -173,60 +306,124 @@ def handle_installment_payment(
     customer_id = installment.loan.customer_id
     paid_at = paid_at or datetime.now(timezone.utc)
     
+    # The current streak is kept on the components row. Locking it (before the
+    # profile, as apply_score_change does) keeps it stable until this payment's
+    # event is committed.
+    components = get_or_create_score_components(db, customer_id, lock=True)
+    
+    change = installment_payment_change(installment, paid_at, components.on_time_streak)
+    if change is None:
+        # Within grace period, no penalty
+        if commit:
+            db.commit()
+        return get_or_create_credit_profile(db, customer_id, commit=commit)
+    
+    delta, event_type, metadata = change
+    return apply_score_change(
+        db=db,
+        user_id=customer_id,
+        delta=delta,
+        event_type=event_type,
+        metadata=metadata,
+        commit=commit,
+    )
+
+
+def installment_payment_change(
+    installment: Installment,
+    paid_at: datetime,
+    on_time_streak: int,
+) -> Optional[Tuple[int, str, Dict[str, Any]]]:
+    """
+    Work out the score change for one installment payment based on timeliness.
+    
+    Shared by `handle_installment_payment` and the batched handlers.
+    
+    Args:
+        installment: Paid installment
+        paid_at: Payment timestamp
+        on_time_streak: User's consecutive on-time payments before this one
+    
+    Returns:
+        (delta, event_type, metadata), or None for a payment within the grace period
+    """
+    policy = get_scoring_policy()
+    
     # Calculate days overdue (negative if early)
     days_overdue = (paid_at.date() - installment.due_date.date()).days
     
     # Determine event type and delta
     if days_overdue <= 0:
         # On-time or early payment
-        delta = ON_TIME_PAYMENT_POINTS
+        delta = policy.ON_TIME_PAYMENT_POINTS
         
-        # Check for consecutive on-time streak
-        recent_events = db.query(CreditScoreEvent).filter(
-            and_(
-                CreditScoreEvent.user_id == customer_id,
-                CreditScoreEvent.event_type == "ON_TIME_PAYMENT"
-            )
-        ).order_by(CreditScoreEvent.created_at.desc()).limit(STREAK_THRESHOLD - 1).all()
-        
-        if len(recent_events) >= STREAK_THRESHOLD - 1:
-            # Check if they're consecutive (simplified check)
-            delta += CONSECUTIVE_ON_TIME_STREAK_BONUS
+        if on_time_streak >= policy.STREAK_THRESHOLD - 1:
+            # This payment completes (or extends) a streak of consecutive on-time payments
+            delta += policy.CONSECUTIVE_ON_TIME_STREAK_BONUS
         
         event_type = "ON_TIME_PAYMENT"
         
-    elif days_overdue <= LATE_PAYMENT_DAYS:
+    elif days_overdue <= policy.LATE_PAYMENT_DAYS:
         # Within grace period, no penalty
-        return get_or_create_credit_profile(db, customer_id)
-        
-    elif days_overdue <= SEVERELY_LATE_DAYS:
-        # Late payment
-        delta = LATE_PAYMENT_PENALTY
-        event_type = "LATE_PAYMENT"
+        return None
         
     else:
-        # Severely late
-        delta = SEVERELY_LATE_PENALTY
-        event_type = "SEVERELY_LATE_PAYMENT"
+        # Late or severely late, less what the delinquency sweep already applied
+        change = delinquency_change(days_overdue, installment.delinquency_level, policy)
+        if change is None:
+            return None
+        _, delta, event_type = change
+    
+    metadata = {
+        "installment_id": installment.id,
+        "loan_id": installment.loan_id,
+        "days_overdue": days_overdue
+    }
+    return delta, event_type, metadata
+
+
+def delinquency_change(
+    days_overdue: int,
+    current_level: Optional[str],
+    policy: Optional[ScoringPolicy] = None,
+) -> Optional[Tuple[str, int, str]]:
+    """
+    Late penalty due for an installment, on top of what its delinquency level
+    already received.
     
-    return apply_score_change(
-        db=db,
-        user_id=customer_id,
-        delta=delta,
-        event_type=event_type,
-        metadata={
-            "installment_id": installment.id,
-            "loan_id": installment.loan_id,
-            "days_overdue": days_overdue
-        }
-    )
+    Shared by the payment path and the delinquency sweep, so an installment is
+    penalized once per level whether the sweep or the late payment gets there first.
+    
+    Args:
+        days_overdue: Days past the due date
+        current_level: Installment's delinquency_level (None, "LATE" or "SEVERELY_LATE")
+        policy: Scoring policy to apply (defaults to the active policy)
+    
+    Returns:
+        (new level, delta, event_type), or None if no further penalty is due
+    """
+    policy = policy or get_scoring_policy()
+    
+    if days_overdue > policy.SEVERELY_LATE_DAYS:
+        if current_level == "SEVERELY_LATE":
+            return None
+        if current_level == "LATE":
+            # Only the difference: the late penalty was applied earlier
+            return "SEVERELY_LATE", policy.SEVERELY_LATE_PENALTY - policy.LATE_PAYMENT_PENALTY, "DELINQUENCY_ESCALATED"
+        return "SEVERELY_LATE", policy.SEVERELY_LATE_PENALTY, "SEVERELY_LATE_PAYMENT"
+    
+    if days_overdue > policy.LATE_PAYMENT_DAYS and current_level is None:
+        return "LATE", policy.LATE_PAYMENT_PENALTY, "LATE_PAYMENT"
+    
+    return None
 
 
 def handle_loan_status_change(
     db: Session,
     loan: Loan,
     previous_status: LoanStatus,
-    new_status: LoanStatus
+    new_status: LoanStatus,
+    commit: bool = True,
 ) -> Optional[CreditProfile]:
     """
     Handle loan status changes and apply score changes.
@@ -236,156 +433,218 @@ def handle_loan_status_change(
         loan: Loan with changed status
         previous_status: Previous loan status
         new_status: New loan status
+        commit: Commit the change; False only flushes it (see apply_score_change)
     
     Returns:
         Updated CreditProfile or None if no change needed
+    
+    Commits (when commit is True) only when it writes something: a score
+    event, or the paid-loan total of a transition to or from PAID.
     """
+    # Keep the paid-loan total in sync (paid loans emit no event of their own)
+    paid_count_changed = (new_status == LoanStatus.PAID) != (previous_status == LoanStatus.PAID)
+    if paid_count_changed:
+        # A missing row is rebuilt from the loans table, so it must see the new status
+        db.flush()
+        paid_change = {"paid_loan_count": 1 if new_status == LoanStatus.PAID else -1}
+        if not increment_score_components(db, loan.customer_id, paid_change):
+            ensure_score_components(db, loan.customer_id)
+    
     if new_status == LoanStatus.PAID and previous_status == LoanStatus.ACTIVE:
         # Early full repayment bonus
-        # Check if loan was paid early (simplified: check if all installments paid early)
         installments = db.query(Installment).filter(Installment.loan_id == loan.id).all()
+        delta = early_repayment_bonus(loan, installments)
         
-        if installments:
-            all_early = all(
-                inst.paid and inst.paid_at and inst.paid_at.date() <= inst.due_date.date()
-                for inst in installments
+        if delta is not None:
+            return apply_score_change(
+                db=db,
+                user_id=loan.customer_id,
+                delta=delta,
+                event_type="EARLY_LOAN_REPAYMENT",
+                metadata={"loan_id": loan.id, "loan_amount": float(loan.total_amount)},
+                commit=commit,
             )
-            
-            if all_early:
-                # Determine bonus based on loan amount
-                if loan.total_amount < EARLY_REPAYMENT_THRESHOLD_SMALL:
-                    delta = EARLY_REPAYMENT_BONUS_SMALL
-                elif loan.total_amount < EARLY_REPAYMENT_THRESHOLD_LARGE:
-                    delta = EARLY_REPAYMENT_BONUS_MEDIUM
-                else:
-                    delta = EARLY_REPAYMENT_BONUS_LARGE
-                
-                return apply_score_change(
-                    db=db,
-                    user_id=loan.customer_id,
-                    delta=delta,
-                    event_type="EARLY_LOAN_REPAYMENT",
-                    metadata={"loan_id": loan.id, "loan_amount": float(loan.total_amount)}
-                )
     
     elif new_status == LoanStatus.DEFAULTED:
         # Default penalty
         return apply_score_change(
             db=db,
             user_id=loan.customer_id,
-            delta=DEFAULT_PENALTY,
+            delta=get_scoring_policy().DEFAULT_PENALTY,
             event_type="LOAN_DEFAULT",
-            metadata={"loan_id": loan.id, "loan_amount": float(loan.total_amount)}
+            metadata={"loan_id": loan.id, "loan_amount": float(loan.total_amount)},
+            commit=commit,
         )
     
+    if paid_count_changed and commit:
+        # No score event: still persist the paid-loan total
+        db.commit()
     return None
 
 
-def recalculate_full_score(db: Session, user_id: int) -> CreditProfile:
+def early_repayment_bonus(loan: Loan, installments: List[Installment]) -> Optional[int]:
     """
-    Recalculate credit score from scratch using all available data.
+    Bonus for a loan repaid in full early, or None if it doesn't qualify.
     
-    This allows us to change rules in the future and re-run scoring.
+    Args:
+        loan: Loan that moved from ACTIVE to PAID
+        installments: All installments of the loan
+    """
+    # Check if loan was paid early (simplified: check if all installments paid early)
+    if not installments:
+        return None
+    
+    all_early = all(
+        inst.paid and inst.paid_at and inst.paid_at.date() <= inst.due_date.date()
+        for inst in installments
+    )
+    if not all_early:
+        return None
+    
+    # Determine bonus based on loan amount
+    policy = get_scoring_policy()
+    if loan.total_amount < policy.EARLY_REPAYMENT_THRESHOLD_SMALL:
+        return policy.EARLY_REPAYMENT_BONUS_SMALL
+    elif loan.total_amount < policy.EARLY_REPAYMENT_THRESHOLD_LARGE:
+        return policy.EARLY_REPAYMENT_BONUS_MEDIUM
+    return policy.EARLY_REPAYMENT_BONUS_LARGE
+
+
+def document_points(document_counts: Dict[DocumentType, int], policy: Optional[ScoringPolicy] = None) -> int:
+    """
+    Points from approved documents under a policy's DOCUMENT_WEIGHTS.
     
     Args:
-        db: Database session
-        user_id: User ID
+        document_counts: Number of approved documents per type
+        policy: Scoring policy to apply (defaults to the active policy)
     
     Returns:
-        Updated CreditProfile
+        Weighted points, OTHER documents capped at MAX_OTHER_DOCUMENT_POINTS
     """
-    profile = get_or_create_credit_profile(db, user_id)
+    policy = policy or get_scoring_policy()
+    weights = policy.DOCUMENT_WEIGHTS
     
-    # Start from initial score
-    base_score = INITIAL_SCORE
+    points = 0
+    for document_type, count in document_counts.items():
+        if document_type != DocumentType.OTHER:
+            points += weights.get(document_type, 0) * count
     
-    # 1. Document-based scoring (40% component)
-    approved_documents = db.query(CreditDocument).filter(
-        and_(
-            CreditDocument.user_id == user_id,
-            CreditDocument.status == DocumentStatus.APPROVED
-        )
-    ).all()
+    other_points = weights.get(DocumentType.OTHER, 0) * document_counts.get(DocumentType.OTHER, 0)
+    return points + min(other_points, policy.MAX_OTHER_DOCUMENT_POINTS)
+
+
+def compute_score_from_components(
+    document_counts: Dict[DocumentType, int],
+    on_time_count: int,
+    late_count: int,
+    default_count: int,
+    early_repayment_points: int,
+    paid_loan_count: int,
+    policy: Optional[ScoringPolicy] = None,
+) -> int:
+    """
+    Apply the scoring rules to pre-aggregated per-user components.
     
-    document_points = 0
-    other_document_points = 0
+    This is the single source of truth for the recalculation formula, shared by
+    the per-user and bulk recalculation paths and the policy simulator. The
+    components are policy-independent counts; the policy's weights are only
+    applied here.
     
-    for doc in approved_documents:
-        points = DOCUMENT_WEIGHTS.get(doc.document_type, 0)
-        
-        if doc.document_type == DocumentType.OTHER:
-            other_document_points += points
-        else:
-            document_points += points
+    Args:
+        document_counts: Number of approved documents per type
+        on_time_count: Number of ON_TIME_PAYMENT events
+        late_count: Number of LATE_PAYMENT and SEVERELY_LATE_PAYMENT events
+        default_count: Number of LOAN_DEFAULT events
+        early_repayment_points: Sum of EARLY_LOAN_REPAYMENT deltas
+        paid_loan_count: Number of loans in PAID status
+        policy: Scoring policy to apply (defaults to the active policy)
     
-    # Cap OTHER documents
-    document_points += min(other_document_points, MAX_OTHER_DOCUMENT_POINTS)
+    Returns:
+        Final score clamped to 0-1000
+    """
+    policy = policy or get_scoring_policy()
     
-    # 2. Repayment behavior scoring (40% component)
-    # Count on-time payments
-    on_time_events = db.query(CreditScoreEvent).filter(
-        and_(
-            CreditScoreEvent.user_id == user_id,
-            CreditScoreEvent.event_type == "ON_TIME_PAYMENT"
-        )
-    ).count()
+    # 1. Document-based scoring (40% component), OTHER documents capped
+    points_from_documents = document_points(document_counts, policy)
     
-    repayment_points = min(on_time_events * ON_TIME_PAYMENT_POINTS, MAX_ON_TIME_PAYMENT_POINTS)
+    # 2. Repayment behavior scoring (40% component)
+    repayment_points = min(on_time_count * policy.ON_TIME_PAYMENT_POINTS, policy.MAX_ON_TIME_PAYMENT_POINTS)
+    repayment_points += late_count * policy.LATE_PAYMENT_PENALTY
+    repayment_points += default_count * policy.DEFAULT_PENALTY
+    repayment_points += early_repayment_points
     
-    # Count late payments
-    late_events = db.query(CreditScoreEvent).filter(
-        and_(
-            CreditScoreEvent.user_id == user_id,
-            CreditScoreEvent.event_type.in_(["LATE_PAYMENT", "SEVERELY_LATE_PAYMENT"])
-        )
-    ).count()
+    # 3. Usage & stability (20% component - simplified)
+    usage_points = min(paid_loan_count * policy.SUCCESSFUL_BNPL_PURCHASE_BONUS, policy.MAX_USAGE_BONUS_POINTS)
     
-    repayment_points += late_events * LATE_PAYMENT_PENALTY
+    # Note: In a real system, you might want to weight these components differently
+    # For now, we'll use a simple additive model
+    final_score = policy.INITIAL_SCORE + points_from_documents + repayment_points + usage_points
     
-    # Count defaults
-    default_events = db.query(CreditScoreEvent).filter(
-        and_(
-            CreditScoreEvent.user_id == user_id,
-            CreditScoreEvent.event_type == "LOAN_DEFAULT"
-        )
-    ).count()
+    # Clamp to 0-1000
+    return max(0, min(1000, final_score))
+
+
+def recalculation_event_values(
+    user_id: int,
+    score_before: int,
+    score_after: int,
+    policy: ScoringPolicy,
+) -> Dict[str, Any]:
+    """
+    Column values of the RECALCULATED event recording a score changed by a recalculation.
     
-    repayment_points += default_events * DEFAULT_PENALTY
+    Recalculations set the score instead of applying a delta; the event keeps
+    the event log (and `get_profile_as_of`, which replays it) in step with the
+    profile. It feeds no scoring component.
+    """
+    return {
+        "user_id": user_id,
+        "event_type": "RECALCULATED",
+        "delta": score_after - score_before,
+        "score_before": score_before,
+        "score_after": score_after,
+        "event_metadata": {},
+        "policy_version": policy.version,
+    }
+
+
+def recalculate_full_score(db: Session, user_id: int) -> CreditProfile:
+    """
+    Recalculate credit score from scratch using all available data.
     
-    # Early repayment bonuses
-    early_repayment_events = db.query(CreditScoreEvent).filter(
-        and_(
-            CreditScoreEvent.user_id == user_id,
-            CreditScoreEvent.event_type == "EARLY_LOAN_REPAYMENT"
-        )
-    ).all()
+    This allows us to change rules in the future and re-run scoring. The inputs
+    come from the user's CreditScoreComponents row, which is kept up to date by
+    every score event (and rebuilt from history if missing), so this is a
+    constant number of queries regardless of the user's history. A changed
+    score is recorded as a RECALCULATED event.
     
-    for event in early_repayment_events:
-        repayment_points += event.delta
+    Args:
+        db: Database session
+        user_id: User ID
     
-    # 3. Usage & stability (20% component - simplified)
-    # Count successful BNPL purchases (loans that were paid)
-    successful_loans = db.query(Loan).filter(
-        and_(
-            Loan.customer_id == user_id,
-            Loan.status == LoanStatus.PAID
-        )
-    ).count()
+    Returns:
+        Updated CreditProfile
+    """
+    get_or_create_credit_profile(db, user_id)
     
-    usage_points = min(successful_loans * SUCCESSFUL_BNPL_PURCHASE_BONUS, MAX_USAGE_BONUS_POINTS)
+    # Lock the components row, then the profile (the same order as
+    # apply_score_change) so no score event lands between read and write
+    components = get_or_create_score_components(db, user_id, lock=True)
+    profile = db.query(CreditProfile).filter(
+        CreditProfile.user_id == user_id
+    ).with_for_update().populate_existing().one()
     
-    # Calculate final score
-    # Note: In a real system, you might want to weight these components differently
-    # For now, we'll use a simple additive model
-    final_score = base_score + document_points + repayment_points + usage_points
+    policy = get_scoring_policy()
+    final_score = compute_score_from_components(**component_inputs(components), policy=policy)
     
-    # Clamp to 0-1000
-    final_score = max(0, min(1000, final_score))
+    # Record the change so the event log (and point-in-time lookups) see it
+    if final_score != profile.score:
+        db.add(CreditScoreEvent(**recalculation_event_values(user_id, profile.score, final_score, policy)))
     
     # Update profile
     profile.score = final_score
-    profile.tier = compute_tier_from_score(final_score)
-    profile.max_bnpl_limit = compute_limit_from_tier(profile.tier)
+    profile.tier = policy.tier_for_score(final_score)
+    profile.max_bnpl_limit = policy.limit_for_tier(profile.tier)
     profile.last_recalculated_at = datetime.now(timezone.utc)
     profile.updated_at = datetime.now(timezone.utc)
     
@@ -393,4 +652,3 @@ def recalculate_full_score(db: Session, user_id: int) -> CreditProfile:
     db.refresh(profile)
     
     return profile
-
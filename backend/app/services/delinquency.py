@@ -0,0 +1,212 @@
+"""
+Delinquency Sweep
+
+Finds installments that are overdue and still unpaid, which otherwise only
+affect the score once the payment finally arrives. A nightly run reads unpaid
+installments of active loans in due-date order, one keyset page at a time,
+and for each page:
+
+- penalizes installments that became late or severely late, recording the
+  level reached on `Installment.delinquency_level` (a later payment only adds
+  what is still due, see `delinquency_change`),
+- moves loans with an installment unpaid for more than DEFAULT_DAYS to
+  DEFAULTED, applies the default penalty and takes them out of their
+  lender's portfolio stats,
+
+then writes the level and status changes and the score events in one
+transaction. Installments and loans already at their level are filtered out
+by the query, so the sweep is safe to re-run.
+
+The installments are paged with a keyset on (due_date, id) rather than
+streamed from one server-side cursor: a cursor lives in its transaction, and
+the sweep commits after every page, so a streamed read would either be cut
+at the first commit or hold one transaction (and its snapshot) open for the
+whole run. Each page is an index range scan from where the last one ended,
+so the cost per page stays flat on a large installments table.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, update
+
+from app.models import Installment, Loan, LoanStatus
+from app.services.batch_scoring import ScoreChange, apply_score_changes
+from app.services.credit_scoring import delinquency_change
+from app.services.portfolio_stats import record_loan_status_changes
+from app.services.scoring_policies import refresh_scoring_policy
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def sweep_delinquencies(
+    db: Session,
+    as_of: Optional[datetime] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    verbose: bool = False,
+) -> Dict[str, int]:
+    """
+    Penalize overdue unpaid installments and default long-overdue loans.
+
+    Args:
+        db: Database session
+        as_of: Time the sweep runs for (defaults to now); days overdue are
+            counted in whole days, as for payments
+        batch_size: Installments read and committed per transaction
+        verbose: Print progress after each page (for the CLI script)
+
+    Returns:
+        Counts of installments scanned, late, severely_late, loans_defaulted
+        and score_events
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    policy = refresh_scoring_policy(db)
+    now = datetime.now(timezone.utc)
+    today = (as_of or now).date()
+
+    # More than N days overdue <=> due before the start of the day N days ago
+    late_cutoff = _day_start(today - timedelta(days=policy.LATE_PAYMENT_DAYS))
+    severe_cutoff = _day_start(today - timedelta(days=policy.SEVERELY_LATE_DAYS))
+    default_cutoff = _day_start(today - timedelta(days=policy.DEFAULT_DAYS))
+
+    totals = {"scanned": 0, "late": 0, "severely_late": 0, "loans_defaulted": 0, "score_events": 0}
+    last_key: Optional[Tuple[datetime, int]] = None
+
+    while True:
+        query = db.query(
+            Installment.id,
+            Installment.loan_id,
+            Installment.due_date,
+            Installment.delinquency_level,
+            Loan.customer_id,
+            Loan.total_amount,
+        ).join(Loan, Loan.id == Installment.loan_id).filter(
+            and_(
+                Installment.paid == False,
+                Loan.status == LoanStatus.ACTIVE,
+                Installment.due_date < late_cutoff,
+                # Only installments with a penalty or a default still due
+                or_(
+                    Installment.delinquency_level.is_(None),
+                    and_(
+                        Installment.delinquency_level == "LATE",
+                        Installment.due_date < severe_cutoff,
+                    ),
+                    Installment.due_date < default_cutoff,
+                ),
+            )
+        )
+        if last_key is not None:
+            last_due_date, last_id = last_key
+            query = query.filter(
+                or_(
+                    Installment.due_date > last_due_date,
+                    and_(Installment.due_date == last_due_date, Installment.id > last_id),
+                )
+            )
+
+        rows = query.order_by(Installment.due_date, Installment.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_key = (rows[-1].due_date, rows[-1].id)
+
+        # Classify the page: (previous level, new level) -> installment ids
+        level_updates: Dict[Tuple[Optional[str], str], List[int]] = defaultdict(list)
+        penalties: List[Tuple[Any, int, int, str]] = []
+        overdue_loans: Dict[int, Any] = {}
+
+        for row in rows:
+            days_overdue = (today - row.due_date.date()).days
+            change = delinquency_change(days_overdue, row.delinquency_level, policy)
+            if change is not None:
+                level, delta, event_type = change
+                level_updates[(row.delinquency_level, level)].append(row.id)
+                penalties.append((row, days_overdue, delta, event_type))
+            if days_overdue > policy.DEFAULT_DAYS:
+                overdue_loans.setdefault(row.loan_id, row)
+
+        # Guarded updates: a payment or another sweep since the read wins
+        updated = set()
+        for (previous_level, level), installment_ids in level_updates.items():
+            level_condition = (
+                Installment.delinquency_level.is_(None) if previous_level is None
+                else Installment.delinquency_level == previous_level
+            )
+            result = db.execute(
+                update(Installment)
+                .where(
+                    and_(
+                        Installment.id.in_(installment_ids),
+                        Installment.paid == False,
+                        level_condition,
+                    )
+                )
+                .values(delinquency_level=level, updated_at=now)
+                .returning(Installment.id)
+                .execution_options(synchronize_session=False)
+            )
+            updated.update(row_id for (row_id,) in result)
+
+        defaulted = set()
+        if overdue_loans:
+            result = db.execute(
+                update(Loan)
+                .where(
+                    and_(
+                        Loan.id.in_(list(overdue_loans)),
+                        Loan.status == LoanStatus.ACTIVE,
+                    )
+                )
+                .values(status=LoanStatus.DEFAULTED, updated_at=now)
+                .returning(Loan.id)
+                .execution_options(synchronize_session=False)
+            )
+            defaulted = {row_id for (row_id,) in result}
+            record_loan_status_changes(db, sorted(defaulted), LoanStatus.ACTIVE, LoanStatus.DEFAULTED)
+
+        # Score events in due-date order per customer, then the defaults
+        changes: List[ScoreChange] = []
+        for row, days_overdue, delta, event_type in penalties:
+            if row.id not in updated:
+                continue
+            totals["late" if event_type == "LATE_PAYMENT" else "severely_late"] += 1
+            changes.append(ScoreChange(row.customer_id, delta, event_type, {
+                "installment_id": row.id,
+                "loan_id": row.loan_id,
+                "days_overdue": days_overdue,
+                "source": "DELINQUENCY_SWEEP",
+            }))
+        for loan_id, row in overdue_loans.items():
+            if loan_id not in defaulted:
+                continue
+            changes.append(ScoreChange(row.customer_id, policy.DEFAULT_PENALTY, "LOAN_DEFAULT", {
+                "loan_id": loan_id,
+                "loan_amount": float(row.total_amount),
+                "source": "DELINQUENCY_SWEEP",
+            }))
+
+        # One transaction per page: at most batch_size customers, so a single chunk
+        try:
+            apply_score_changes(db, changes, chunk_size=batch_size)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        totals["scanned"] += len(rows)
+        totals["loans_defaulted"] += len(defaulted)
+        totals["score_events"] += len(changes)
+        if verbose:
+            print(
+                f"[DELINQUENCY] {totals['scanned']} installments scanned, "
+                f"{totals['score_events']} score events, {totals['loans_defaulted']} loans defaulted"
+            )
+
+    return totals
+
@@ -0,0 +1,69 @@
+"""
+Loan List Queries
+
+Keyset-paginated loan lists for the customer and lender endpoints. Each page
+is read with one query for the loans (walking the (customer_id, id) or
+(lender_id, status, id) index) and one `selectinload` query for the
+installments of the whole page, so the cost of a page does not depend on
+the size of the portfolio.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_
+
+from app.models import Loan, LoanStatus
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def list_loans_page(
+    db: Session,
+    customer_id: Optional[int] = None,
+    lender_id: Optional[int] = None,
+    status: Optional[LoanStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Loan], Optional[int]]:
+    """
+    One page of loans in id order, with their installments loaded.
+
+    Args:
+        db: Database session
+        customer_id: Only this customer's loans
+        lender_id: Only this lender's loans
+        status: Only loans in this status
+        created_from: Only loans created at or after this time
+        created_to: Only loans created before this time
+        cursor: Id of the last loan of the previous page (None for the first page)
+        limit: Page size
+
+    Returns:
+        (loans, cursor of the next page or None on the last page)
+    """
+    conditions = []
+    if customer_id is not None:
+        conditions.append(Loan.customer_id == customer_id)
+    if lender_id is not None:
+        conditions.append(Loan.lender_id == lender_id)
+    if status is not None:
+        conditions.append(Loan.status == status)
+    if created_from is not None:
+        conditions.append(Loan.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(Loan.created_at < created_to)
+    if cursor is not None:
+        conditions.append(Loan.id > cursor)
+
+    # One extra row tells whether there is a next page
+    loans = db.query(Loan).options(
+        selectinload(Loan.installments)
+    ).filter(and_(*conditions)).order_by(Loan.id).limit(limit + 1).all()
+
+    if len(loans) > limit:
+        loans = loans[:limit]
+        return loans, loans[-1].id
+    return loans, None
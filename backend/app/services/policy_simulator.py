@@ -0,0 +1,226 @@
+"""
+Scoring Policy What-If Simulator
+
+Replays every customer's scoring history under candidate variants of the
+active scoring policy, without touching live profiles. The history is read
+once, in user_id chunks of grouped queries (approved documents per type,
+repayment events per type, paid loans). Each chunk is then scored under the
+active policy and every variant in a process pool.
+
+The result for each variant is a tier-migration matrix (active-policy tier ->
+variant tier, customer counts) and the change in total exposure from
+MAX_BNPL_LIMITS.
+"""
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from decimal import Decimal
+from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func
+
+from app.core.scoring_policy import ScoringPolicy
+from app.models import User, UserRole, CreditScoreEvent, Loan, LoanStatus, DocumentType
+from app.services.credit_scoring import compute_score_from_components
+from app.services.score_components import aggregate_document_counts
+from app.services.scoring_policies import refresh_scoring_policy
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# (user_id, approved documents per type, on_time, late, default, early repayment points, paid loans)
+HistoryFeatures = Tuple[int, Dict[DocumentType, int], int, int, int, int, int]
+
+
+def _score(features: HistoryFeatures, policy: ScoringPolicy) -> int:
+    """Score one customer's history under a policy."""
+    _, document_counts, on_time, late, default, early_points, paid_loans = features
+    return compute_score_from_components(
+        document_counts=document_counts,
+        on_time_count=on_time,
+        late_count=late,
+        default_count=default,
+        early_repayment_points=early_points,
+        paid_loan_count=paid_loans,
+        policy=policy,
+    )
+
+
+def _empty_result() -> Dict[str, Any]:
+    return {
+        "customers": 0,
+        "customers_moved": 0,
+        "tier_migration": defaultdict(lambda: defaultdict(int)),
+        "baseline_total_limit": Decimal("0"),
+        "variant_total_limit": Decimal("0"),
+    }
+
+
+def _evaluate_chunk(
+    chunk: List[HistoryFeatures],
+    baseline: ScoringPolicy,
+    variants: List[ScoringPolicy],
+) -> List[Dict[str, Any]]:
+    """Score a chunk under the baseline and every variant (runs in a worker process)."""
+    results = [_empty_result() for _ in variants]
+
+    for features in chunk:
+        baseline_tier = baseline.tier_by_score[_score(features, baseline)]
+        baseline_limit = baseline.limit_for_tier(baseline_tier)
+
+        for policy, result in zip(variants, results):
+            tier = policy.tier_by_score[_score(features, policy)]
+            result["customers"] += 1
+            result["tier_migration"][baseline_tier][tier] += 1
+            if tier != baseline_tier:
+                result["customers_moved"] += 1
+            result["baseline_total_limit"] += baseline_limit
+            result["variant_total_limit"] += policy.limit_for_tier(tier)
+
+    # defaultdicts with lambdas can't be pickled back to the parent process
+    for result in results:
+        result["tier_migration"] = {tier: dict(row) for tier, row in result["tier_migration"].items()}
+    return results
+
+
+def _merge(totals: List[Dict[str, Any]], partials: List[Dict[str, Any]]) -> None:
+    """Add one chunk's results into the running totals."""
+    for total, partial in zip(totals, partials):
+        total["customers"] += partial["customers"]
+        total["customers_moved"] += partial["customers_moved"]
+        total["baseline_total_limit"] += partial["baseline_total_limit"]
+        total["variant_total_limit"] += partial["variant_total_limit"]
+        for from_tier, row in partial["tier_migration"].items():
+            for to_tier, count in row.items():
+                total["tier_migration"][from_tier][to_tier] += count
+
+
+def stream_history_features(db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield every customer's scoring history in user_id chunks.
+
+    Each chunk is read with one grouped query per source, bounded by the
+    chunk's user_id range. Customers without history are included (they
+    score the initial score).
+    """
+    last_user_id = 0
+
+    while True:
+        user_ids = [
+            row[0] for row in db.query(User.id).filter(
+                and_(
+                    User.role == UserRole.CUSTOMER,
+                    User.id > last_user_id,
+                )
+            ).order_by(User.id).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            return
+
+        first_id, last_user_id = user_ids[0], user_ids[-1]
+        documents: Dict[int, Dict[DocumentType, int]] = defaultdict(dict)
+        repayments: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+        for user_id, document_type, count in aggregate_document_counts(db, first_id, last_user_id):
+            documents[user_id][document_type] = count
+
+        for user_id, event_type, count, delta_sum in db.query(
+            CreditScoreEvent.user_id,
+            CreditScoreEvent.event_type,
+            func.count(CreditScoreEvent.id),
+            func.coalesce(func.sum(CreditScoreEvent.delta), 0),
+        ).filter(
+            and_(
+                CreditScoreEvent.user_id.between(first_id, last_user_id),
+                CreditScoreEvent.event_type.in_([
+                    "ON_TIME_PAYMENT", "LATE_PAYMENT", "SEVERELY_LATE_PAYMENT",
+                    "LOAN_DEFAULT", "EARLY_LOAN_REPAYMENT",
+                ]),
+            )
+        ).group_by(CreditScoreEvent.user_id, CreditScoreEvent.event_type).all():
+            if event_type == "ON_TIME_PAYMENT":
+                repayments[user_id]["on_time"] += count
+            elif event_type in ("LATE_PAYMENT", "SEVERELY_LATE_PAYMENT"):
+                repayments[user_id]["late"] += count
+            elif event_type == "LOAN_DEFAULT":
+                repayments[user_id]["default"] += count
+            else:
+                repayments[user_id]["early_points"] += int(delta_sum)
+
+        paid_loans = dict(
+            db.query(Loan.customer_id, func.count(Loan.id)).filter(
+                and_(
+                    Loan.customer_id.between(first_id, last_user_id),
+                    Loan.status == LoanStatus.PAID,
+                )
+            ).group_by(Loan.customer_id).all()
+        )
+
+        chunk: List[HistoryFeatures] = []
+        for user_id in user_ids:
+            counts = repayments.get(user_id, {})
+            chunk.append((
+                user_id,
+                documents.get(user_id, {}),
+                counts.get("on_time", 0),
+                counts.get("late", 0),
+                counts.get("default", 0),
+                counts.get("early_points", 0),
+                paid_loans.get(user_id, 0),
+            ))
+        yield chunk
+
+
+def simulate_policies(
+    db: Session,
+    variants: Dict[str, Dict[str, Any]],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Evaluate candidate scoring policies against the full history.
+
+    Read-only: profiles, components and events are never written.
+
+    Args:
+        db: Database session
+        variants: Variant name -> parameter overrides on top of the active
+            policy (see `ScoringPolicy.with_overrides`)
+        workers: Worker processes (defaults to the CPU count; 1 runs in-process)
+        chunk_size: Customers read and scored per task
+
+    Returns:
+        Per variant: customers, customers_moved, tier_migration
+        ({current tier: {variant tier: count}}), baseline_total_limit,
+        variant_total_limit and limit_delta
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    names = list(variants)
+    baseline = refresh_scoring_policy(db)
+    policies = [baseline.with_overrides(variants[name], version=baseline.version) for name in names]
+    totals = [_empty_result() for _ in names]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for chunk in stream_history_features(db, chunk_size):
+            _merge(totals, _evaluate_chunk(chunk, baseline, policies))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in stream_history_features(db, chunk_size):
+                pending.add(pool.submit(_evaluate_chunk, chunk, baseline, policies))
+                # Keep a bounded number of chunks in flight while the history streams in
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _merge(totals, future.result())
+            for future in pending:
+                _merge(totals, future.result())
+
+    results = {}
+    for name, total in zip(names, totals):
+        total["tier_migration"] = {tier: dict(row) for tier, row in total["tier_migration"].items()}
+        total["limit_delta"] = total["variant_total_limit"] - total["baseline_total_limit"]
+        results[name] = total
+    return results
@@ -0,0 +1,430 @@
+"""
+Lender Portfolio Stats
+
+Maintains `LenderPortfolioStats`, the per-lender dashboard totals (active
+loans, outstanding principal, interest earned and the aging buckets of unpaid
+installments), so `GET /lender/stats` reads one row instead of aggregating the
+portfolio.
+
+The totals are incremented in the same transaction as the change that moves
+them: a loan created, a loan entering or leaving ACTIVE, an installment paid.
+Aging buckets depend on time as well. They are kept as of `buckets_as_of`
+(the same instant for every lender), and the daily roll-forward
+(`roll_forward_aging`) moves only the installments that crossed a bucket
+boundary since then.
+
+The module also rebuilds the totals from the loans and installments tables,
+which is used for lenders without a row, by the full rebuild and by the
+consistency checker.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, update
+
+from app.models import Lender, LenderPortfolioStats, Loan, Installment, LoanStatus
+from app.core.database import dialect_insert
+
+AMOUNT_FIELDS = (
+    "total_principal_outstanding",
+    "total_interest_earned",
+)
+
+# Unpaid installments of active loans by whole days overdue:
+# not yet due, 0-30, 31-60 and 61+ days
+BUCKET_FIELDS = (
+    "current_count",
+    "late_1_30",
+    "late_31_60",
+    "late_61_plus",
+)
+
+STAT_FIELDS = ("active_loans_count",) + AMOUNT_FIELDS + BUCKET_FIELDS
+
+
+def _aware(value: datetime) -> datetime:
+    """Treat naive timestamps (as returned by SQLite) as UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def aging_bucket(due_date: datetime, as_of: datetime) -> str:
+    """Aging bucket of an unpaid installment at `as_of`."""
+    due_date, as_of = _aware(due_date), _aware(as_of)
+    if due_date > as_of:
+        return "current_count"
+    elif due_date > as_of - timedelta(days=31):
+        return "late_1_30"
+    elif due_date > as_of - timedelta(days=61):
+        return "late_31_60"
+    return "late_61_plus"
+
+
+def _bucket_expression(as_of: datetime):
+    """SQL CASE mapping Installment.due_date to its bucket at `as_of` (mirrors aging_bucket)."""
+    return case(
+        (Installment.due_date > as_of, "current_count"),
+        (Installment.due_date > as_of - timedelta(days=31), "late_1_30"),
+        (Installment.due_date > as_of - timedelta(days=61), "late_31_60"),
+        else_="late_61_plus",
+    )
+
+
+def _empty_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {field: 0 for field in STAT_FIELDS}
+    for field in AMOUNT_FIELDS:
+        stats[field] = Decimal("0")
+    return stats
+
+
+def aggregate_portfolio_stats(
+    db: Session,
+    as_of: datetime,
+    lender_ids: Optional[List[int]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Aggregate the dashboard totals of lenders from scratch.
+
+    One grouped query for the loan totals and one for the aging buckets at
+    `as_of`. Lenders without loans get zero totals.
+
+    Args:
+        db: Database session
+        as_of: Time the aging buckets are computed for
+        lender_ids: Lenders to aggregate (defaults to every lender)
+
+    Returns:
+        lender_id -> field -> value
+    """
+    if lender_ids is None:
+        lender_ids = [row[0] for row in db.query(Lender.id).all()]
+    stats = {lender_id: _empty_stats() for lender_id in lender_ids}
+    if not lender_ids:
+        return stats
+
+    is_active = Loan.status == LoanStatus.ACTIVE
+    for lender_id, active_count, principal, interest in db.query(
+        Loan.lender_id,
+        func.count(case((is_active, Loan.id))),
+        func.coalesce(func.sum(case((is_active, Loan.principal_amount), else_=0)), 0),
+        func.coalesce(func.sum(Loan.total_amount - Loan.principal_amount), 0),
+    ).filter(Loan.lender_id.in_(lender_ids)).group_by(Loan.lender_id).all():
+        stats[lender_id]["active_loans_count"] = active_count
+        stats[lender_id]["total_principal_outstanding"] = Decimal(str(principal))
+        stats[lender_id]["total_interest_earned"] = Decimal(str(interest))
+
+    bucket = _bucket_expression(as_of)
+    for lender_id, bucket_field, count in db.query(
+        Loan.lender_id,
+        bucket,
+        func.count(Installment.id),
+    ).join(Loan, Loan.id == Installment.loan_id).filter(
+        and_(
+            Loan.lender_id.in_(lender_ids),
+            is_active,
+            Installment.paid == False,
+        )
+    ).group_by(Loan.lender_id, bucket).all():
+        stats[lender_id][bucket_field] = count
+
+    return stats
+
+
+def current_buckets_as_of(db: Session) -> datetime:
+    """Time the stored aging buckets are computed for (now if there are no rows yet)."""
+    as_of = db.query(func.max(LenderPortfolioStats.buckets_as_of)).scalar()
+    return _aware(as_of) if as_of is not None else datetime.now(timezone.utc)
+
+
+def ensure_portfolio_stats(db: Session, lender_id: int) -> None:
+    """
+    Create a lender's stats row from scratch if it does not exist yet.
+
+    The buckets are computed as of the other rows' `buckets_as_of`, so every
+    row rolls forward together. Does not commit.
+    """
+    as_of = current_buckets_as_of(db)
+    totals = aggregate_portfolio_stats(db, as_of, [lender_id])[lender_id]
+    insert = dialect_insert(db)
+    db.execute(
+        insert(LenderPortfolioStats)
+        .values(lender_id=lender_id, buckets_as_of=as_of, **totals)
+        .on_conflict_do_nothing(index_elements=["lender_id"])
+    )
+
+
+def get_portfolio_stats(db: Session, lender_id: int) -> LenderPortfolioStats:
+    """Get a lender's stats row, building it from scratch (and committing) if missing."""
+    row = db.query(LenderPortfolioStats).filter(LenderPortfolioStats.lender_id == lender_id).first()
+    if row is None:
+        ensure_portfolio_stats(db, lender_id)
+        db.commit()
+        row = db.query(LenderPortfolioStats).filter(LenderPortfolioStats.lender_id == lender_id).one()
+    return row
+
+
+def apply_portfolio_change(
+    db: Session,
+    lender_id: int,
+    changes: Dict[str, Any],
+    due_dates: Iterable[datetime] = (),
+    due_delta: int = 0,
+) -> None:
+    """
+    Atomically add `changes` to a lender's stats row with one UPDATE.
+
+    `due_dates` are unpaid installments entering (due_delta=1) or leaving
+    (due_delta=-1) the aging buckets; each is counted in its bucket at the
+    row's `buckets_as_of`. The UPDATE only applies if the buckets were not
+    rolled forward since they were read (otherwise it is retried). A missing
+    row is rebuilt from the tables instead, which already include the change.
+    Does not commit.
+    """
+    due_dates = list(due_dates)
+
+    # A missing row is rebuilt from the tables, so it must see the change
+    db.flush()
+
+    for _ in range(3):
+        as_of = db.query(LenderPortfolioStats.buckets_as_of).filter(
+            LenderPortfolioStats.lender_id == lender_id
+        ).scalar()
+        if as_of is None:
+            ensure_portfolio_stats(db, lender_id)
+            return
+
+        amounts: Dict[str, Any] = defaultdict(int, changes)
+        for due_date in due_dates:
+            amounts[aging_bucket(due_date, as_of)] += due_delta
+
+        values = {
+            field: getattr(LenderPortfolioStats, field) + amount
+            for field, amount in amounts.items() if amount
+        }
+        if not values:
+            return
+        values["updated_at"] = datetime.now(timezone.utc)
+
+        result = db.execute(
+            update(LenderPortfolioStats)
+            .where(
+                and_(
+                    LenderPortfolioStats.lender_id == lender_id,
+                    LenderPortfolioStats.buckets_as_of == as_of,
+                )
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount > 0:
+            return
+
+    raise RuntimeError(f"Could not update portfolio stats of lender {lender_id}")
+
+
+def _unpaid_due_dates(db: Session, loan_ids: List[int]) -> Dict[int, List[datetime]]:
+    due_dates: Dict[int, List[datetime]] = defaultdict(list)
+    for loan_id, due_date in db.query(Installment.loan_id, Installment.due_date).filter(
+        and_(
+            Installment.loan_id.in_(loan_ids),
+            Installment.paid == False,
+        )
+    ).all():
+        due_dates[loan_id].append(due_date)
+    return due_dates
+
+
+def record_loan_created(db: Session, loan: Loan) -> None:
+    """Add a new loan (and its unpaid installments, if active) to its lender's stats. Does not commit."""
+    db.flush()
+    changes: Dict[str, Any] = {"total_interest_earned": loan.total_amount - loan.principal_amount}
+    due_dates: List[datetime] = []
+    if loan.status == LoanStatus.ACTIVE:
+        changes["active_loans_count"] = 1
+        changes["total_principal_outstanding"] = loan.principal_amount
+        due_dates = _unpaid_due_dates(db, [loan.id])[loan.id]
+    apply_portfolio_change(db, loan.lender_id, changes, due_dates, due_delta=1)
+
+
+def record_loan_status_changes(
+    db: Session,
+    loan_ids: List[int],
+    previous_status: LoanStatus,
+    new_status: LoanStatus,
+) -> None:
+    """
+    Update lenders' stats for loans that moved from `previous_status` to `new_status`.
+
+    Only moves into or out of ACTIVE change the stats. Loans and their unpaid
+    installments are read with one query each. Does not commit.
+    """
+    if not loan_ids or (previous_status == LoanStatus.ACTIVE) == (new_status == LoanStatus.ACTIVE):
+        return
+
+    sign = 1 if new_status == LoanStatus.ACTIVE else -1
+    db.flush()
+    due_dates = _unpaid_due_dates(db, loan_ids)
+
+    changes_by_lender: Dict[int, Dict[str, Any]] = defaultdict(lambda: defaultdict(int))
+    due_dates_by_lender: Dict[int, List[datetime]] = defaultdict(list)
+    for loan_id, lender_id, principal_amount in db.query(
+        Loan.id, Loan.lender_id, Loan.principal_amount
+    ).filter(Loan.id.in_(loan_ids)).all():
+        changes_by_lender[lender_id]["active_loans_count"] += sign
+        changes_by_lender[lender_id]["total_principal_outstanding"] += sign * principal_amount
+        due_dates_by_lender[lender_id].extend(due_dates[loan_id])
+
+    # Lenders in id order, like every other writer of several rows
+    for lender_id in sorted(changes_by_lender):
+        apply_portfolio_change(
+            db, lender_id, changes_by_lender[lender_id], due_dates_by_lender[lender_id], due_delta=sign
+        )
+
+
+def record_loan_status_change(
+    db: Session,
+    loan: Loan,
+    previous_status: LoanStatus,
+    new_status: LoanStatus,
+) -> None:
+    """Update the lender's stats for one loan status change. Does not commit."""
+    record_loan_status_changes(db, [loan.id], previous_status, new_status)
+
+
+def record_installment_paid(db: Session, installment: Installment) -> None:
+    """Remove a paid installment of an active loan from its lender's aging buckets. Does not commit."""
+    loan = installment.loan or db.get(Loan, installment.loan_id)
+    if loan.status != LoanStatus.ACTIVE:
+        return
+    apply_portfolio_change(db, loan.lender_id, {}, [installment.due_date], due_delta=-1)
+
+
+def roll_forward_aging(db: Session, as_of: Optional[datetime] = None) -> int:
+    """
+    Move every lender's aging buckets forward to `as_of` (default now).
+
+    Only unpaid installments of active loans that crossed a bucket boundary
+    since the last roll-forward are read, grouped by lender and by previous
+    and new bucket. Commits.
+
+    Returns:
+        Number of installments that changed bucket
+    """
+    new_as_of = _aware(as_of or datetime.now(timezone.utc))
+
+    # Lock every row: concurrent increments wait and then retry against the new buckets
+    rows = {
+        row.lender_id: row for row in db.query(LenderPortfolioStats).order_by(
+            LenderPortfolioStats.lender_id
+        ).with_for_update().populate_existing().all()
+    }
+    if not rows:
+        db.commit()
+        return 0
+
+    old_as_of = min(_aware(row.buckets_as_of) for row in rows.values())
+    if new_as_of <= old_as_of:
+        db.commit()
+        return 0
+
+    old_bucket = _bucket_expression(old_as_of)
+    new_bucket = _bucket_expression(new_as_of)
+    moved = 0
+
+    for lender_id, from_bucket, to_bucket, count in db.query(
+        Loan.lender_id,
+        old_bucket,
+        new_bucket,
+        func.count(Installment.id),
+    ).join(Loan, Loan.id == Installment.loan_id).filter(
+        and_(
+            Loan.lender_id.in_(list(rows)),
+            Loan.status == LoanStatus.ACTIVE,
+            Installment.paid == False,
+            # Anything due earlier was already in the last bucket
+            Installment.due_date > old_as_of - timedelta(days=61),
+            Installment.due_date <= new_as_of,
+        )
+    ).group_by(Loan.lender_id, old_bucket, new_bucket).all():
+        if from_bucket == to_bucket:
+            continue
+        row = rows[lender_id]
+        setattr(row, from_bucket, getattr(row, from_bucket) - count)
+        setattr(row, to_bucket, getattr(row, to_bucket) + count)
+        moved += count
+
+    now = datetime.now(timezone.utc)
+    for row in rows.values():
+        row.buckets_as_of = new_as_of
+        row.updated_at = now
+
+    db.commit()
+    return moved
+
+
+def _write_stats(db: Session, stats: Dict[int, Dict[str, Any]], as_of: datetime) -> None:
+    """Upsert the given totals as the lenders' rows. Does not commit."""
+    insert = dialect_insert(db)
+    now = datetime.now(timezone.utc)
+    for lender_id in sorted(stats):
+        values = {**stats[lender_id], "buckets_as_of": as_of, "updated_at": now}
+        db.execute(
+            insert(LenderPortfolioStats)
+            .values(lender_id=lender_id, **values)
+            .on_conflict_do_update(index_elements=["lender_id"], set_=values)
+        )
+
+
+def rebuild_portfolio_stats(db: Session) -> int:
+    """
+    Rebuild every lender's row from scratch, with the buckets as of now. Commits.
+
+    Returns:
+        Number of lenders rebuilt
+    """
+    as_of = datetime.now(timezone.utc)
+    stats = aggregate_portfolio_stats(db, as_of)
+    _write_stats(db, stats, as_of)
+    db.commit()
+    return len(stats)
+
+
+def check_portfolio_stats(db: Session, repair: bool = False) -> List[Dict[str, Any]]:
+    """
+    Compare every lender's stored row with a from-scratch aggregation.
+
+    The buckets are compared as of the stored `buckets_as_of`.
+
+    Args:
+        db: Database session
+        repair: Overwrite drifted rows with the aggregated values (commits)
+
+    Returns:
+        One entry per drifted field: lender_id, field, stored and expected
+        values. A missing row is reported with stored=None.
+    """
+    as_of = current_buckets_as_of(db)
+    expected = aggregate_portfolio_stats(db, as_of)
+    stored = {row.lender_id: row for row in db.query(LenderPortfolioStats).all()}
+
+    drift: List[Dict[str, Any]] = []
+    drifted: Dict[int, Dict[str, Any]] = {}
+    for lender_id, totals in expected.items():
+        row = stored.get(lender_id)
+        for field in STAT_FIELDS:
+            stored_value = getattr(row, field) if row is not None else None
+            if stored_value is None or stored_value != totals[field]:
+                drift.append({
+                    "lender_id": lender_id,
+                    "field": field,
+                    "stored": stored_value,
+                    "expected": totals[field],
+                })
+                drifted[lender_id] = totals
+
+    if repair and drifted:
+        _write_stats(db, drifted, as_of)
+        db.commit()
+
+    return drift
@@ -0,0 +1,199 @@
+"""
+Product Detail Cache
+
+`GET /products/{id}` (the checkout page) is served from a bounded per-worker
+LRU cache of built `ProductDetailResponse`s. A cache miss loads the product
+and its retailer in one joined query; the BNPL terms (first lender's interest
+rate) are cached for LENDER_TERMS_MAX_AGE_SECONDS.
+
+Entries are stamped with the catalog version and the interest rate they were
+built with. Every product write bumps that version (see `catalog_index`), so
+an entry is only served while the worker's catalog version is unchanged;
+updates made by any worker are picked up by the next catalog version check.
+Lender rate changes don't touch the catalog: an entry built with another rate
+than the current (cached) one is rebuilt, so a new rate is served within
+LENDER_TERMS_MAX_AGE_SECONDS.
+
+Each response carries a strong ETag (a digest of the response, so it changes
+with updated_at and the rate), so clients revalidate with `If-None-Match` and
+get a 304.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from app.models import Lender, Product, Retailer
+from app.core.config import settings
+from app.schemas.product import (
+    ProductDetailResponse, ProductPrice, ProductBNPL, ProductStock, ProductRetailer,
+)
+
+DEFAULT_INTEREST_RATE = 10.0  # Percent per month when no lender exists
+MIN_DEPOSIT_PERCENT = 20.0  # As per loan creation logic
+MAX_TENURE_MONTHS = 3  # As per loan creation logic (3 installments)
+LENDER_TERMS_MAX_AGE_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class CachedProductDetail:
+    """A built product detail response with its ETag."""
+    catalog_version: int
+    interest_rate: float
+    etag: str
+    retailer_id: int
+    detail: ProductDetailResponse
+
+
+class ProductDetailCache:
+    """Thread-safe LRU cache of product details, keyed by product ID."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, CachedProductDetail]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, product_id: int, catalog_version: int, interest_rate: float) -> Optional[CachedProductDetail]:
+        """The entry of a product if it was built under `catalog_version` with `interest_rate`."""
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is None:
+                return None
+            if entry.catalog_version != catalog_version or entry.interest_rate != interest_rate:
+                del self._entries[product_id]
+                return None
+            self._entries.move_to_end(product_id)
+            return entry
+
+    def put(self, product_id: int, entry: CachedProductDetail) -> None:
+        """Store an entry, evicting the least recently used ones beyond max_entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[product_id] = entry
+            self._entries.move_to_end(product_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_interest_rate: Optional[float] = None
+_interest_rate_loaded_at = 0.0  # time.monotonic() of the last lender read
+
+
+def get_interest_rate(db: Session) -> float:
+    """Monthly interest rate shown on product pages (first lender's base rate), cached."""
+    global _interest_rate, _interest_rate_loaded_at
+
+    if _interest_rate is None or time.monotonic() - _interest_rate_loaded_at >= LENDER_TERMS_MAX_AGE_SECONDS:
+        rate = db.query(Lender.base_interest_rate).order_by(Lender.id).limit(1).scalar()
+        _interest_rate = float(rate) if rate is not None else DEFAULT_INTEREST_RATE
+        _interest_rate_loaded_at = time.monotonic()
+    return _interest_rate
+
+
+def product_etag(detail: ProductDetailResponse) -> str:
+    """
+    Strong ETag of a product detail response.
+
+    A digest of the whole representation (which includes updated_at): on
+    SQLite timestamps have second resolution, so updated_at alone could
+    repeat after two writes within a second.
+    """
+    digest = hashlib.sha256(detail.model_dump_json().encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def build_product_detail(
+    db: Session,
+    product_id: int,
+    catalog_version: int,
+    interest_rate: float,
+) -> Optional[CachedProductDetail]:
+    """
+    Load a product with its retailer (one query) and build its detail response.
+
+    Returns:
+        The entry, or None when the product does not exist
+    """
+    row = db.query(Product, Retailer).join(
+        Retailer, Retailer.id == Product.retailer_id
+    ).filter(Product.id == product_id).first()
+    if row is None:
+        return None
+    product, retailer = row
+
+    created_at_str = product.created_at.isoformat() if product.created_at else ""
+    updated_at_str = product.updated_at.isoformat() if product.updated_at else created_at_str
+
+    detail = ProductDetailResponse(
+        id=str(product.id),
+        name=product.name,
+        # Retailer's SKU, or one generated from the product ID
+        sku=product.sku or f"PRD-{product.id:06d}",
+        description=product.description or "",
+        price=ProductPrice(
+            currency="UGX",  # Default currency
+            amount=float(product.price)
+        ),
+        bnpl=ProductBNPL(
+            eligible=product.bnpl_eligible,
+            min_deposit_percent=MIN_DEPOSIT_PERCENT,
+            max_tenure_months=MAX_TENURE_MONTHS,
+            interest_rate_percent_per_month=interest_rate
+        ),
+        stock=ProductStock(
+            available_quantity=product.stock,
+            is_active=product.stock > 0
+        ),
+        retailer=ProductRetailer(
+            id=str(retailer.id),
+            name=retailer.business_name
+        ),
+        images=[],  # Empty array for now - can be extended later
+        created_at=created_at_str,
+        updated_at=updated_at_str
+    )
+    return CachedProductDetail(
+        catalog_version=catalog_version,
+        interest_rate=interest_rate,
+        etag=product_etag(detail),
+        retailer_id=product.retailer_id,
+        detail=detail,
+    )
+
+
+# This worker's cache
+product_detail_cache = ProductDetailCache(settings.PRODUCT_DETAIL_CACHE_SIZE)
+
+
+def get_product_detail(db: Session, product_id: int, catalog_version: int) -> Optional[CachedProductDetail]:
+    """A product's detail entry from the cache, built on a miss (None when the product does not exist)."""
+    interest_rate = get_interest_rate(db)
+    entry = product_detail_cache.get(product_id, catalog_version, interest_rate)
+    if entry is None:
+        entry = build_product_detail(db, product_id, catalog_version, interest_rate)
+        if entry is not None:
+            product_detail_cache.put(product_id, entry)
+    return entry
@@ -0,0 +1,151 @@
+"""
+Product Search
+
+Full-text search over product names and descriptions, backed by the database's
+text index:
+
+- PostgreSQL: a generated `products.search_vector` tsvector column (name
+  weighted above description) with a GIN index, ranked with ts_rank_cd,
+- SQLite (development): an FTS5 table `products_fts` over `products`, kept in
+  sync by triggers, ranked with bm25.
+
+Both are maintained by the database on every insert, update and delete of a
+product, so no application code has to update the index. `ensure_search_index`
+creates them (idempotently) for databases built with `create_all`; migration
+018 does the same for migrated databases.
+
+Every search term must match, as a prefix, in the name or the description.
+Results are filtered by the caller's BNPL eligibility like `GET /products`.
+"""
+import re
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from sqlalchemy import func, inspect, literal_column, table, column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import Product
+
+MAX_QUERY_TERMS = 10
+
+_POSTGRES_DDL = (
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+)
+
+_SQLITE_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, coalesce(new.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, coalesce(old.description, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, coalesce(old.description, ''));
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, coalesce(new.description, ''));
+    END
+    """,
+)
+
+
+def ensure_search_index(bind: Engine) -> None:
+    """Create the product text index if it does not exist yet (indexing existing products)."""
+    dialect_name = bind.dialect.name
+    with bind.begin() as connection:
+        if dialect_name == "postgresql":
+            for statement in _POSTGRES_DDL:
+                connection.execute(text(statement))
+        elif dialect_name == "sqlite":
+            created = "products_fts" not in inspect(connection).get_table_names()
+            for statement in _SQLITE_DDL:
+                connection.execute(text(statement))
+            if created:
+                connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        else:
+            raise NotImplementedError(f"Product search is not supported on {dialect_name}")
+
+
+def search_terms(query: str) -> List[str]:
+    """Words of a search query (letters and digits only, so no index query syntax gets through)."""
+    return [term.lower() for term in re.findall(r"\w+", query)][:MAX_QUERY_TERMS]
+
+
+def search_products(
+    db: Session,
+    query: str,
+    score: Optional[int],
+    max_bnpl_limit: Decimal,
+    offset: int = 0,
+    limit: int = 20,
+) -> Tuple[List[Product], int]:
+    """
+    Search the products a customer is eligible for, best match first.
+
+    Args:
+        db: Database session
+        query: Search text
+        score: Customer's credit score (products above their min_required_score are excluded)
+        max_bnpl_limit: Customer's BNPL limit (more expensive products are excluded)
+        offset: Results to skip
+        limit: Results to return
+
+    Returns:
+        (products of the page, total number of matches)
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], 0
+
+    products = db.query(Product).filter(
+        Product.bnpl_eligible == True,
+        Product.stock > 0,
+        Product.price <= max_bnpl_limit,
+    )
+    if score is not None:
+        products = products.filter(
+            (Product.min_required_score.is_(None)) |
+            (Product.min_required_score <= score)
+        )
+
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        search_vector = literal_column("products.search_vector")
+        products = products.filter(search_vector.op("@@")(ts_query))
+        rank = func.ts_rank_cd(search_vector, ts_query).desc()
+    elif dialect_name == "sqlite":
+        products_fts = table("products_fts", column("rowid"))
+        products = products.join(products_fts, products_fts.c.rowid == Product.id).filter(
+            text("products_fts MATCH :fts_query").bindparams(
+                fts_query=" ".join(f'"{term}"*' for term in terms)
+            )
+        )
+        # bm25 is lower for better matches; name matches weigh more than description ones
+        rank = literal_column("bm25(products_fts, 10.0, 1.0)")
+    else:
+        raise NotImplementedError(f"Product search is not supported on {dialect_name}")
+
+    total = products.count()
+    page = products.order_by(rank, Product.id).offset(offset).limit(limit).all()
+    return page, total
@@ -0,0 +1,277 @@
+"""
+Daily Sales Rollups
+
+`DailySalesRollup` rows hold the BNPL sales (loan count and amount) of every
+retailer, product and UTC day. A loan adds itself to its row in the same
+transaction as it is created (`record_loan_sale`), and the rows can be rebuilt
+in bulk from the loans table (`rebuild_sales_rollups`).
+
+Sales analytics (retailer dashboards, trends, platform totals) sum rollup
+rows instead of scanning loans: a 90-day window of a retailer reads at most
+90 rows per product sold in it.
+"""
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, cast, func, insert
+
+from app.models import DailySalesRollup, Loan, Product
+from app.core.database import dialect_insert
+
+DEFAULT_CHUNK_SIZE = 1000
+GRANULARITIES = ("day", "month")
+
+
+def _aware(value: datetime) -> datetime:
+    """Treat naive timestamps (as returned by SQLite) as UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def sales_day(created_at: Optional[datetime]) -> date:
+    """UTC day a loan created at `created_at` (default now) counts for."""
+    return _aware(created_at or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def record_loan_sale(db: Session, loan: Loan) -> None:
+    """
+    Add a new loan to its retailer's and product's rollup row for the day.
+
+    One upsert, so concurrent loans of the same product never lose an
+    increment. Does not commit.
+    """
+    db.flush()
+    retailer_id = db.query(Product.retailer_id).filter(Product.id == loan.product_id).scalar()
+    insert_stmt = dialect_insert(db)(DailySalesRollup).values(
+        retailer_id=retailer_id,
+        product_id=loan.product_id,
+        day=sales_day(loan.created_at),
+        loan_count=1,
+        total_amount=loan.total_amount,
+    )
+    db.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["retailer_id", "day", "product_id"],
+            set_={
+                "loan_count": DailySalesRollup.loan_count + insert_stmt.excluded.loan_count,
+                "total_amount": DailySalesRollup.total_amount + insert_stmt.excluded.total_amount,
+                "updated_at": datetime.now(timezone.utc),
+            },
+        )
+    )
+
+
+def _loan_day_expression(db: Session):
+    """SQL expression of a loan's UTC creation day (mirrors sales_day)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", Loan.created_at), Date)
+    return func.date(Loan.created_at)
+
+
+def rebuild_sales_rollups(
+    db: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Rebuild the rollup rows of a range of days from the loans table.
+
+    The rows of the range are deleted and re-aggregated with one grouped
+    query, in a single transaction. Commits.
+
+    Args:
+        db: Database session
+        start_day: First day to rebuild (default: the first loan)
+        end_day: Last day to rebuild, inclusive (default: the last loan)
+        chunk_size: Rows per bulk insert
+
+    Returns:
+        Number of rollup rows written
+    """
+    if start_day and end_day and start_day > end_day:
+        raise ValueError("start_day must not be after end_day")
+
+    rollup_filters = []
+    loan_filters = []
+    if start_day is not None:
+        rollup_filters.append(DailySalesRollup.day >= start_day)
+        loan_filters.append(Loan.created_at >= _day_start(start_day))
+    if end_day is not None:
+        rollup_filters.append(DailySalesRollup.day <= end_day)
+        loan_filters.append(Loan.created_at < _day_start(end_day + timedelta(days=1)))
+
+    try:
+        db.query(DailySalesRollup).filter(*rollup_filters).delete(synchronize_session=False)
+
+        day = _loan_day_expression(db)
+        grouped = db.query(
+            Product.retailer_id,
+            Loan.product_id,
+            day,
+            func.count(Loan.id),
+            func.sum(Loan.total_amount),
+        ).join(Product, Product.id == Loan.product_id).filter(
+            *loan_filters
+        ).group_by(Product.retailer_id, Loan.product_id, day)
+
+        written = 0
+        rows: List[Dict[str, Any]] = []
+        for retailer_id, product_id, loan_day, loan_count, total_amount in grouped:
+            rows.append({
+                "retailer_id": retailer_id,
+                "product_id": product_id,
+                # SQLite's date() returns an ISO string
+                "day": date.fromisoformat(loan_day) if isinstance(loan_day, str) else loan_day,
+                "loan_count": loan_count,
+                "total_amount": total_amount,
+            })
+            if len(rows) >= chunk_size:
+                db.execute(insert(DailySalesRollup), rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            db.execute(insert(DailySalesRollup), rows)
+            written += len(rows)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return written
+
+
+def _window_filters(
+    start_day: Optional[date],
+    end_day: Optional[date],
+    retailer_id: Optional[int],
+    product_id: Optional[int] = None,
+) -> list:
+    filters = []
+    if retailer_id is not None:
+        filters.append(DailySalesRollup.retailer_id == retailer_id)
+    if product_id is not None:
+        filters.append(DailySalesRollup.product_id == product_id)
+    if start_day is not None:
+        filters.append(DailySalesRollup.day >= start_day)
+    if end_day is not None:
+        filters.append(DailySalesRollup.day <= end_day)
+    return filters
+
+
+def get_sales_totals(
+    db: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    retailer_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Sales of a window of days (inclusive; open-ended when omitted).
+
+    Args:
+        db: Database session
+        start_day: First day of the window
+        end_day: Last day of the window
+        retailer_id: Only this retailer's sales (default: the whole platform)
+        product_id: Only this product's sales
+
+    Returns:
+        loan_count and total_amount
+    """
+    loan_count, total_amount = db.query(
+        func.coalesce(func.sum(DailySalesRollup.loan_count), 0),
+        func.coalesce(func.sum(DailySalesRollup.total_amount), 0),
+    ).filter(*_window_filters(start_day, end_day, retailer_id, product_id)).one()
+    return {"loan_count": int(loan_count), "total_amount": Decimal(str(total_amount))}
+
+
+def _period_start(day: date, granularity: str) -> date:
+    return day.replace(day=1) if granularity == "month" else day
+
+
+def _next_period(period: date, granularity: str) -> date:
+    if granularity == "month":
+        return (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return period + timedelta(days=1)
+
+
+def get_sales_series(
+    db: Session,
+    start_day: date,
+    end_day: date,
+    retailer_id: Optional[int] = None,
+    granularity: str = "day",
+) -> List[Dict[str, Any]]:
+    """
+    Sales per day or per month of a window, for trend charts.
+
+    Every period of the window is returned, periods without sales with zero
+    totals. Months are calendar months (the first and last may be partial).
+
+    Returns:
+        period (first day of the period), loan_count and total_amount, in
+        period order
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if start_day > end_day:
+        raise ValueError("start_day must not be after end_day")
+
+    series: "OrderedDict[date, Dict[str, Any]]" = OrderedDict()
+    period = _period_start(start_day, granularity)
+    while period <= end_day:
+        series[period] = {"period": period, "loan_count": 0, "total_amount": Decimal("0")}
+        period = _next_period(period, granularity)
+
+    # Days are few (one row per day in the window), months are folded in Python
+    for day, loan_count, total_amount in db.query(
+        DailySalesRollup.day,
+        func.sum(DailySalesRollup.loan_count),
+        func.sum(DailySalesRollup.total_amount),
+    ).filter(
+        *_window_filters(start_day, end_day, retailer_id)
+    ).group_by(DailySalesRollup.day).all():
+        entry = series[_period_start(day, granularity)]
+        entry["loan_count"] += int(loan_count)
+        entry["total_amount"] += Decimal(str(total_amount))
+
+    return list(series.values())
+
+
+def get_top_products(
+    db: Session,
+    retailer_id: Optional[int] = None,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    limit: int = 5,
+) -> List[Tuple[int, str, Optional[str], int, Decimal]]:
+    """
+    Best selling products of a window by sales amount.
+
+    Returns:
+        (product_id, name, sku, loan_count, total_amount) tuples, best first
+        (sku is None for products without one)
+    """
+    total_amount = func.sum(DailySalesRollup.total_amount)
+    rows = db.query(
+        Product.id,
+        Product.name,
+        Product.sku,
+        func.sum(DailySalesRollup.loan_count),
+        total_amount,
+    ).join(Product, Product.id == DailySalesRollup.product_id).filter(
+        *_window_filters(start_day, end_day, retailer_id)
+    ).group_by(Product.id, Product.name, Product.sku).order_by(
+        total_amount.desc(), Product.id
+    ).limit(limit).all()
+    return [
+        (product_id, name, sku, int(loan_count), Decimal(str(amount)))
+        for product_id, name, sku, loan_count, amount in rows
+    ]
@@ -0,0 +1,517 @@
+"""
+Credit Score Components
+
+Maintains `CreditScoreComponents`, the running per-user totals that feed the
+recalculation formula (approved documents per type, on-time/late/default
+counts, early repayment points and paid loans), plus the user's current
+on-time payment streak. The row is updated in the same transaction as each
+score event (and each document review, for the document counts), so
+`recalculate_full_score` and the streak bonus read one row instead of
+re-querying the user's history.
+
+The totals don't depend on the scoring policy: documents are stored as counts
+and their weights are applied by `compute_score_from_components`, so every
+recalculation path scores them under the same (active) weights.
+
+The module also rebuilds the totals from history (approved documents and paid
+loans from their tables, payments from the event log), which is used for users
+without a components row, by the bulk recalculation and by the consistency
+checker.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, update
+
+from app.models import (
+    User, UserRole, CreditScoreEvent, CreditScoreComponents, CreditDocument,
+    Loan, LoanStatus, DocumentType, DocumentStatus,
+)
+from app.core.database import dialect_insert
+
+# Approved documents of each type, one count column per type
+DOCUMENT_COUNT_FIELDS: Dict[DocumentType, str] = {
+    document_type: f"{document_type.value.lower()}_documents" for document_type in DocumentType
+}
+
+# Inputs of `compute_score_from_components`, in the order stored on the row
+COMPONENT_FIELDS = tuple(DOCUMENT_COUNT_FIELDS.values()) + (
+    "on_time_count",
+    "late_count",
+    "default_count",
+    "early_repayment_points",
+    "paid_loan_count",
+)
+
+# Stored alongside the formula inputs, rebuilt from the order of payment events
+STREAK_FIELDS = (
+    "on_time_streak",
+    "last_payment_outcome",
+)
+
+STORED_FIELDS = COMPONENT_FIELDS + STREAK_FIELDS
+
+# Payment events: ON_TIME_PAYMENT extends the streak, the others reset it
+PAYMENT_OUTCOME_EVENT_TYPES = [
+    "ON_TIME_PAYMENT",
+    "LATE_PAYMENT",
+    "SEVERELY_LATE_PAYMENT",
+]
+
+# Event types that feed the repayment component
+REPAYMENT_EVENT_TYPES = [
+    "ON_TIME_PAYMENT",
+    "LATE_PAYMENT",
+    "SEVERELY_LATE_PAYMENT",
+    "LOAN_DEFAULT",
+    "EARLY_LOAN_REPAYMENT",
+]
+
+
+def get_score_components(db: Session, user_id: int) -> Optional[CreditScoreComponents]:
+    """Get the components row for a user, if it exists."""
+    return db.query(CreditScoreComponents).filter(
+        CreditScoreComponents.user_id == user_id
+    ).first()
+
+
+def get_or_create_score_components(
+    db: Session,
+    user_id: int,
+    lock: bool = False,
+) -> CreditScoreComponents:
+    """
+    Get the components row for a user, building it from history if missing.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        lock: Lock the row (SELECT ... FOR UPDATE) until the caller commits
+
+    Does not commit: a missing row is inserted into the caller's transaction.
+    """
+    query = db.query(CreditScoreComponents).filter(CreditScoreComponents.user_id == user_id)
+    if lock:
+        query = query.with_for_update().populate_existing()
+
+    components = query.first()
+    if components is None:
+        ensure_score_components(db, user_id)
+        components = query.one()
+    return components
+
+
+def component_inputs(components: Any) -> Dict[str, Any]:
+    """
+    Return stored totals as keyword arguments for `compute_score_from_components`.
+
+    Args:
+        components: A components row, or a dict of its fields (as built by
+            `aggregate_components`)
+    """
+    if isinstance(components, dict):
+        values = {field: components.get(field) or 0 for field in COMPONENT_FIELDS}
+    else:
+        values = {field: getattr(components, field) or 0 for field in COMPONENT_FIELDS}
+
+    inputs: Dict[str, Any] = {
+        "document_counts": {
+            document_type: values.pop(field) for document_type, field in DOCUMENT_COUNT_FIELDS.items()
+        }
+    }
+    inputs.update(values)
+    return inputs
+
+
+def event_component_changes(
+    event_type: str,
+    delta: int,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, int]:
+    """
+    Map one score event to the amounts it adds to each components field.
+
+    Args:
+        event_type: Type of event (e.g., "DOCUMENT_APPROVED", "ON_TIME_PAYMENT")
+        delta: Score change applied by the event
+        metadata: Event metadata (unused by the current event types)
+
+    Returns:
+        field -> amount to add (empty for events that don't feed the formula;
+        document counts follow the reviews, see `record_document_review`)
+    """
+    if event_type == "ON_TIME_PAYMENT":
+        return {"on_time_count": 1}
+    elif event_type in ("LATE_PAYMENT", "SEVERELY_LATE_PAYMENT"):
+        return {"late_count": 1}
+    elif event_type == "LOAN_DEFAULT":
+        return {"default_count": 1}
+    elif event_type == "EARLY_LOAN_REPAYMENT":
+        return {"early_repayment_points": delta}
+    return {}
+
+
+def record_document_review(db: Session, document: CreditDocument, previous_status: DocumentStatus) -> None:
+    """
+    Keep a user's approved-document counts in step with a review.
+
+    Called in the review's transaction, so the counts always match the
+    approved rows of credit_documents (which a rebuild counts). Does not commit.
+
+    Args:
+        db: Database session
+        document: Reviewed CreditDocument, with its new status
+        previous_status: Status before the review
+    """
+    was_approved = previous_status == DocumentStatus.APPROVED
+    is_approved = document.status == DocumentStatus.APPROVED
+    if was_approved == is_approved:
+        return
+
+    count_change = {DOCUMENT_COUNT_FIELDS[document.document_type]: 1 if is_approved else -1}
+    if not increment_score_components(db, document.user_id, count_change):
+        # Built from credit_documents, the new status included
+        ensure_score_components(db, document.user_id)
+
+
+def apply_event_to_components(
+    components: CreditScoreComponents,
+    event_type: str,
+    delta: int,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Fold one score event into an in-memory components row.
+
+    Only safe when the row is locked by the caller; otherwise use
+    `increment_score_components`, which applies the change in SQL.
+    """
+    for field, amount in event_component_changes(event_type, delta, metadata).items():
+        setattr(components, field, (getattr(components, field) or 0) + amount)
+
+    if event_type in PAYMENT_OUTCOME_EVENT_TYPES:
+        if event_type == "ON_TIME_PAYMENT":
+            components.on_time_streak = (components.on_time_streak or 0) + 1
+        else:
+            components.on_time_streak = 0
+        components.last_payment_outcome = event_type
+
+
+def increment_score_components(
+    db: Session,
+    user_id: int,
+    changes: Dict[str, int],
+    event_type: Optional[str] = None,
+) -> bool:
+    """
+    Atomically add `changes` to a user's components row with one UPDATE.
+
+    The increments are computed by the database, so concurrent transactions
+    never overwrite each other's changes. A payment `event_type` also extends
+    or resets the on-time streak in the same statement. Does not commit.
+
+    Returns:
+        False if the user has no components row yet (nothing was updated)
+    """
+    if not changes and event_type not in PAYMENT_OUTCOME_EVENT_TYPES:
+        return True
+
+    values: Dict[str, Any] = {
+        field: getattr(CreditScoreComponents, field) + amount
+        for field, amount in changes.items()
+    }
+
+    if event_type in PAYMENT_OUTCOME_EVENT_TYPES:
+        if event_type == "ON_TIME_PAYMENT":
+            values["on_time_streak"] = CreditScoreComponents.on_time_streak + 1
+        else:
+            values["on_time_streak"] = 0
+        values["last_payment_outcome"] = event_type
+    values["updated_at"] = datetime.now(timezone.utc)
+
+    result = db.execute(
+        update(CreditScoreComponents)
+        .where(CreditScoreComponents.user_id == user_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def ensure_score_components(db: Session, user_id: int) -> None:
+    """
+    Create a user's components row from history if it does not exist yet.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING so two transactions creating the
+    same row at once don't fail. Does not commit.
+    """
+    # The rebuild reads the documents and loans tables: include pending changes
+    db.flush()
+    totals = aggregate_components(db, user_id, user_id)[user_id]
+    insert = dialect_insert(db)
+    db.execute(
+        insert(CreditScoreComponents)
+        .values(user_id=user_id, **totals)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+
+def aggregate_components(db: Session, first_id: int, last_id: int) -> Dict[int, Dict[str, int]]:
+    """
+    Aggregate all scoring components for users in [first_id, last_id].
+
+    Uses one grouped query per source (approved documents, repayment events,
+    paid loans, payment streaks) keyed by user_id, bounded by a user_id range
+    so the user_id indexes apply.
+    """
+    components: Dict[int, Dict[str, Any]] = defaultdict(lambda: {
+        **{field: 0 for field in COMPONENT_FIELDS},
+        "on_time_streak": 0,
+        "last_payment_outcome": None,
+    })
+
+    # 1. Approved documents per (user, document type)
+    for user_id, document_type, count in aggregate_document_counts(db, first_id, last_id):
+        components[user_id][DOCUMENT_COUNT_FIELDS[document_type]] = count
+
+    # 2. Repayment events per (user, event type)
+    event_rows = db.query(
+        CreditScoreEvent.user_id,
+        CreditScoreEvent.event_type,
+        func.count(CreditScoreEvent.id),
+        func.coalesce(func.sum(CreditScoreEvent.delta), 0),
+    ).filter(
+        and_(
+            CreditScoreEvent.user_id.between(first_id, last_id),
+            CreditScoreEvent.event_type.in_(REPAYMENT_EVENT_TYPES),
+        )
+    ).group_by(CreditScoreEvent.user_id, CreditScoreEvent.event_type).all()
+
+    for user_id, event_type, count, delta_sum in event_rows:
+        if event_type == "ON_TIME_PAYMENT":
+            components[user_id]["on_time_count"] += count
+        elif event_type in ("LATE_PAYMENT", "SEVERELY_LATE_PAYMENT"):
+            components[user_id]["late_count"] += count
+        elif event_type == "LOAN_DEFAULT":
+            components[user_id]["default_count"] += count
+        elif event_type == "EARLY_LOAN_REPAYMENT":
+            components[user_id]["early_repayment_points"] += int(delta_sum)
+
+    # 3. Paid loans per customer
+    loan_rows = db.query(
+        Loan.customer_id,
+        func.count(Loan.id),
+    ).filter(
+        and_(
+            Loan.customer_id.between(first_id, last_id),
+            Loan.status == LoanStatus.PAID,
+        )
+    ).group_by(Loan.customer_id).all()
+
+    for user_id, count in loan_rows:
+        components[user_id]["paid_loan_count"] += count
+
+    # 4. Current on-time streak and last payment outcome
+    for user_id, streak in aggregate_payment_streaks(db, first_id, last_id).items():
+        components[user_id].update(streak)
+
+    return components
+
+
+def aggregate_document_counts(db: Session, first_id: int, last_id: int) -> List[Tuple[int, DocumentType, int]]:
+    """
+    Count the approved documents of users in [first_id, last_id] per type.
+
+    Returns:
+        (user_id, document_type, count) rows, for the types a user has approved documents of
+    """
+    document_rows = db.query(
+        CreditDocument.user_id,
+        CreditDocument.document_type,
+        func.count(CreditDocument.id),
+    ).filter(
+        and_(
+            CreditDocument.user_id.between(first_id, last_id),
+            CreditDocument.status == DocumentStatus.APPROVED,
+        )
+    ).group_by(CreditDocument.user_id, CreditDocument.document_type).all()
+
+    return [tuple(row) for row in document_rows]
+
+
+def aggregate_payment_streaks(db: Session, first_id: int, last_id: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Derive the current on-time streak of users in [first_id, last_id] from their events.
+
+    The streak is the number of ON_TIME_PAYMENT events after the user's last
+    late payment. Event ids give the order (events inserted in one batch share
+    a created_at). Users without payment events are omitted.
+    """
+    payment_events = and_(
+        CreditScoreEvent.user_id.between(first_id, last_id),
+        CreditScoreEvent.event_type.in_(PAYMENT_OUTCOME_EVENT_TYPES),
+    )
+
+    # Last payment event and last late payment per user
+    last_ids = db.query(
+        CreditScoreEvent.user_id.label("user_id"),
+        func.max(CreditScoreEvent.id).label("last_event_id"),
+        func.max(
+            case((CreditScoreEvent.event_type != "ON_TIME_PAYMENT", CreditScoreEvent.id))
+        ).label("last_late_id"),
+    ).filter(payment_events).group_by(CreditScoreEvent.user_id).subquery()
+
+    streak_rows = db.query(
+        CreditScoreEvent.user_id,
+        func.count(case((
+            and_(
+                CreditScoreEvent.event_type == "ON_TIME_PAYMENT",
+                CreditScoreEvent.id > func.coalesce(last_ids.c.last_late_id, 0),
+            ),
+            CreditScoreEvent.id,
+        ))),
+        func.max(case((CreditScoreEvent.id == last_ids.c.last_event_id, CreditScoreEvent.event_type))),
+    ).join(
+        last_ids, last_ids.c.user_id == CreditScoreEvent.user_id
+    ).filter(payment_events).group_by(CreditScoreEvent.user_id).all()
+
+    return {
+        user_id: {"on_time_streak": streak, "last_payment_outcome": outcome}
+        for user_id, streak, outcome in streak_rows
+    }
+
+
+def backfill_payment_streaks(db: Session, chunk_size: int = 1000, verbose: bool = False) -> int:
+    """
+    Set every existing components row's streak fields from the event history.
+
+    Customers are processed in user_id chunks; each chunk's rows are locked
+    before its events are read, so score events committed meanwhile are not
+    overwritten. Commits per chunk. Rows that don't exist yet get their
+    streak when they are built on first use.
+
+    Args:
+        db: Database session
+        chunk_size: Customers updated per transaction
+        verbose: Print progress after each chunk (for the CLI script)
+
+    Returns:
+        Number of rows whose streak fields changed
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    updated = 0
+    last_user_id = 0
+
+    while True:
+        user_ids = [
+            row[0] for row in db.query(User.id).filter(
+                and_(
+                    User.role == UserRole.CUSTOMER,
+                    User.id > last_user_id,
+                )
+            ).order_by(User.id).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            break
+
+        first_id, last_user_id = user_ids[0], user_ids[-1]
+        rows = db.query(
+            CreditScoreComponents.id,
+            CreditScoreComponents.user_id,
+            CreditScoreComponents.on_time_streak,
+            CreditScoreComponents.last_payment_outcome,
+        ).filter(
+            CreditScoreComponents.user_id.between(first_id, last_user_id)
+        ).order_by(CreditScoreComponents.user_id).with_for_update().all()
+
+        streaks = aggregate_payment_streaks(db, first_id, last_user_id)
+        changes = []
+        for row_id, user_id, on_time_streak, last_payment_outcome in rows:
+            streak = streaks.get(user_id, {"on_time_streak": 0, "last_payment_outcome": None})
+            if (on_time_streak, last_payment_outcome) != (streak["on_time_streak"], streak["last_payment_outcome"]):
+                changes.append({"id": row_id, **streak})
+
+        if changes:
+            db.execute(update(CreditScoreComponents), changes)
+        db.commit()
+        updated += len(changes)
+        if verbose:
+            print(f"[STREAKS] {updated} rows updated (last user_id {last_user_id})")
+
+    return updated
+
+
+def check_score_components(
+    db: Session,
+    chunk_size: int = 1000,
+    repair: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Compare every customer's stored components with a rebuild from history.
+
+    Args:
+        db: Database session
+        chunk_size: Number of customers aggregated per round of queries
+        repair: Overwrite drifted rows with the rebuilt values (commits per chunk)
+
+    Returns:
+        One entry per drifted field: user_id, field, stored and expected values.
+        A missing components row is reported with stored=None.
+    """
+    drift: List[Dict[str, Any]] = []
+    last_user_id = 0
+
+    while True:
+        user_ids = [
+            row[0] for row in db.query(User.id).filter(
+                and_(
+                    User.role == UserRole.CUSTOMER,
+                    User.id > last_user_id,
+                )
+            ).order_by(User.id).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            break
+
+        first_id, last_user_id = user_ids[0], user_ids[-1]
+        expected = aggregate_components(db, first_id, last_user_id)
+        stored = {
+            row.user_id: row for row in db.query(CreditScoreComponents).filter(
+                CreditScoreComponents.user_id.between(first_id, last_user_id)
+            ).all()
+        }
+
+        for user_id in user_ids:
+            row = stored.get(user_id)
+            totals = expected[user_id]
+            user_drifted = False
+
+            # No row and no history: the row is simply created on first use
+            if row is None and not any(totals.values()):
+                continue
+
+            for field in STORED_FIELDS:
+                stored_value = getattr(row, field) if row is not None else None
+                if stored_value != totals[field]:
+                    drift.append({
+                        "user_id": user_id,
+                        "field": field,
+                        "stored": stored_value,
+                        "expected": totals[field],
+                    })
+                    user_drifted = True
+
+            if repair and user_drifted:
+                if row is None:
+                    row = CreditScoreComponents(user_id=user_id)
+                    db.add(row)
+                for field, value in totals.items():
+                    setattr(row, field, value)
+
+        if repair:
+            db.commit()
+
+    return drift
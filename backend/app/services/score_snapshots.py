@@ -0,0 +1,250 @@
+"""
+Credit Score Snapshots and Point-in-Time Profiles
+
+`CreditScoreSnapshot` rows store a user's score, tier, limit and event-sourced
+scoring components right after every `interval`-th score event. A point-in-time
+lookup (`get_profile_as_of`) starts from the nearest snapshot at or before the
+requested time and replays only the events after it, instead of the user's
+whole event history.
+
+Snapshots are written by a bulk job (`create_score_snapshots`) that walks
+customers in user_id chunks, reads each chunk's events since its latest
+snapshots with one query and bulk inserts the new snapshots. The job is
+incremental, so it can run as often as needed.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert
+
+from app.models import User, UserRole, CreditProfile, CreditScoreEvent, CreditScoreSnapshot
+from app.core.scoring_policy import get_scoring_policy
+from app.services.score_components import apply_event_to_components
+from app.services.scoring_policies import get_policy_version
+
+DEFAULT_SNAPSHOT_INTERVAL = 100  # Events between two snapshots of the same user
+DEFAULT_CHUNK_SIZE = 1000
+
+# Components that can be rebuilt from events alone (approved documents and paid
+# loans are counted from their tables)
+SNAPSHOT_FIELDS = (
+    "on_time_count",
+    "late_count",
+    "default_count",
+    "early_repayment_points",
+    "on_time_streak",
+    "last_payment_outcome",
+)
+
+
+def _replay_state(snapshot: Optional[CreditScoreSnapshot] = None) -> SimpleNamespace:
+    """Components state to fold events into, starting from a snapshot or from scratch."""
+    if snapshot is None:
+        state = SimpleNamespace(**{field: 0 for field in SNAPSHOT_FIELDS})
+        state.last_payment_outcome = None
+        return state
+    return SimpleNamespace(**{field: getattr(snapshot, field) for field in SNAPSHOT_FIELDS})
+
+
+def _snapshot_values(db: Session, event: CreditScoreEvent, state: SimpleNamespace, event_count: int) -> Dict[str, Any]:
+    """Snapshot row for the state right after `event`."""
+    policy = get_policy_version(db, event.policy_version)
+    tier = policy.tier_for_score(event.score_after)
+    return {
+        "user_id": event.user_id,
+        "last_event_id": event.id,
+        "last_event_at": event.created_at,
+        "score": event.score_after,
+        "tier": tier,
+        "max_bnpl_limit": policy.limit_for_tier(tier),
+        "policy_version": event.policy_version,
+        "event_count": event_count,
+        **{field: getattr(state, field) for field in SNAPSHOT_FIELDS},
+    }
+
+
+def create_score_snapshots(
+    db: Session,
+    interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    verbose: bool = False,
+) -> int:
+    """
+    Snapshot every customer after each `interval`-th event not yet covered.
+
+    Args:
+        db: Database session
+        interval: Events between two snapshots (bounds the replay of a lookup)
+        chunk_size: Customers processed per transaction
+        verbose: Print progress after each chunk (for the CLI script)
+
+    Returns:
+        Number of snapshots created
+    """
+    if interval <= 0 or chunk_size <= 0:
+        raise ValueError("interval and chunk_size must be positive")
+
+    created = 0
+    last_user_id = 0
+
+    while True:
+        user_ids = [
+            row[0] for row in db.query(User.id).filter(
+                and_(
+                    User.role == UserRole.CUSTOMER,
+                    User.id > last_user_id,
+                )
+            ).order_by(User.id).limit(chunk_size).all()
+        ]
+        if not user_ids:
+            break
+
+        first_id, last_user_id = user_ids[0], user_ids[-1]
+
+        # Latest snapshot per user in the chunk
+        latest_ids = db.query(
+            CreditScoreSnapshot.user_id.label("user_id"),
+            func.max(CreditScoreSnapshot.last_event_id).label("last_event_id"),
+        ).filter(
+            CreditScoreSnapshot.user_id.between(first_id, last_user_id)
+        ).group_by(CreditScoreSnapshot.user_id).subquery()
+
+        latest = {
+            snapshot.user_id: snapshot for snapshot in db.query(CreditScoreSnapshot).join(
+                latest_ids, latest_ids.c.last_event_id == CreditScoreSnapshot.last_event_id
+            ).all()
+        }
+
+        # Every event after those snapshots, for the whole chunk in one query
+        events = db.query(CreditScoreEvent).outerjoin(
+            latest_ids, latest_ids.c.user_id == CreditScoreEvent.user_id
+        ).filter(
+            and_(
+                CreditScoreEvent.user_id.between(first_id, last_user_id),
+                CreditScoreEvent.id > func.coalesce(latest_ids.c.last_event_id, 0),
+            )
+        ).order_by(CreditScoreEvent.user_id, CreditScoreEvent.id).yield_per(1000)
+
+        rows: List[Dict[str, Any]] = []
+        current_user_id = None
+        state = None
+        event_count = 0
+
+        for event in events:
+            if event.user_id != current_user_id:
+                current_user_id = event.user_id
+                snapshot = latest.get(event.user_id)
+                state = _replay_state(snapshot)
+                event_count = snapshot.event_count if snapshot else 0
+
+            apply_event_to_components(state, event.event_type, event.delta, event.event_metadata)
+            event_count += 1
+            if event_count % interval == 0:
+                rows.append(_snapshot_values(db, event, state, event_count))
+
+        if rows:
+            db.execute(insert(CreditScoreSnapshot), rows)
+        db.commit()
+        created += len(rows)
+        if verbose:
+            print(f"[SNAPSHOTS] {created} snapshots created (last user_id {last_user_id})")
+
+    return created
+
+
+def run_snapshot_job(interval: int = DEFAULT_SNAPSHOT_INTERVAL, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Run `create_score_snapshots` with its own session (for background tasks)."""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        create_score_snapshots(db, interval=interval, chunk_size=chunk_size)
+    except Exception as e:
+        print(f"[SNAPSHOTS ERROR] {str(e)}")
+    finally:
+        db.close()
+
+
+def get_profile_as_of(db: Session, user_id: int, as_of: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Reconstruct a user's credit profile as it was at `as_of`.
+
+    Starts from the nearest snapshot at or before `as_of` and replays the
+    events after it. The tier and limit come from the policy version recorded
+    on the last event. Recalculations record the scores they set as
+    RECALCULATED events, so they are replayed like any other change.
+
+    Returns:
+        user_id, as_of, score, tier, max_bnpl_limit, policy_version,
+        last_event_id, snapshot_id, replayed_events and components; None if
+        the user had no credit profile yet
+    """
+    as_of = _aware(as_of).astimezone(timezone.utc)
+
+    snapshot = db.query(CreditScoreSnapshot).filter(
+        and_(
+            CreditScoreSnapshot.user_id == user_id,
+            CreditScoreSnapshot.last_event_at <= as_of,
+        )
+    ).order_by(CreditScoreSnapshot.last_event_at.desc(), CreditScoreSnapshot.last_event_id.desc()).first()
+
+    events = db.query(CreditScoreEvent).filter(
+        and_(
+            CreditScoreEvent.user_id == user_id,
+            CreditScoreEvent.id > (snapshot.last_event_id if snapshot else 0),
+            CreditScoreEvent.created_at <= as_of,
+        )
+    ).order_by(CreditScoreEvent.id).all()
+
+    state = _replay_state(snapshot)
+    for event in events:
+        apply_event_to_components(state, event.event_type, event.delta, event.event_metadata)
+
+    if events:
+        last_event = events[-1]
+        policy = get_policy_version(db, last_event.policy_version)
+        score = last_event.score_after
+        tier = policy.tier_for_score(score)
+        values = {
+            "score": score,
+            "tier": tier,
+            "max_bnpl_limit": policy.limit_for_tier(tier),
+            "policy_version": last_event.policy_version,
+            "last_event_id": last_event.id,
+        }
+    elif snapshot:
+        values = {
+            "score": snapshot.score,
+            "tier": snapshot.tier,
+            "max_bnpl_limit": snapshot.max_bnpl_limit,
+            "policy_version": snapshot.policy_version,
+            "last_event_id": snapshot.last_event_id,
+        }
+    else:
+        # No event yet: the profile still had its initial values
+        profile = db.query(CreditProfile).filter(CreditProfile.user_id == user_id).first()
+        if profile is None or (profile.created_at and _aware(profile.created_at) > as_of):
+            return None
+        policy = get_scoring_policy()
+        values = {
+            "score": policy.INITIAL_SCORE,
+            "tier": policy.INITIAL_TIER,
+            "max_bnpl_limit": policy.INITIAL_MAX_BNPL_LIMIT,
+            "policy_version": None,
+            "last_event_id": None,
+        }
+
+    return {
+        "user_id": user_id,
+        "as_of": as_of,
+        **values,
+        "snapshot_id": snapshot.id if snapshot else None,
+        "replayed_events": len(events),
+        "components": {field: getattr(state, field) for field in SNAPSHOT_FIELDS},
+    }
+
+
+def _aware(value: datetime) -> datetime:
+    """Treat naive timestamps (as returned by SQLite) as UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
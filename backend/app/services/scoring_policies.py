@@ -0,0 +1,155 @@
+"""
+Scoring Policy Versions
+
+Stores published scoring policies in `scoring_policy_versions` and keeps each
+process's active `ScoringPolicy` in sync with the table. Publishing a version
+deactivates the previous one in the same transaction. Running workers pick it
+up on their next refresh (`start_policy_watcher` polls the active version
+number), and the compiled policy is swapped in atomically.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from app.models import ScoringPolicyVersion
+from app.core.scoring_policy import (
+    DEFAULT_POLICY_VERSION,
+    ScoringPolicy,
+    default_policy,
+    get_scoring_policy,
+    set_scoring_policy,
+)
+
+
+def get_active_policy_version(db: Session) -> Optional[ScoringPolicyVersion]:
+    """Get the active published policy version, if any."""
+    return db.query(ScoringPolicyVersion).filter(
+        ScoringPolicyVersion.is_active.is_(True)
+    ).order_by(ScoringPolicyVersion.version.desc()).first()
+
+
+def load_active_policy(db: Session) -> ScoringPolicy:
+    """Compile the active published policy (the built-in policy if none is published)."""
+    row = get_active_policy_version(db)
+    if row is None:
+        return default_policy()
+    return ScoringPolicy.from_json(row.version, row.parameters)
+
+
+# Published versions never change, so compiled copies can be kept for good
+_policy_version_cache: Dict[int, ScoringPolicy] = {}
+
+
+def get_policy_version(db: Session, version: Optional[int]) -> ScoringPolicy:
+    """
+    Compile a specific published version (e.g. the one recorded on an old event).
+
+    Version 0, None (events from before versioning) and unknown versions
+    give the built-in policy.
+    """
+    version = version or DEFAULT_POLICY_VERSION
+    policy = _policy_version_cache.get(version)
+    if policy is None:
+        row = None
+        if version != DEFAULT_POLICY_VERSION:
+            row = db.query(ScoringPolicyVersion).filter(ScoringPolicyVersion.version == version).first()
+        policy = ScoringPolicy.from_json(row.version, row.parameters) if row else default_policy()
+        _policy_version_cache[version] = policy
+    return policy
+
+
+def refresh_scoring_policy(db: Session) -> ScoringPolicy:
+    """
+    Swap in the active published policy if its version changed.
+
+    Only the version number is read when nothing changed, so this is cheap
+    enough to poll.
+
+    Returns:
+        The policy active in this process after the refresh
+    """
+    current = get_scoring_policy()
+    active_version = db.query(func.max(ScoringPolicyVersion.version)).filter(
+        ScoringPolicyVersion.is_active.is_(True)
+    ).scalar()
+
+    if (active_version or 0) != current.version:
+        policy = load_active_policy(db)
+        set_scoring_policy(policy)
+        print(f"[SCORING POLICY] Switched from version {current.version} to {policy.version}")
+        return policy
+    return current
+
+
+def publish_scoring_policy(
+    db: Session,
+    overrides: Dict[str, Any],
+    description: Optional[str] = None,
+    created_by: Optional[int] = None,
+) -> ScoringPolicyVersion:
+    """
+    Publish a new policy version and make it active.
+
+    Args:
+        db: Database session
+        overrides: Parameters that change relative to the active policy
+        description: Optional note on what changed
+        created_by: Admin user_id publishing the version
+
+    Returns:
+        The new ScoringPolicyVersion row
+
+    Raises:
+        ValueError: If a parameter name or value is invalid
+    """
+    base = load_active_policy(db)
+    latest_version = db.query(func.max(ScoringPolicyVersion.version)).scalar() or 0
+    policy = base.with_overrides(overrides, version=latest_version + 1)
+
+    now = datetime.now(timezone.utc)
+    db.query(ScoringPolicyVersion).filter(
+        ScoringPolicyVersion.is_active.is_(True)
+    ).update({ScoringPolicyVersion.is_active: False}, synchronize_session=False)
+
+    row = ScoringPolicyVersion(
+        version=policy.version,
+        parameters=policy.to_json(),
+        description=description,
+        is_active=True,
+        created_by=created_by,
+        activated_at=now,
+    )
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+
+    # This process switches right away; other workers on their next refresh
+    set_scoring_policy(policy)
+    return row
+
+
+def start_policy_watcher(interval_seconds: int) -> threading.Thread:
+    """
+    Poll for a newly published policy every `interval_seconds` in a daemon thread.
+
+    The first check runs immediately, so a worker starts with the active policy.
+    """
+    from app.core.database import SessionLocal
+
+    def watch():
+        while True:
+            db = SessionLocal()
+            try:
+                refresh_scoring_policy(db)
+            except Exception as e:
+                print(f"[SCORING POLICY ERROR] Refresh failed: {str(e)}")
+            finally:
+                db.close()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=watch, name="scoring-policy-watcher", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,169 @@
+"""
+Product View Counter
+
+Counts product detail views without a database write per view. Each API
+worker adds views to an in-memory counter keyed by product and hour, and a
+background thread flushes the counter every few seconds as one bulk upsert
+into `product_view_counts` (`view_count = view_count + n`), so workers never
+overwrite each other's counts.
+
+Counts are flushed on shutdown as well. A worker that crashes loses at most
+the views since its last flush; a failed flush keeps its counts for the next
+one, up to MAX_PENDING_KEYS product-hours.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from app.models import ProductViewCount
+from app.core.database import dialect_insert
+
+FLUSH_CHUNK_SIZE = 500
+MAX_PENDING_KEYS = 100000  # Product-hours kept across failed flushes
+
+ViewKey = Tuple[int, int, datetime]  # (product_id, retailer_id, hour)
+
+
+def view_hour(at: Optional[datetime] = None) -> datetime:
+    """Start of the UTC hour a view at `at` (default now) counts for."""
+    at = at or datetime.now(timezone.utc)
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class ViewCounter:
+    """Thread-safe in-memory view counts of one worker, waiting to be flushed."""
+
+    def __init__(self, max_pending_keys: int = MAX_PENDING_KEYS):
+        self.max_pending_keys = max_pending_keys
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, product_id: int, retailer_id: int, at: Optional[datetime] = None) -> None:
+        """Count one view of a product."""
+        key = (product_id, retailer_id, view_hour(at))
+        with self._lock:
+            if key in self._counts or len(self._counts) < self.max_pending_keys:
+                self._counts[key] += 1
+
+    def pending(self) -> int:
+        """Number of views waiting to be flushed."""
+        with self._lock:
+            return sum(self._counts.values())
+
+    def flush(self, db: Session) -> int:
+        """
+        Write the pending counts with bulk upserts and commit.
+
+        The counts are taken out of the counter first, so views recorded
+        during the flush wait for the next one. If the write fails they are
+        put back (within max_pending_keys) and the error is raised.
+
+        Returns:
+            Number of views written
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+
+        try:
+            _upsert_view_counts(db, counts)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for key, count in counts.items():
+                    if key in self._counts or len(self._counts) < self.max_pending_keys:
+                        self._counts[key] += count
+            raise
+
+        return sum(counts.values())
+
+
+def _upsert_view_counts(db: Session, counts: Dict[ViewKey, int]) -> None:
+    """Add counts to their product-hour rows, FLUSH_CHUNK_SIZE rows per statement. Does not commit."""
+    insert = dialect_insert(db)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"product_id": product_id, "retailer_id": retailer_id, "hour": hour, "view_count": count}
+        for (product_id, retailer_id, hour), count in sorted(counts.items())
+    ]
+    for start in range(0, len(rows), FLUSH_CHUNK_SIZE):
+        insert_stmt = insert(ProductViewCount).values(rows[start:start + FLUSH_CHUNK_SIZE])
+        db.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=["product_id", "hour"],
+                set_={
+                    "view_count": ProductViewCount.view_count + insert_stmt.excluded.view_count,
+                    "updated_at": now,
+                },
+            )
+        )
+
+
+# This worker's counter
+view_counter = ViewCounter()
+
+
+def record_product_view(product_id: int, retailer_id: int) -> None:
+    """Count a product detail view (in memory; written by the next flush)."""
+    view_counter.record(product_id, retailer_id)
+
+
+def flush_view_counts() -> int:
+    """Flush this worker's pending views with its own session. Returns the number of views written."""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return view_counter.flush(db)
+    finally:
+        db.close()
+
+
+def start_view_flusher(interval_seconds: float) -> threading.Thread:
+    """Flush this worker's pending views every `interval_seconds` in a daemon thread."""
+    def flush_loop():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                flush_view_counts()
+            except Exception as e:
+                print(f"[VIEWS ERROR] Flush failed: {str(e)}")
+
+    thread = threading.Thread(target=flush_loop, name="product-view-flusher", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_view_totals(
+    db: Session,
+    start: datetime,
+    end: Optional[datetime] = None,
+    retailer_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> int:
+    """
+    Flushed views of the hours starting in [start, end) (end open-ended when omitted).
+
+    Args:
+        db: Database session
+        start: Start of the window (rounded down to the hour)
+        end: End of the window
+        retailer_id: Only this retailer's products (default: the whole platform)
+        product_id: Only this product
+    """
+    filters = [ProductViewCount.hour >= view_hour(start)]
+    if end is not None:
+        filters.append(ProductViewCount.hour < end)
+    if retailer_id is not None:
+        filters.append(ProductViewCount.retailer_id == retailer_id)
+    if product_id is not None:
+        filters.append(ProductViewCount.product_id == product_id)
+    return int(db.query(func.coalesce(func.sum(ProductViewCount.view_count), 0)).filter(*filters).scalar())
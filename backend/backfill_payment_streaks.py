@@ -0,0 +1,42 @@
+"""
+Standalone script to backfill on-time payment streaks.
+
+Derives every customer's current on-time streak and last payment outcome from
+the credit score event history and stores them on CreditScoreComponents:
+    python backfill_payment_streaks.py [--chunk-size 1000]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.score_components import backfill_payment_streaks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="On-time payment streak backfill")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Customers updated per transaction")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("On-Time Payment Streak Backfill")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        updated = backfill_payment_streaks(db, chunk_size=args.chunk_size, verbose=True)
+        print(f"\n[SUCCESS] Streaks backfilled ({updated} rows changed)")
+    except Exception as e:
+        print(f"\n[ERROR] Backfill failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
@@ -0,0 +1,192 @@
+"""
+Requests/sec benchmark of one API worker on the database-backed hot paths.
+
+Starts the API in a uvicorn server (one worker) in this process, creates a
+customer with loans and a credit profile, then keeps
+`--concurrency` clients busy for `--seconds` on a mix of endpoints that hit
+the database on every call:
+
+    GET /products?limit=20, GET /loans/me, GET /credit/profile/me,
+    GET /credit/documents/me
+
+and reports requests/sec and latency percentiles. Run it on two revisions
+(e.g. before and after a change of the database layer) against the same
+DATABASE_URL to compare them; the synchronous layer serializes requests on
+the event loop, the async one interleaves them while queries wait on the
+database, which pays off with a network round trip per query (PostgreSQL).
+
+Run from the backend directory:
+    python benchmarks/bench_async_db.py [--concurrency 32] [--seconds 10]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import httpx
+import uvicorn
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.main import app
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models import (
+    User, UserRole, Retailer, Lender, Product, Loan, LoanStatus, Installment,
+    CreditProfile,
+)
+
+REQUEST_TIMEOUT_SECONDS = 10.0
+ENDPOINTS = ("/products?limit=20", "/loans/me", "/credit/profile/me", "/credit/documents/me")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Server did not start")
+        time.sleep(0.05)
+    return server
+
+
+def _create_customer(loans: int = 20) -> str:
+    """Create a customer with a credit profile and loans; returns their access token."""
+    tag = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        def user(role: UserRole) -> User:
+            row = User(name="Async Benchmark", email=f"bench-{role.value.lower()}-{tag}@example.com",
+                       password_hash="not-a-real-hash", role=role)
+            db.add(row)
+            db.flush()
+            return row
+
+        customer = user(UserRole.CUSTOMER)
+        retailer = Retailer(user_id=user(UserRole.RETAILER).id, business_name="Benchmark Shop")
+        lender = Lender(user_id=user(UserRole.LENDER).id, institution_name="Benchmark Lender")
+        db.add_all([retailer, lender])
+        db.flush()
+        products = [
+            Product(retailer_id=retailer.id, name=f"Benchmark item {i}", price=Decimal(1000 * (i + 1)), stock=5)
+            for i in range(40)
+        ]
+        db.add_all(products)
+        db.flush()
+
+        now = datetime.utcnow()
+        db.add(CreditProfile(user_id=customer.id, score=600, tier="TIER_2",
+                             max_bnpl_limit=Decimal("500000"), updated_at=now))
+        for i in range(loans):
+            loan = Loan(customer_id=customer.id, lender_id=lender.id, product_id=products[i % 40].id,
+                        principal_amount=Decimal("8000"), deposit_amount=Decimal("2000"),
+                        total_amount=Decimal("8800"), status=LoanStatus.ACTIVE)
+            db.add(loan)
+            db.flush()
+            db.add_all([
+                Installment(loan_id=loan.id, due_date=now + timedelta(days=30 * (n + 1)),
+                            amount=Decimal("2933.33"), paid=False)
+                for n in range(3)
+            ])
+        db.commit()
+        return create_access_token({"sub": str(customer.id)})
+    finally:
+        db.close()
+
+
+async def _client(base_url: str, token: str, deadline: float, offset: int, latencies: list, errors: list) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS) as http:
+        n = offset
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await http.get(ENDPOINTS[n % len(ENDPOINTS)])
+            except httpx.TransportError as e:
+                errors.append(type(e).__name__)
+                return  # The worker is stuck (e.g. the connection pool ran dry)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            n += 1
+
+
+def _percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def run_async_db_benchmark(concurrency: int = 32, seconds: float = 10.0) -> dict:
+    """
+    Load one worker with `concurrency` clients for `seconds`.
+
+    Returns:
+        Summary with requests/sec, latency percentiles (ms) and error count.
+    """
+    port = _free_port()
+    server = _start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+    token = _create_customer()
+
+    async def load(duration: float) -> tuple:
+        latencies, errors = [], []
+        deadline = time.monotonic() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            _client(base_url, token, deadline, offset, latencies, errors)
+            for offset in range(concurrency)
+        ])
+        return latencies, errors, time.perf_counter() - started
+
+    try:
+        asyncio.run(load(1.0))  # Warm up (caches, connections)
+        latencies, errors, elapsed = asyncio.run(load(seconds))
+    finally:
+        server.should_exit = True
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 99), 2) if latencies else None,
+        "errors": len(errors),
+        "error_kinds": sorted({str(error) for error in errors}),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker requests/sec on the database hot paths")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Measured duration")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Async Database Benchmark")
+    print("=" * 60)
+
+    result = run_async_db_benchmark(concurrency=args.concurrency, seconds=args.seconds)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+    if result["errors"]:
+        print("\n[FAIL] Some requests failed")
+        sys.exit(1)
+    print("\n[SUCCESS] Benchmark complete")
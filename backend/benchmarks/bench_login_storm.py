@@ -0,0 +1,148 @@
+"""
+Login storm benchmark for the password hashing pool.
+
+Starts the API in a uvicorn server (one worker) in this process, measures the
+latency of an unrelated endpoint (GET /health) alone, then again while many
+clients log in at once. With bcrypt on the hashing pool the event loop stays
+free, so the p99 latency of /health stays flat during the storm; logins
+beyond the pool's pending limit get a fast 503.
+
+Run from the backend directory:
+    python benchmarks/bench_login_storm.py [--logins 32] [--seconds 5]
+"""
+
+import argparse
+import sys
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.main import app
+
+PASSWORD = "storm-password-123"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Server did not start")
+        time.sleep(0.05)
+    return server
+
+
+def _percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def _probe(base_url: str, seconds: float, interval: float = 0.01) -> list:
+    """Latencies (ms) of GET /health, one request every `interval` seconds."""
+    latencies = []
+    with httpx.Client(base_url=base_url) as http:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            http.get("/health").raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(interval)
+    return latencies
+
+
+def _login_loop(base_url: str, email: str, stop: threading.Event) -> dict:
+    statuses = {}
+    with httpx.Client(base_url=base_url, timeout=60) as http:
+        while not stop.is_set():
+            response = http.post("/auth/login", json={"email_or_username": email, "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return statuses
+
+
+def run_login_storm_benchmark(logins: int = 32, seconds: float = 5.0) -> dict:
+    """
+    Compare /health latency without and with `logins` clients logging in continuously.
+
+    Returns:
+        Summary with p50/p99 latencies (ms) of both phases and login outcomes.
+    """
+    port = _free_port()
+    server = _start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+    email = f"storm-{uuid.uuid4().hex}@example.com"
+
+    try:
+        with httpx.Client(base_url=base_url, timeout=60) as http:
+            http.post("/auth/register", json={
+                "name": "Login Storm", "email": email, "password": PASSWORD,
+            }).raise_for_status()
+
+        _probe(base_url, 0.5)  # Warm up
+        idle = _probe(base_url, seconds)
+
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=logins) as pool:
+            storms = [pool.submit(_login_loop, base_url, email, stop) for _ in range(logins)]
+            time.sleep(0.5)  # Let the storm build up
+            stormy = _probe(base_url, seconds)
+            stop.set()
+            statuses = {}
+            for storm in storms:
+                for status_code, count in storm.result().items():
+                    statuses[status_code] = statuses.get(status_code, 0) + count
+    finally:
+        server.should_exit = True
+
+    return {
+        "idle_p50_ms": round(_percentile(idle, 50), 2),
+        "idle_p99_ms": round(_percentile(idle, 99), 2),
+        "storm_p50_ms": round(_percentile(stormy, 50), 2),
+        "storm_p99_ms": round(_percentile(stormy, 99), 2),
+        "probes": len(idle) + len(stormy),
+        "logins_ok": statuses.get(200, 0),
+        "logins_rejected_503": statuses.get(503, 0),
+        "logins_other": {code: count for code, count in statuses.items() if code not in (200, 503)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login storm latency benchmark")
+    parser.add_argument("--logins", type=int, default=32, help="Concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each phase")
+    parser.add_argument("--max-p99-ms", type=float, default=100.0,
+                        help="Highest acceptable /health p99 during the storm")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Login Storm Benchmark")
+    print("=" * 60)
+
+    result = run_login_storm_benchmark(logins=args.logins, seconds=args.seconds)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+    if result["logins_other"]:
+        print("\n[FAIL] Unexpected login responses")
+        sys.exit(1)
+    if result["storm_p99_ms"] > args.max_p99_ms:
+        print(f"\n[FAIL] /health p99 rose above {args.max_p99_ms}ms during the storm")
+        sys.exit(1)
+    print("\n[SUCCESS] Unrelated requests stayed responsive during the login storm")
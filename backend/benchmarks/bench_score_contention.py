@@ -0,0 +1,132 @@
+"""
+Contention benchmark for atomic credit score updates.
+
+Fires concurrent on-time payments at a single customer from many threads,
+each with its own database session, then checks that no score change was
+lost: the final score, the event count and the before/after chain of the
+events must all match a serial application of the same deltas.
+
+Run from the backend directory:
+    python benchmarks/bench_score_contention.py [--workers 16] [--payments 25]
+"""
+
+import argparse
+import sys
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.core.credit_config import ON_TIME_PAYMENT_POINTS
+from app.models import User, UserRole, CreditProfile, CreditScoreEvent
+from app.services.credit_scoring import apply_score_change, get_or_create_credit_profile
+
+
+def _create_customer(score: int) -> int:
+    db = SessionLocal()
+    try:
+        user = User(
+            name="Contention Benchmark",
+            email=f"contention-{uuid.uuid4().hex}@bench.local",
+            password_hash="not-a-real-hash",
+            role=UserRole.CUSTOMER,
+        )
+        db.add(user)
+        db.commit()
+        profile = get_or_create_credit_profile(db, user.id)
+        profile.score = score
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _pay(user_id: int, payment_number: int) -> None:
+    db = SessionLocal()
+    try:
+        apply_score_change(
+            db,
+            user_id=user_id,
+            delta=ON_TIME_PAYMENT_POINTS,
+            event_type="ON_TIME_PAYMENT",
+            metadata={"benchmark_payment": payment_number},
+        )
+    finally:
+        db.close()
+
+
+def run_contention_benchmark(workers: int = 16, payments: int = 25, initial_score: int = 300) -> dict:
+    """
+    Apply `workers * payments` concurrent score changes to one customer.
+
+    Returns:
+        Summary with the expected and actual final score, event count,
+        whether the event chain is consistent, and throughput.
+    """
+    Base.metadata.create_all(bind=engine)
+    user_id = _create_customer(initial_score)
+    total = workers * payments
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda n: _pay(user_id, n), range(total)))
+    elapsed = time.perf_counter() - started
+
+    # Expected result of applying the same deltas serially, with clamping
+    expected_score = initial_score
+    for _ in range(total):
+        expected_score = max(0, min(1000, expected_score + ON_TIME_PAYMENT_POINTS))
+
+    db = SessionLocal()
+    try:
+        final_score = db.query(CreditProfile.score).filter(CreditProfile.user_id == user_id).scalar()
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == user_id
+        ).order_by(CreditScoreEvent.id).all()
+    finally:
+        db.close()
+
+    # Each event must start from the score the previous one ended on
+    chain_consistent = all(
+        previous.score_after == current.score_before
+        for previous, current in zip(events, events[1:])
+    ) and bool(events) and events[0].score_before == initial_score
+
+    return {
+        "user_id": user_id,
+        "updates": total,
+        "expected_score": expected_score,
+        "final_score": final_score,
+        "event_count": len(events),
+        "chain_consistent": chain_consistent,
+        "elapsed_seconds": elapsed,
+        "updates_per_second": total / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent score update benchmark")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent threads")
+    parser.add_argument("--payments", type=int, default=25, help="Payments per thread")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Credit Score Contention Benchmark")
+    print("=" * 60)
+
+    result = run_contention_benchmark(workers=args.workers, payments=args.payments)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+    if (result["final_score"] != result["expected_score"]
+            or result["event_count"] != result["updates"]
+            or not result["chain_consistent"]):
+        print("\n[FAIL] Score updates were lost or applied out of order")
+        sys.exit(1)
+    print("\n[SUCCESS] No lost updates")
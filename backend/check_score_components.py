@@ -0,0 +1,55 @@
+"""
+Standalone script to check the per-user scoring components for drift.
+
+Rebuilds every customer's CreditScoreComponents totals from the event log and
+reports any difference from the stored row:
+    python check_score_components.py [--repair]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.score_components import check_score_components
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scoring components consistency check")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Customers checked per round of queries")
+    parser.add_argument("--repair", action="store_true",
+                        help="Overwrite drifted rows with the rebuilt values")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Scoring Components Consistency Check")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        drift = check_score_components(db, chunk_size=args.chunk_size, repair=args.repair)
+        for entry in drift:
+            print(f"[DRIFT] user_id={entry['user_id']} {entry['field']}: "
+                  f"stored={entry['stored']} expected={entry['expected']}")
+
+        drifted_users = len({entry["user_id"] for entry in drift})
+        if not drift:
+            print("\n[SUCCESS] No drift found")
+        elif args.repair:
+            print(f"\n[REPAIRED] {drifted_users} customers had drifted components")
+        else:
+            print(f"\n[DRIFT] {drifted_users} customers have drifted components (run with --repair to fix)")
+            sys.exit(2)
+    except Exception as e:
+        print(f"\n[ERROR] Consistency check failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
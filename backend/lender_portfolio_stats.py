@@ -0,0 +1,69 @@
+"""
+Standalone script for the lender portfolio stats rollup.
+
+Commands:
+    python lender_portfolio_stats.py roll-forward     # Move aging buckets to now (daily)
+    python lender_portfolio_stats.py rebuild          # Rebuild every lender's row from scratch
+    python lender_portfolio_stats.py check [--repair] # Compare rows with a from-scratch aggregation
+
+Schedule the roll-forward once a day, e.g. with cron:
+    30 0 * * * cd /path/to/backend && python lender_portfolio_stats.py roll-forward
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.portfolio_stats import (
+    check_portfolio_stats,
+    rebuild_portfolio_stats,
+    roll_forward_aging,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lender portfolio stats rollup")
+    parser.add_argument("command", choices=["roll-forward", "rebuild", "check"])
+    parser.add_argument("--repair", action="store_true",
+                        help="With check: overwrite drifted rows with the aggregated values")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Lender Portfolio Stats")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "roll-forward":
+            moved = roll_forward_aging(db)
+            print(f"\n[SUCCESS] Aging buckets rolled forward ({moved} installments changed bucket)")
+        elif args.command == "rebuild":
+            rebuilt = rebuild_portfolio_stats(db)
+            print(f"\n[SUCCESS] Rebuilt portfolio stats of {rebuilt} lenders")
+        else:
+            drift = check_portfolio_stats(db, repair=args.repair)
+            for entry in drift:
+                print(
+                    f"  lender {entry['lender_id']} {entry['field']}: "
+                    f"stored {entry['stored']}, expected {entry['expected']}"
+                )
+            if not drift:
+                print("\n[SUCCESS] Portfolio stats match the loans and installments")
+            elif args.repair:
+                print(f"\n[SUCCESS] Repaired {len(drift)} drifted fields")
+            else:
+                print(f"\n[ERROR] {len(drift)} drifted fields (run with --repair to fix)")
+                sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {args.command} failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
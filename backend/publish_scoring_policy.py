@@ -0,0 +1,51 @@
+"""
+Standalone script to publish a new scoring policy version.
+
+Reads the parameters that change (relative to the active policy) from a JSON
+file, stores the complete policy as the next version and activates it.
+Running workers switch to it on their next policy refresh:
+    python publish_scoring_policy.py overrides.json [--description "..."]
+
+overrides.json uses the credit_config constant names, e.g.
+    {"LATE_PAYMENT_PENALTY": -20, "DOCUMENT_WEIGHTS": {"BANK_STATEMENT": 90}}
+"""
+
+import argparse
+import json
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.scoring_policies import publish_scoring_policy
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a scoring policy version")
+    parser.add_argument("overrides", help="JSON file of parameter overrides")
+    parser.add_argument("--description", default=None, help="What changed in this version")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Publish Scoring Policy")
+    print("=" * 60)
+
+    with open(args.overrides) as f:
+        overrides = json.load(f)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        row = publish_scoring_policy(db, overrides, description=args.description)
+        print(f"\n[SUCCESS] Published and activated scoring policy version {row.version}")
+        print("Run recalculate_scores.py --restart to rescore existing customers under it.")
+    except Exception as e:
+        print(f"\n[ERROR] Publishing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
@@ -0,0 +1,55 @@
+"""
+Standalone script to recalculate every customer's credit score in bulk.
+
+Run this script after changing rules in app/core/credit_config.py:
+    python recalculate_scores.py [--chunk-size 1000] [--restart]
+
+An interrupted run resumes from its last committed chunk when started again.
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.bulk_scoring import DEFAULT_CHUNK_SIZE, DEFAULT_JOB_NAME, recalculate_all_scores
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk credit score recalculation")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Customers recalculated per transaction")
+    parser.add_argument("--job-name", default=DEFAULT_JOB_NAME,
+                        help="Checkpoint name used to resume the run")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore an unfinished checkpoint and start from the first customer")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Bulk Credit Score Recalculation")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        checkpoint = recalculate_all_scores(
+            db,
+            chunk_size=args.chunk_size,
+            job_name=args.job_name,
+            restart=args.restart,
+            verbose=True,
+        )
+        print(f"\n[SUCCESS] Recalculated {checkpoint.processed_count} customers "
+              f"(last user_id {checkpoint.last_user_id})")
+    except Exception as e:
+        print(f"\n[ERROR] Bulk recalculation failed: {e}")
+        print("Run the script again to resume from the last checkpoint.")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
@@ -0,0 +1,66 @@
+"""
+Standalone credit scoring worker.
+
+Drains the credit scoring outbox (documents approved, installments paid, loan
+status changes) through the scoring handlers, in batches, and reports the
+outbox lag after each batch:
+    python run_credit_worker.py [--batch-size 100] [--poll-seconds 1] [--once]
+
+To run several workers, give each one its share of the users:
+    python run_credit_worker.py --workers 4 --worker-index 0
+
+The API drains the outbox in-process by default; set
+CREDIT_OUTBOX_IN_PROCESS_WORKER=false when these workers take over.
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.services.credit_outbox import DEFAULT_BATCH_SIZE, run_outbox_worker
+from app.services.scoring_policies import start_policy_watcher
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Credit scoring outbox worker")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Outbox events read per batch")
+    parser.add_argument("--poll-seconds", type=float, default=settings.CREDIT_OUTBOX_POLL_SECONDS,
+                        help="Wait between polls when the outbox is empty")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of workers sharing the outbox")
+    parser.add_argument("--worker-index", type=int, default=0,
+                        help="This worker's share (0 to workers - 1)")
+    parser.add_argument("--once", action="store_true",
+                        help="Process one batch and exit")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Credit Scoring Worker {args.worker_index + 1}/{args.workers}")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    if settings.SCORING_POLICY_REFRESH_SECONDS > 0:
+        start_policy_watcher(settings.SCORING_POLICY_REFRESH_SECONDS)
+
+    try:
+        run_outbox_worker(
+            args.poll_seconds,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            worker_index=args.worker_index,
+            once=args.once,
+        )
+    except KeyboardInterrupt:
+        print("\n[SUCCESS] Worker stopped")
+    except Exception as e:
+        print(f"\n[ERROR] Worker failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,50 @@
+"""
+Standalone script for the nightly delinquency sweep.
+
+Penalizes installments that are overdue and still unpaid, and defaults loans
+with an installment unpaid for more than DEFAULT_DAYS. Safe to re-run:
+    python run_delinquency_sweep.py [--batch-size 1000]
+
+Schedule it once a night, e.g. with cron:
+    15 2 * * * cd /path/to/backend && python run_delinquency_sweep.py
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.delinquency import DEFAULT_BATCH_SIZE, sweep_delinquencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nightly delinquency sweep")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Installments processed per transaction")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Delinquency Sweep")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        totals = sweep_delinquencies(db, batch_size=args.batch_size, verbose=True)
+        print("\n[SUCCESS] Sweep completed")
+        print(f"  Installments scanned: {totals['scanned']}")
+        print(f"  Newly late:           {totals['late']}")
+        print(f"  Newly severely late:  {totals['severely_late']}")
+        print(f"  Loans defaulted:      {totals['loans_defaulted']}")
+        print(f"  Score events:         {totals['score_events']}")
+    except Exception as e:
+        print(f"\n[ERROR] Sweep failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
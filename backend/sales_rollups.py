@@ -0,0 +1,48 @@
+"""
+Standalone script to rebuild the daily sales rollups from the loans table.
+
+The rollups are kept up to date on loan creation; rebuild them after a
+backfill or an import, or to repair them:
+    python sales_rollups.py rebuild [--from 2026-01-01] [--to 2026-01-31]
+
+Without --from/--to every day is rebuilt.
+"""
+
+import argparse
+import sys
+import os
+from datetime import date
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.sales_rollups import rebuild_sales_rollups
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily sales rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--from", dest="start_day", type=date.fromisoformat, default=None,
+                        help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end_day", type=date.fromisoformat, default=None,
+                        help="Last day to rebuild, inclusive (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Daily Sales Rollups")
+    print("=" * 60)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        written = rebuild_sales_rollups(db, start_day=args.start_day, end_day=args.end_day)
+        print(f"\n[SUCCESS] Rebuilt {written} rollup rows")
+    except Exception as e:
+        print(f"\n[ERROR] Rebuild failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
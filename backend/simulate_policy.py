@@ -0,0 +1,71 @@
+"""
+Standalone script to simulate credit_config changes before shipping them.
+
+Replays every customer's scoring history under candidate policy variants and
+reports tier migrations and the change in total BNPL exposure. Live profiles
+are not modified:
+    python simulate_policy.py variants.json [--workers 8] [--chunk-size 5000]
+
+variants.json maps a variant name to the credit_config constants it changes:
+    {
+        "harsher_late": {"LATE_PAYMENT_PENALTY": -20},
+        "bank_statement_90": {"DOCUMENT_WEIGHTS": {"BANK_STATEMENT": 90}},
+        "wider_tier_2": {"TIER_BANDS": {"TIER_1": [200, 349], "TIER_2": [350, 599]}}
+    }
+"""
+
+import argparse
+import json
+import sys
+import os
+import time
+
+# Add the backend directory to the path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SessionLocal, Base, engine
+from app.services.policy_simulator import DEFAULT_CHUNK_SIZE, simulate_policies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scoring policy what-if simulation")
+    parser.add_argument("variants", help="JSON file of variant name -> credit_config overrides")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Customers read and scored per task")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Scoring Policy Simulation")
+    print("=" * 60)
+
+    with open(args.variants) as f:
+        variants = json.load(f)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        results = simulate_policies(db, variants, workers=args.workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+
+        for name, result in results.items():
+            print(f"\n[{name}] {result['customers_moved']} of {result['customers']} customers change tier")
+            print(f"  Total limit: {result['baseline_total_limit']} -> {result['variant_total_limit']} "
+                  f"(delta {result['limit_delta']})")
+            print("  Tier migration (current -> variant):")
+            for from_tier in sorted(result["tier_migration"]):
+                row = result["tier_migration"][from_tier]
+                cells = ", ".join(f"{to_tier}: {row[to_tier]}" for to_tier in sorted(row))
+                print(f"    {from_tier} -> {cells}")
+
+        print(f"\n[SUCCESS] Simulated {len(results)} variants in {elapsed:.1f}s")
+    except Exception as e:
+        print(f"\n[ERROR] Simulation failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
@@ -1,9 +1,17 @@
+import asyncio
+import threading
+import uuid
 import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
 from fastapi.testclient import TestClient
 from app.main import app
-from app.core.database import SessionLocal, Base, engine
+from app.core.database import AsyncSessionLocal, SessionLocal, Base, async_engine, engine
 from app.models.user import User, UserRole
-from app.core.security import get_password_hash
+from app.models.retailer import Retailer
+from app.core.dependencies import get_current_customer_profile, get_current_lender, get_current_retailer
+from app.core.auth_cache import auth_cache
+from app.core.security import create_access_token, get_password_hash, hashing_pool, HashingPool, HashingPoolBusy
 
 # Create test database
 Base.metadata.create_all(bind=engine)
@@ -139,3 +147,127 @@ def test_get_me_with_token():
     data = response.json()
     assert data["email"] == "me@example.com"
 
+
+
+def test_hashing_pool_fails_fast_when_full():
+    """Jobs beyond max_pending are rejected right away instead of queueing."""
+    pool = HashingPool(workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def storm():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert pool.pending() == 1
+        with pytest.raises(HashingPoolBusy):
+            await pool.run(release.wait, 5)
+        release.set()
+        return await running
+
+    try:
+        assert asyncio.run(storm()) is True
+        assert pool.pending() == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_login_returns_503_when_hashing_pool_full():
+    """A login that cannot get a hashing slot is answered with 503 and Retry-After."""
+    client.post(
+        "/auth/register",
+        json={
+            "name": "Busy Test",
+            "email": "busy@example.com",
+            "password": "testpassword123",
+        },
+    )
+
+    max_pending = hashing_pool.max_pending
+    hashing_pool.max_pending = 0
+    try:
+        response = client.post(
+            "/auth/login",
+            json={
+                "email_or_username": "busy@example.com",
+                "password": "testpassword123",
+            },
+        )
+    finally:
+        hashing_pool.max_pending = max_pending
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_authenticated_user_cached_until_access_changes(db):
+    """Repeated requests with one token hit the cache; deactivation drops the user's entries."""
+    user = User(
+        name="Cache Test",
+        email=f"cache-{uuid.uuid4().hex}@example.com",
+        password_hash=get_password_hash("testpassword123"),
+        role=UserRole.CUSTOMER,
+    )
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    before = auth_cache.stats()
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    after = auth_cache.stats()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
+
+    user.is_active = False
+    db.commit()
+    assert client.get("/auth/me", headers=headers).status_code == 400  # Inactive user
+
+    user.is_active = True
+    user.role = UserRole.ADMIN
+    db.commit()
+    response = client.get("/internal/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["auth_cache"]["hits"] >= after["hits"]
+    assert response.json()["db_pools"]["async"]["checkouts"] > 0
+
+
+def test_role_profile_dependencies_use_one_query(db):
+    """The user and their role profile come from one joined query, or the profile alone on a cache hit."""
+    user = User(
+        name="Profile Test",
+        email=f"profile-{uuid.uuid4().hex}@example.com",
+        password_hash="not-a-real-hash",
+        role=UserRole.RETAILER,
+    )
+    db.add(user)
+    db.flush()
+    db.add(Retailer(user_id=user.id, business_name="Profile Shop"))
+    db.commit()
+    token = create_access_token({"sub": str(user.id)})
+
+    customer = User(name="No Profile", email=f"noprofile-{uuid.uuid4().hex}@example.com", password_hash="x",
+                    role=UserRole.CUSTOMER)
+    db.add(customer)
+    db.commit()
+    customer_token = create_access_token({"sub": str(customer.id)})
+
+    async def check():
+        statements = []
+        count = lambda *args: statements.append(args[2])
+        async with AsyncSessionLocal() as session:
+            event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+            try:
+                auth_cache.invalidate_user(user.id)
+                retailer = await get_current_retailer(token=token, db=session)
+                assert retailer.business_name == "Profile Shop" and len(statements) == 1
+                assert await get_current_retailer(token=token, db=session) is retailer and len(statements) == 2
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+            with pytest.raises(HTTPException) as error:
+                await get_current_lender(token=token, db=session)
+            assert error.value.status_code == 403
+
+            with pytest.raises(HTTPException) as error:
+                await get_current_customer_profile(token=customer_token, db=session)
+            assert error.value.status_code == 404
+
+    asyncio.run(check())
@@ -1,10 +1,13 @@
 """
 Tests for credit scoring functionality.
 """
+import uuid
 import pytest
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from fastapi.testclient import TestClient
+from sqlalchemy import event as sa_event
 from sqlalchemy.orm import Session
 
 from app.main import app
@@ -22,9 +25,43 @@ from app.services.credit_scoring import (
     handle_loan_status_change,
     recalculate_full_score,
 )
+from app.services.bulk_scoring import (
+    claim_checkpoint,
+    get_checkpoint,
+    recalculate_all_scores,
+    release_checkpoint,
+)
+from app.services.batch_scoring import (
+    ScoreChange,
+    apply_score_changes,
+    handle_installment_payments,
+    handle_loan_status_changes,
+)
+from app.services.policy_simulator import simulate_policies
+from app.services.score_snapshots import create_score_snapshots, get_profile_as_of
+from app.services.delinquency import sweep_delinquencies
+from app.services import credit_outbox
+from app.services.credit_outbox import (
+    enqueue_credit_event,
+    enqueue_document_approved,
+    enqueue_document_revoked,
+    enqueue_loan_status_change,
+    process_outbox_batch,
+    get_outbox_stats,
+)
+from app.services.scoring_policies import publish_scoring_policy, refresh_scoring_policy
+from app.core.scoring_policy import default_policy, get_scoring_policy, set_scoring_policy
+from app.services.score_components import (
+    get_score_components,
+    check_score_components,
+    backfill_payment_streaks,
+    record_document_review,
+)
 from app.core.credit_config import (
     INITIAL_SCORE, INITIAL_TIER, INITIAL_MAX_BNPL_LIMIT,
     DOCUMENT_WEIGHTS, compute_tier_from_score, compute_limit_from_tier,
+    ON_TIME_PAYMENT_POINTS, CONSECUTIVE_ON_TIME_STREAK_BONUS, LATE_PAYMENT_PENALTY,
+    SEVERELY_LATE_PENALTY,
 )
 
 # Create test database
@@ -59,6 +96,21 @@ def test_customer(db: Session):
     return user
 
 
+@pytest.fixture
+def unique_customer(db: Session):
+    """Create a customer with a unique email (safe to reuse across test runs)."""
+    user = User(
+        name="Unique Customer",
+        email=f"customer-{uuid.uuid4().hex}@test.com",
+        password_hash="not-a-real-hash",
+        role=UserRole.CUSTOMER,
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
 @pytest.fixture
 def test_admin(db: Session):
     """Create a test admin user."""
@@ -328,6 +380,622 @@ class TestRecalculation:
         assert updated_profile.score >= INITIAL_SCORE  # Should have increased due to document
 
 
+class TestBulkRecalculation:
+    """Tests for the set-based bulk recalculation."""
+
+    def test_bulk_matches_per_user_recalculation(self, db: Session, unique_customer):
+        """Bulk recalculation produces the same score as recalculate_full_score."""
+        get_or_create_credit_profile(db, unique_customer.id)
+        db.add(CreditDocument(
+            user_id=unique_customer.id,
+            document_type=DocumentType.PAYSLIP,
+            file_path="/test/payslip.pdf",
+            status=DocumentStatus.APPROVED,
+        ))
+        for _ in range(2):
+            db.add(CreditDocument(
+                user_id=unique_customer.id,
+                document_type=DocumentType.OTHER,
+                file_path="/test/other.pdf",
+                status=DocumentStatus.APPROVED,
+            ))
+        apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        apply_score_change(db, unique_customer.id, -10, "LATE_PAYMENT")
+
+        expected = recalculate_full_score(db, unique_customer.id).score
+
+        # Knock the stored score out of sync, then rebuild it in bulk
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        profile.score = 0
+        db.commit()
+
+        checkpoint = recalculate_all_scores(db, chunk_size=50, job_name=f"test-{uuid.uuid4().hex}")
+        db.refresh(profile)
+
+        assert checkpoint.completed_at is not None
+        assert checkpoint.last_user_id >= unique_customer.id
+        assert profile.score == expected
+        assert profile.tier == compute_tier_from_score(expected)
+
+    def test_bulk_recalculation_resumes_from_checkpoint(self, db: Session, unique_customer):
+        """An interrupted run continues after the last committed user_id."""
+        job_name = f"test-{uuid.uuid4().hex}"
+
+        first = recalculate_all_scores(db, chunk_size=1, job_name=job_name, max_chunks=1)
+        assert first.completed_at is None
+        first_last_user_id = first.last_user_id
+
+        resumed = recalculate_all_scores(db, chunk_size=1000, job_name=job_name)
+        assert resumed.completed_at is not None
+        assert resumed.last_user_id >= max(first_last_user_id, unique_customer.id)
+
+    def test_claimed_job_is_not_run_or_restarted_twice(self, db: Session, unique_customer):
+        """While a run holds the job, other runs (including restarts) are refused."""
+        job_name = f"test-{uuid.uuid4().hex}"
+        recalculate_all_scores(db, chunk_size=1, job_name=job_name, max_chunks=1)
+        progress = get_checkpoint(db, job_name).last_user_id
+
+        assert claim_checkpoint(db, job_name)
+        assert not claim_checkpoint(db, job_name)
+        with pytest.raises(ValueError):
+            recalculate_all_scores(db, chunk_size=1000, job_name=job_name, restart=True)
+        db.refresh(get_checkpoint(db, job_name))
+        assert get_checkpoint(db, job_name).last_user_id == progress
+
+        release_checkpoint(db, job_name)
+        checkpoint = recalculate_all_scores(db, chunk_size=1000, job_name=job_name)
+        assert checkpoint.completed_at is not None
+        assert checkpoint.claimed_at is None
+
+
+class TestScoreComponents:
+    """Tests for the incrementally maintained scoring components."""
+
+    def test_score_events_update_components(self, db: Session, unique_customer):
+        """Each score event updates the user's running totals."""
+        apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        apply_score_change(db, unique_customer.id, -50, "SEVERELY_LATE_PAYMENT")
+        apply_score_change(db, unique_customer.id, 15, "EARLY_LOAN_REPAYMENT")
+
+        components = get_score_components(db, unique_customer.id)
+        assert components.on_time_count == 2
+        assert components.late_count == 1
+        assert components.early_repayment_points == 15
+
+    def test_consistency_checker_reports_drift(self, db: Session, unique_customer):
+        """The checker finds tampered totals and repairs them from the event log."""
+        apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        components = get_score_components(db, unique_customer.id)
+        components.on_time_count = 42
+        db.commit()
+
+        drift = check_score_components(db, repair=True)
+        assert {
+            "user_id": unique_customer.id,
+            "field": "on_time_count",
+            "stored": 42,
+            "expected": 1,
+        } in drift
+
+        db.refresh(components)
+        assert components.on_time_count == 1
+        assert not [d for d in check_score_components(db) if d["user_id"] == unique_customer.id]
+
+
+class TestAtomicScoreUpdates:
+    """Tests for the single-statement, lock-safe score update."""
+
+    def test_clamped_update_records_true_score_before(self, db: Session, unique_customer):
+        """score_before/score_after stay exact when the score is clamped at 1000."""
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        profile.score = 998
+        db.commit()
+
+        first = apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        assert first.score == 1000
+        assert first.tier == "TIER_4"
+        assert first.max_bnpl_limit == compute_limit_from_tier("TIER_4")
+
+        apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == unique_customer.id
+        ).order_by(CreditScoreEvent.id).all()
+        assert [(e.score_before, e.score_after) for e in events] == [(998, 1000), (1000, 1000)]
+
+    def test_concurrent_payments_are_not_lost(self, db: Session, unique_customer):
+        """Concurrent score changes for one user all land, in a consistent chain."""
+        get_or_create_credit_profile(db, unique_customer.id)
+        user_id = unique_customer.id
+
+        def pay(_):
+            session = SessionLocal()
+            try:
+                apply_score_change(session, user_id, 5, "ON_TIME_PAYMENT")
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(pay, range(24)))
+
+        db.expire_all()
+        profile = get_or_create_credit_profile(db, user_id)
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == user_id
+        ).order_by(CreditScoreEvent.id).all()
+
+        assert profile.score == INITIAL_SCORE + 24 * 5
+        assert len(events) == 24
+        assert all(a.score_after == b.score_before for a, b in zip(events, events[1:]))
+        assert get_score_components(db, user_id).on_time_count == 24
+
+
+class TestBatchScoring:
+    """Tests for the batched multi-event scoring API."""
+
+    def test_batch_matches_serial_application(self, db: Session, unique_customer):
+        """Batched changes clamp in order and record the same event chain."""
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        profile.score = 990
+        db.commit()
+
+        profiles = apply_score_changes(db, [
+            ScoreChange(unique_customer.id, 5, "ON_TIME_PAYMENT"),
+            ScoreChange(unique_customer.id, 5, "ON_TIME_PAYMENT"),
+            ScoreChange(unique_customer.id, 5, "ON_TIME_PAYMENT"),
+            ScoreChange(unique_customer.id, -50, "SEVERELY_LATE_PAYMENT"),
+        ], chunk_size=1)
+
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == unique_customer.id
+        ).order_by(CreditScoreEvent.id).all()
+        assert [(e.score_before, e.score_after) for e in events] == [
+            (990, 995), (995, 1000), (1000, 1000), (1000, 950),
+        ]
+        assert profiles[unique_customer.id].score == 950
+        assert profiles[unique_customer.id].tier == compute_tier_from_score(950)
+
+        components = get_score_components(db, unique_customer.id)
+        assert components.on_time_count == 3
+        assert components.late_count == 1
+
+    def test_bulk_payment_and_loan_handlers(self, db: Session, unique_customer):
+        """A payment file and the resulting loan status change run through the batch."""
+        loan = Loan(
+            customer_id=unique_customer.id,
+            lender_id=1,
+            product_id=1,
+            principal_amount=Decimal("100000"),
+            deposit_amount=Decimal("20000"),
+            total_amount=Decimal("120000"),
+            status=LoanStatus.ACTIVE,
+        )
+        db.add(loan)
+        db.flush()
+
+        installments = []
+        for i in range(3):
+            installment = Installment(
+                loan_id=loan.id,
+                due_date=datetime.utcnow() + timedelta(days=30 * (i + 1)),
+                amount=Decimal("40000"),
+                paid=True,
+                paid_at=datetime.utcnow(),
+            )
+            db.add(installment)
+            installments.append(installment)
+        db.commit()
+
+        handle_installment_payments(db, installments)
+        loan.status = LoanStatus.PAID
+        profiles = handle_loan_status_changes(db, [(loan, LoanStatus.ACTIVE, LoanStatus.PAID)])
+
+        # Third on-time payment earns the streak bonus, then the early repayment bonus
+        assert profiles[unique_customer.id].score == INITIAL_SCORE + 5 + 5 + 15 + 15
+        components = get_score_components(db, unique_customer.id)
+        assert components.on_time_count == 3
+        assert components.early_repayment_points == 15
+        assert components.paid_loan_count == 1
+        assert not [d for d in check_score_components(db) if d["user_id"] == unique_customer.id]
+
+
+class TestPaymentStreaks:
+    """Tests for the stored on-time payment streak."""
+
+    def _pay(self, db: Session, loan: Loan, days_overdue: int) -> CreditProfile:
+        installment = Installment(
+            loan_id=loan.id,
+            due_date=datetime.utcnow() - timedelta(days=days_overdue),
+            amount=Decimal("10000"),
+            paid=True,
+            paid_at=datetime.utcnow(),
+        )
+        db.add(installment)
+        db.commit()
+        return handle_installment_payment(db, installment)
+
+    def _loan(self, db: Session, customer: User) -> Loan:
+        loan = Loan(
+            customer_id=customer.id,
+            lender_id=1,
+            product_id=1,
+            principal_amount=Decimal("100000"),
+            deposit_amount=Decimal("20000"),
+            total_amount=Decimal("120000"),
+            status=LoanStatus.ACTIVE,
+        )
+        db.add(loan)
+        db.commit()
+        return loan
+
+    def test_late_payment_breaks_streak(self, db: Session, unique_customer):
+        """Only consecutive on-time payments earn the streak bonus."""
+        loan = self._loan(db, unique_customer)
+        for days_overdue in (0, 0, 10, 0, 0):
+            self._pay(db, loan, days_overdue)
+
+        components = get_score_components(db, unique_customer.id)
+        assert components.on_time_streak == 2
+        assert components.last_payment_outcome == "ON_TIME_PAYMENT"
+
+        # Old check counted any 2 earlier on-time events: the streak was broken
+        profile = self._pay(db, loan, 0)
+        assert profile.score == INITIAL_SCORE + 5 * ON_TIME_PAYMENT_POINTS + LATE_PAYMENT_PENALTY + CONSECUTIVE_ON_TIME_STREAK_BONUS
+        db.refresh(components)
+        assert components.on_time_streak == 3
+
+    def test_backfill_derives_streak_from_history(self, db: Session, unique_customer):
+        """The backfill job rebuilds the streak fields from the event order."""
+        for event_type in ("ON_TIME_PAYMENT", "SEVERELY_LATE_PAYMENT", "ON_TIME_PAYMENT", "ON_TIME_PAYMENT"):
+            apply_score_change(db, unique_customer.id, 0, event_type)
+        components = get_score_components(db, unique_customer.id)
+        components.on_time_streak = 0
+        components.last_payment_outcome = None
+        db.commit()
+
+        assert backfill_payment_streaks(db) >= 1
+        db.refresh(components)
+        assert components.on_time_streak == 2
+        assert components.last_payment_outcome == "ON_TIME_PAYMENT"
+        assert not [d for d in check_score_components(db) if d["user_id"] == unique_customer.id]
+
+
+class TestPolicySimulator:
+    """Tests for the policy what-if simulator."""
+
+    def test_simulation_reports_tier_migration(self, db: Session, unique_customer):
+        """Variants are scored against history without touching live profiles."""
+        for _ in range(3):
+            apply_score_change(db, unique_customer.id, -10, "LATE_PAYMENT")
+        profile_before = get_or_create_credit_profile(db, unique_customer.id).score
+
+        results = simulate_policies(db, {
+            "unchanged": {},
+            "harsher_late": {"LATE_PAYMENT_PENALTY": -50},
+            "no_credit": {"MAX_BNPL_LIMITS": {tier: 0 for tier in ("TIER_1", "TIER_2", "TIER_3", "TIER_4")}},
+        }, workers=2, chunk_size=2)
+
+        unchanged = results["unchanged"]
+        assert unchanged["customers_moved"] == 0
+        assert unchanged["limit_delta"] == 0
+        assert sum(sum(row.values()) for row in unchanged["tier_migration"].values()) == unchanged["customers"]
+
+        # 300 - 3 * 50 = 150 drops the customer from TIER_1 to TIER_0
+        assert results["harsher_late"]["tier_migration"]["TIER_1"].get("TIER_0", 0) >= 1
+        assert results["harsher_late"]["limit_delta"] < 0
+        assert results["no_credit"]["variant_total_limit"] == 0
+
+        db.expire_all()
+        assert get_or_create_credit_profile(db, unique_customer.id).score == profile_before
+
+
+class TestScoringPolicy:
+    """Tests for the versioned, compiled scoring policy."""
+
+    def test_compiled_tiers_match_bands(self):
+        """The score->tier table gives the same tiers as walking TIER_BANDS."""
+        policy = default_policy()
+        for score in range(1001):
+            expected = next(
+                (tier for tier, (low, high) in policy.TIER_BANDS.items() if low <= score <= high),
+                "TIER_0",
+            )
+            assert policy.tier_for_score(score) == expected
+
+        variant = policy.with_overrides({"TIER_BANDS": {"TIER_1": [200, 299], "TIER_2": [300, 599]}}, version=9)
+        assert variant.tier_for_score(350) == "TIER_2"
+        assert variant.DOCUMENT_WEIGHTS == policy.DOCUMENT_WEIGHTS
+        assert type(variant).from_json(9, variant.to_json()).parameters == variant.parameters
+
+    def test_published_policy_is_swapped_in_and_recorded(self, db: Session, unique_customer):
+        """Publishing activates a new version that workers pick up without restarting."""
+        row = publish_scoring_policy(db, {"ON_TIME_PAYMENT_POINTS": 7}, description="test")
+        try:
+            assert get_scoring_policy().version == row.version
+
+            # Another worker still on the built-in policy switches on refresh
+            set_scoring_policy(default_policy())
+            assert refresh_scoring_policy(db).version == row.version
+            assert get_scoring_policy().ON_TIME_PAYMENT_POINTS == 7
+
+            apply_score_change(db, unique_customer.id, 7, "ON_TIME_PAYMENT")
+            event = db.query(CreditScoreEvent).filter(
+                CreditScoreEvent.user_id == unique_customer.id
+            ).one()
+            assert event.policy_version == row.version
+        finally:
+            row.is_active = False
+            db.commit()
+            set_scoring_policy(default_policy())
+
+
+class TestScoreSnapshots:
+    """Tests for score snapshots and point-in-time profiles."""
+
+    def test_profile_as_of_replays_from_nearest_snapshot(self, db: Session, unique_customer):
+        """A past profile matches the event history and replays fewer events than the interval."""
+        for delta in (10, -20, 30, 5, -15):
+            apply_score_change(db, unique_customer.id, delta, "ON_TIME_PAYMENT" if delta > 0 else "LATE_PAYMENT")
+
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == unique_customer.id
+        ).order_by(CreditScoreEvent.id).all()
+        start = datetime(2024, 1, 1)
+        for i, event in enumerate(events):
+            event.created_at = start + timedelta(days=i)
+        db.commit()
+
+        assert create_score_snapshots(db, interval=2) >= 2
+        assert create_score_snapshots(db, interval=2) == 0
+
+        for i, event in enumerate(events):
+            as_of = get_profile_as_of(db, unique_customer.id, start + timedelta(days=i, hours=1))
+            assert as_of["score"] == event.score_after
+            assert as_of["tier"] == compute_tier_from_score(event.score_after)
+            assert as_of["last_event_id"] == event.id
+            assert as_of["replayed_events"] < 2
+
+        # Aware timestamps are compared in UTC
+        as_of = get_profile_as_of(
+            db, unique_customer.id,
+            datetime(2024, 1, 3, 3, tzinfo=timezone(timedelta(hours=2))),
+        )
+        assert as_of["last_event_id"] == events[2].id
+        assert as_of["components"]["late_count"] == 1
+
+    def test_profile_as_of_before_profile_existed(self, db: Session, unique_customer):
+        """No profile is reported before the customer had one."""
+        get_or_create_credit_profile(db, unique_customer.id)
+        assert get_profile_as_of(db, unique_customer.id, datetime(2000, 1, 1)) is None
+        assert get_profile_as_of(db, unique_customer.id, datetime.now(timezone.utc))["score"] == INITIAL_SCORE
+
+    def test_profile_as_of_sees_recalculated_score(self, db: Session, unique_customer):
+        """A recalculation that changes the score is recorded and replayed."""
+        apply_score_change(db, unique_customer.id, 5, "ON_TIME_PAYMENT")
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        profile.score = 0  # Out of sync: the recalculation will move it
+        db.commit()
+
+        recalculated = recalculate_full_score(db, unique_customer.id).score
+        event = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == unique_customer.id
+        ).order_by(CreditScoreEvent.id.desc()).first()
+
+        assert (event.event_type, event.score_before, event.score_after) == ("RECALCULATED", 0, recalculated)
+        as_of = get_profile_as_of(db, unique_customer.id, datetime.now(timezone.utc) + timedelta(seconds=1))
+        assert as_of["score"] == recalculated
+        assert as_of["components"]["on_time_count"] == 1
+
+
+class TestCreditOutbox:
+    """Tests for the credit scoring outbox and worker."""
+
+    def _approved_document(self, db: Session, user_id: int) -> CreditDocument:
+        document = CreditDocument(
+            user_id=user_id,
+            document_type=DocumentType.BANK_STATEMENT,
+            file_path="/test/path.pdf",
+            status=DocumentStatus.APPROVED,
+        )
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+        return document
+
+    def test_queued_event_is_scored_once(self, db: Session, unique_customer):
+        """The worker applies a queued score change exactly once."""
+        initial_score = get_or_create_credit_profile(db, unique_customer.id).score
+        document = self._approved_document(db, unique_customer.id)
+        event = enqueue_document_approved(db, document)
+        db.commit()
+
+        assert get_outbox_stats(db)["pending"] >= 1
+        while process_outbox_batch(db):
+            pass
+        process_outbox_batch(db)
+
+        db.refresh(event)
+        assert event.processed_at is not None
+        assert event.attempts == 1
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        assert profile.score == initial_score + DOCUMENT_WEIGHTS[DocumentType.BANK_STATEMENT]
+
+    def test_document_reviewed_again_is_scored_once(self, db: Session, unique_customer):
+        """Approve -> reject -> approve before the worker runs scores the document once; a later
+        rejection takes its points back and the counts match a rebuild."""
+        initial_score = get_or_create_credit_profile(db, unique_customer.id).score
+        document = self._approved_document(db, unique_customer.id)
+        record_document_review(db, document, DocumentStatus.PENDING)
+        enqueue_document_approved(db, document)
+        for status, previous in ((DocumentStatus.REJECTED, DocumentStatus.APPROVED),
+                                 (DocumentStatus.APPROVED, DocumentStatus.REJECTED)):
+            document.status = status
+            record_document_review(db, document, previous)
+            (enqueue_document_approved if status == DocumentStatus.APPROVED else enqueue_document_revoked)(db, document)
+        db.commit()
+
+        while process_outbox_batch(db):
+            pass
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        assert profile.score == initial_score + DOCUMENT_WEIGHTS[DocumentType.BANK_STATEMENT]
+        assert get_score_components(db, unique_customer.id).bank_statement_documents == 1
+
+        document.status = DocumentStatus.REJECTED
+        record_document_review(db, document, DocumentStatus.APPROVED)
+        enqueue_document_revoked(db, document)
+        db.commit()
+        while process_outbox_batch(db):
+            pass
+
+        db.refresh(profile)
+        assert profile.score == initial_score
+        assert get_score_components(db, unique_customer.id).bank_statement_documents == 0
+        assert not [d for d in check_score_components(db) if d["user_id"] == unique_customer.id]
+
+    def test_worker_commits_once_per_event(self, db: Session, unique_customer):
+        """The handlers only flush: each event is committed by the worker, with its score change."""
+        document = self._approved_document(db, unique_customer.id)
+        enqueue_document_approved(db, document)
+        loan = Loan(
+            customer_id=unique_customer.id,
+            lender_id=1,
+            product_id=1,
+            principal_amount=Decimal("100000"),
+            deposit_amount=Decimal("20000"),
+            total_amount=Decimal("120000"),
+            status=LoanStatus.PAID,
+        )
+        db.add(loan)
+        db.flush()
+        # Paid after a default: no score event, only the paid-loan total changes
+        enqueue_loan_status_change(db, loan, LoanStatus.DEFAULTED, LoanStatus.PAID)
+        db.commit()
+
+        commits = []
+        count_commit = lambda session: commits.append(session)
+        sa_event.listen(db, "after_commit", count_commit)
+        try:
+            # This user's share only: earlier runs may have left other users' events pending
+            processed = process_outbox_batch(db, workers=unique_customer.id + 1, worker_index=unique_customer.id)
+        finally:
+            sa_event.remove(db, "after_commit", count_commit)
+
+        assert processed == 2
+        assert len(commits) == 2
+        assert get_score_components(db, unique_customer.id).paid_loan_count == 1
+
+    def test_event_read_by_two_workers_is_applied_once(self, db: Session, unique_customer, monkeypatch):
+        """A worker holding an event another worker already applied skips it."""
+        initial_score = get_or_create_credit_profile(db, unique_customer.id).score
+        document = self._approved_document(db, unique_customer.id)
+        event = enqueue_document_approved(db, document)
+        db.commit()
+        stale = [event]  # Read by this worker before the other one applies it
+
+        other = SessionLocal()
+        try:
+            process_outbox_batch(other, workers=unique_customer.id + 1, worker_index=unique_customer.id)
+        finally:
+            other.close()
+        monkeypatch.setattr(credit_outbox, "_pending_events", lambda *args: stale)
+
+        assert process_outbox_batch(db) == 0
+        db.refresh(event)
+        assert event.attempts == 1
+        profile = get_or_create_credit_profile(db, unique_customer.id)
+        assert profile.score == initial_score + DOCUMENT_WEIGHTS[DocumentType.BANK_STATEMENT]
+
+    def test_failed_event_holds_back_later_events_of_user(self, db: Session, unique_customer):
+        """A user's events are applied in order: a failure blocks the ones after it."""
+        initial_score = get_or_create_credit_profile(db, unique_customer.id).score
+        failing = enqueue_credit_event(db, unique_customer.id, "INSTALLMENT_PAID", {"installment_id": -1})
+        document = self._approved_document(db, unique_customer.id)
+        later = enqueue_document_approved(db, document)
+        db.commit()
+
+        process_outbox_batch(db, max_attempts=1)
+        process_outbox_batch(db, max_attempts=1)
+
+        db.refresh(failing)
+        db.refresh(later)
+        assert failing.failed_at is not None
+        assert "Installment not found" in failing.last_error
+        assert later.processed_at is None
+        assert get_outbox_stats(db)["failed"] >= 1
+        assert get_or_create_credit_profile(db, unique_customer.id).score == initial_score
+
+
+class TestDelinquencySweep:
+    """Tests for the nightly delinquency sweep."""
+
+    def _loan_with_installments(self, db: Session, customer_id: int, days_overdue: list) -> Loan:
+        loan = Loan(
+            customer_id=customer_id,
+            lender_id=1,
+            product_id=1,
+            principal_amount=Decimal("100000"),
+            deposit_amount=Decimal("20000"),
+            total_amount=Decimal("120000"),
+            status=LoanStatus.ACTIVE,
+        )
+        db.add(loan)
+        db.flush()
+        for days in days_overdue:
+            db.add(Installment(
+                loan_id=loan.id,
+                due_date=datetime.utcnow() - timedelta(days=days),
+                amount=Decimal("40000"),
+                paid=False,
+            ))
+        db.commit()
+        return loan
+
+    def test_sweep_penalizes_overdue_installments_once(self, db: Session, unique_customer):
+        """Overdue installments are penalized per level and long-overdue loans defaulted, once."""
+        get_or_create_credit_profile(db, unique_customer.id)
+        late_loan = self._loan_with_installments(db, unique_customer.id, [10, 40, -5])
+        defaulted_loan = self._loan_with_installments(db, unique_customer.id, [100])
+
+        sweep_delinquencies(db, batch_size=2)
+        sweep_delinquencies(db, batch_size=2)
+
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == unique_customer.id
+        ).order_by(CreditScoreEvent.id).all()
+        assert sorted(event.event_type for event in events) == [
+            "LATE_PAYMENT", "LOAN_DEFAULT", "SEVERELY_LATE_PAYMENT", "SEVERELY_LATE_PAYMENT",
+        ]
+        db.refresh(late_loan)
+        db.refresh(defaulted_loan)
+        assert late_loan.status == LoanStatus.ACTIVE
+        assert defaulted_loan.status == LoanStatus.DEFAULTED
+        assert get_score_components(db, unique_customer.id).default_count == 1
+
+        # The late payment finally arrives: its penalty was already applied
+        installment = db.query(Installment).filter(
+            Installment.loan_id == late_loan.id,
+            Installment.delinquency_level == "LATE",
+        ).one()
+        installment.paid = True
+        installment.paid_at = datetime.utcnow()
+        score_before = get_or_create_credit_profile(db, unique_customer.id).score
+        assert handle_installment_payment(db, installment).score == score_before
+
+    def test_sweep_escalation_adds_only_the_difference(self, db: Session, unique_customer):
+        """An installment that stays unpaid past SEVERELY_LATE_DAYS gets the rest of the penalty."""
+        get_or_create_credit_profile(db, unique_customer.id)
+        self._loan_with_installments(db, unique_customer.id, [10])
+
+        sweep_delinquencies(db)
+        sweep_delinquencies(db, as_of=datetime.now(timezone.utc) + timedelta(days=30))
+
+        events = db.query(CreditScoreEvent).filter(
+            CreditScoreEvent.user_id == unique_customer.id
+        ).order_by(CreditScoreEvent.id).all()
+        assert [event.event_type for event in events] == ["LATE_PAYMENT", "DELINQUENCY_ESCALATED"]
+        assert sum(event.delta for event in events) == SEVERELY_LATE_PENALTY
+
+
 class TestTierCalculation:
     """Tests for tier and limit calculation."""
 
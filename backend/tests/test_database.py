@@ -0,0 +1,49 @@
+"""
+Tests for the database engines and their pool metrics.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.database import async_database_url
+from app.core.pool_metrics import PoolMetrics, instrument_pool_events, metered_pool_class
+
+
+def test_async_database_url_picks_async_driver():
+    assert async_database_url("sqlite:///./bnpl_dev.db") == "sqlite+aiosqlite:///./bnpl_dev.db"
+    assert async_database_url("postgresql://u:p@db:5432/bnpl") == "postgresql+asyncpg://u:p@db:5432/bnpl"
+    assert async_database_url("postgresql+psycopg2://u:p@db/bnpl") == "postgresql+asyncpg://u:p@db/bnpl"
+    assert async_database_url("postgresql+asyncpg://u:p@db/bnpl") == "postgresql+asyncpg://u:p@db/bnpl"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/bnpl")
+
+
+def test_pool_metrics_record_checkouts_overflow_and_timeouts(tmp_path):
+    """In-use connections, checkouts beyond the pool size and timed out checkouts are counted."""
+    metrics = PoolMetrics(pool_size=1, max_overflow=1)
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metered_pool_class(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    instrument_pool_events(engine, metrics)
+    try:
+        first, second = engine.connect(), engine.connect()
+        first.execute(text("SELECT 1"))
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+        stats = metrics.stats()
+        assert (stats["in_use"], stats["peak_in_use"], stats["checkouts"]) == (2, 2, 2)
+        assert (stats["overflow_checkouts"], stats["timeouts"], stats["connects"]) == (1, 1, 2)
+        assert stats["checkout_wait_max_ms"] >= stats["checkout_wait_p50_ms"] >= 0
+
+        first.close()
+        second.close()
+        assert metrics.stats()["in_use"] == 0
+        assert metrics.stats()["peak_in_use"] == 2
+    finally:
+        engine.dispose()
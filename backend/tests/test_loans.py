@@ -0,0 +1,479 @@
+"""
+Tests for loan lists and the lender and retailer dashboards.
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.core.database import SessionLocal, Base, engine, pool_metrics
+from app.core.security import create_access_token
+from app.models import (
+    User, UserRole, Lender, LenderPortfolioStats, Retailer, Product, DailySalesRollup,
+    Loan, Installment, LoanStatus,
+)
+from app.services.loan_queries import list_loans_page
+from app.services.sales_rollups import get_sales_totals, rebuild_sales_rollups, record_loan_sale
+from app.services.view_counter import ViewCounter, flush_view_counts, get_view_totals, view_counter
+from app.services.portfolio_stats import (
+    check_portfolio_stats,
+    rebuild_portfolio_stats,
+    record_installment_paid,
+    record_loan_created,
+    record_loan_status_change,
+    roll_forward_aging,
+)
+
+# Create test database
+Base.metadata.create_all(bind=engine)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db():
+    """Create a test database session."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
+@pytest.fixture
+def customer_with_loans(db: Session):
+    """A customer with five loans (the third one paid) of three installments each."""
+    user = User(
+        name="Loan Customer",
+        email=f"loans-{uuid.uuid4().hex}@test.com",
+        password_hash="not-a-real-hash",
+        role=UserRole.CUSTOMER,
+    )
+    db.add(user)
+    db.flush()
+
+    for i in range(5):
+        loan = Loan(
+            customer_id=user.id,
+            lender_id=1,
+            product_id=1,
+            principal_amount=Decimal("100000"),
+            deposit_amount=Decimal("20000"),
+            total_amount=Decimal("120000"),
+            status=LoanStatus.PAID if i == 2 else LoanStatus.ACTIVE,
+        )
+        db.add(loan)
+        db.flush()
+        for month in range(3):
+            db.add(Installment(
+                loan_id=loan.id,
+                due_date=datetime.utcnow() + timedelta(days=30 * (month + 1)),
+                amount=Decimal("40000"),
+                paid=False,
+            ))
+
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def test_loan_pages_use_constant_queries(db: Session, customer_with_loans):
+    """Each page costs one loans query and one installments query, whatever its size."""
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        loans, next_cursor = list_loans_page(db, customer_id=customer_with_loans.id, limit=4)
+        assert all(len(loan.installments) == 3 for loan in loans)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert len(loans) == 4
+    assert next_cursor == loans[-1].id
+    assert len(statements) == 2
+
+    rest, last_cursor = list_loans_page(db, customer_id=customer_with_loans.id, cursor=next_cursor, limit=4)
+    assert len(rest) == 1
+    assert last_cursor is None
+
+
+def test_my_loans_endpoint_paginates_and_filters(customer_with_loans):
+    """The cursor of each page is returned in X-Next-Cursor; status filters the list."""
+    token = create_access_token({"sub": str(customer_with_loans.id)})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/loans/me", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(loan["id"] for loan in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    response = client.get("/loans/me", params={"status": "PAID"}, headers=headers)
+    assert [loan["status"] for loan in response.json()] == ["PAID"]
+    assert len(response.json()[0]["installments"]) == 3
+
+
+def test_lender_stats_aggregates(db: Session):
+    """Dashboard totals and aging buckets are computed in SQL for the lender's loans only."""
+    lenders = []
+    for _ in range(2):
+        user = User(
+            name="Stats Lender",
+            email=f"lender-{uuid.uuid4().hex}@test.com",
+            password_hash="not-a-real-hash",
+            role=UserRole.LENDER,
+        )
+        db.add(user)
+        db.flush()
+        lender = Lender(user_id=user.id, institution_name="Stats MFI", base_interest_rate=Decimal("10"))
+        db.add(lender)
+        db.flush()
+        lenders.append(lender)
+
+    # Other tests attach their loans to lender 1
+    lender = next(lender for lender in lenders if lender.id != 1)
+    user = db.get(User, lender.user_id)
+
+    now = datetime.utcnow()
+    for loan_status, overdue_days in (
+        (LoanStatus.ACTIVE, [-10, 5, 45, 90]),
+        (LoanStatus.ACTIVE, [40]),
+        (LoanStatus.PAID, [100]),
+    ):
+        loan = Loan(
+            customer_id=user.id,
+            lender_id=lender.id,
+            product_id=1,
+            principal_amount=Decimal("100000"),
+            deposit_amount=Decimal("20000"),
+            total_amount=Decimal("110000"),
+            status=loan_status,
+        )
+        db.add(loan)
+        db.flush()
+        for days in overdue_days:
+            db.add(Installment(
+                loan_id=loan.id,
+                due_date=now - timedelta(days=days, hours=1),
+                amount=Decimal("10000"),
+                paid=False,
+            ))
+        # Paid installments never count
+        db.add(Installment(loan_id=loan.id, due_date=now - timedelta(days=5), amount=Decimal("10000"), paid=True))
+    db.commit()
+
+    token = create_access_token({"sub": str(user.id)})
+    response = client.get("/lender/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["active_loans_count"] == 2
+    assert data["total_principal_outstanding"] == 200000
+    assert data["total_interest_earned"] == 30000
+    assert data["aging_buckets"] == {"current": 1, "late_1_30": 1, "late_31_60": 2, "late_61_plus": 1}
+
+
+def _stats_lender(db: Session) -> Lender:
+    """A new lender (never lender 1, which other tests attach their loans to)."""
+    while True:
+        user = User(
+            name="Rollup Lender",
+            email=f"lender-{uuid.uuid4().hex}@test.com",
+            password_hash="not-a-real-hash",
+            role=UserRole.LENDER,
+        )
+        db.add(user)
+        db.flush()
+        lender = Lender(user_id=user.id, institution_name="Rollup MFI", base_interest_rate=Decimal("10"))
+        db.add(lender)
+        db.flush()
+        if lender.id != 1:
+            return lender
+
+
+def _add_loan(db: Session, lender: Lender, overdue_days, loan_status=LoanStatus.ACTIVE) -> Loan:
+    now = datetime.utcnow()
+    loan = Loan(
+        customer_id=lender.user_id,
+        lender_id=lender.id,
+        product_id=1,
+        principal_amount=Decimal("100000"),
+        deposit_amount=Decimal("20000"),
+        total_amount=Decimal("110000"),
+        status=loan_status,
+    )
+    db.add(loan)
+    db.flush()
+    for days in overdue_days:
+        db.add(Installment(
+            loan_id=loan.id,
+            due_date=now - timedelta(days=days, hours=12),
+            amount=Decimal("10000"),
+            paid=False,
+        ))
+    record_loan_created(db, loan)
+    return loan
+
+
+def _lender_drift(db: Session, lender: Lender):
+    return [entry for entry in check_portfolio_stats(db) if entry["lender_id"] == lender.id]
+
+
+def test_portfolio_stats_follow_loan_changes(db: Session):
+    """Loan creation, status changes and payments keep the rollup equal to a from-scratch aggregation."""
+    lender = _stats_lender(db)
+    first = _add_loan(db, lender, [-10, 5, 45])
+    second = _add_loan(db, lender, [90, 20])
+    _add_loan(db, lender, [100], loan_status=LoanStatus.PAID)
+    db.commit()
+
+    stats = db.query(LenderPortfolioStats).filter(LenderPortfolioStats.lender_id == lender.id).one()
+    assert stats.active_loans_count == 2
+    assert stats.total_principal_outstanding == Decimal("200000")
+    assert stats.total_interest_earned == Decimal("30000")
+    assert (stats.current_count, stats.late_1_30, stats.late_31_60, stats.late_61_plus) == (1, 2, 1, 1)
+
+    # Pay the 45 days overdue installment, default the second loan
+    installment = next(inst for inst in first.installments if inst.due_date < datetime.utcnow() - timedelta(days=40))
+    installment.paid = True
+    installment.paid_at = datetime.utcnow()
+    record_installment_paid(db, installment)
+    second.status = LoanStatus.DEFAULTED
+    record_loan_status_change(db, second, LoanStatus.ACTIVE, LoanStatus.DEFAULTED)
+    db.commit()
+
+    db.refresh(stats)
+    assert stats.active_loans_count == 1
+    assert stats.total_principal_outstanding == Decimal("100000")
+    assert stats.total_interest_earned == Decimal("30000")
+    assert (stats.current_count, stats.late_1_30, stats.late_31_60, stats.late_61_plus) == (1, 1, 0, 0)
+    assert _lender_drift(db, lender) == []
+
+    # The endpoint reads the row
+    token = create_access_token({"sub": str(lender.user_id)})
+    response = client.get("/lender/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["aging_buckets"] == {"current": 1, "late_1_30": 1, "late_31_60": 0, "late_61_plus": 0}
+
+    # The checker reports and repairs drift
+    stats.late_1_30 = 7
+    db.commit()
+    drift = _lender_drift(db, lender)
+    assert [(entry["field"], entry["stored"], entry["expected"]) for entry in drift] == [("late_1_30", 7, 1)]
+    check_portfolio_stats(db, repair=True)
+    assert _lender_drift(db, lender) == []
+
+
+def test_portfolio_stats_roll_forward(db: Session):
+    """The daily roll-forward moves installments that crossed a bucket boundary."""
+    lender = _stats_lender(db)
+    _add_loan(db, lender, [-10, 5, 25, 55, 80])
+    db.commit()
+    rebuild_portfolio_stats(db)
+
+    stats = db.query(LenderPortfolioStats).filter(LenderPortfolioStats.lender_id == lender.id).one()
+    assert (stats.current_count, stats.late_1_30, stats.late_31_60, stats.late_61_plus) == (1, 2, 1, 1)
+
+    try:
+        moved = roll_forward_aging(db, stats.buckets_as_of + timedelta(days=20))
+        assert moved >= 3  # Plus other lenders' installments
+        db.refresh(stats)
+        assert (stats.current_count, stats.late_1_30, stats.late_31_60, stats.late_61_plus) == (0, 2, 1, 2)
+        assert _lender_drift(db, lender) == []
+    finally:
+        # Back to now for the other tests
+        rebuild_portfolio_stats(db)
+
+
+@pytest.fixture
+def retailer_with_sales(db: Session):
+    """A retailer with six products sold i + 1 times each (plus one loan 40 days ago) and one never sold."""
+    user = User(
+        name="Stats Retailer",
+        email=f"retailer-{uuid.uuid4().hex}@test.com",
+        password_hash="not-a-real-hash",
+        role=UserRole.RETAILER,
+    )
+    db.add(user)
+    db.flush()
+    retailer = Retailer(user_id=user.id, business_name="Stats Shop")
+    db.add(retailer)
+    db.flush()
+
+    # Other tests attach their loans to product 1: make sure it is not one of ours
+    if db.get(Product, 1) is None:
+        other_user = User(
+            name="Other Retailer",
+            email=f"retailer-{uuid.uuid4().hex}@test.com",
+            password_hash="not-a-real-hash",
+            role=UserRole.RETAILER,
+        )
+        db.add(other_user)
+        db.flush()
+        other = Retailer(user_id=other_user.id, business_name="Other Shop")
+        db.add(other)
+        db.flush()
+        db.add(Product(id=1, retailer_id=other.id, name="Placeholder", price=Decimal("1000")))
+        db.flush()
+
+    products = []
+    for i in range(6):
+        product = Product(retailer_id=retailer.id, name=f"Product {i}", price=Decimal("1000"),
+                          sku="KETTLE-4" if i == 4 else None)
+        db.add(product)
+        products.append(product)
+    db.add(Product(retailer_id=retailer.id, name="Never sold", price=Decimal("1000")))
+    db.flush()
+
+    # Product i sells i + 1 loans of (i + 1) * 1000; one old loan of product 0
+    for i, product in enumerate(products):
+        for _ in range(i + 1):
+            loan = Loan(
+                customer_id=user.id,
+                lender_id=1,
+                product_id=product.id,
+                principal_amount=Decimal("1000"),
+                deposit_amount=Decimal("0"),
+                total_amount=Decimal(str((i + 1) * 1000)),
+                status=LoanStatus.ACTIVE,
+            )
+            db.add(loan)
+            record_loan_sale(db, loan)
+    loan = Loan(
+        customer_id=user.id,
+        lender_id=1,
+        product_id=products[0].id,
+        principal_amount=Decimal("1000"),
+        deposit_amount=Decimal("0"),
+        total_amount=Decimal("1000"),
+        status=LoanStatus.PAID,
+        created_at=datetime.utcnow() - timedelta(days=40),
+    )
+    db.add(loan)
+    record_loan_sale(db, loan)
+    db.commit()
+    return user, products
+
+
+
+def test_retailer_stats_from_rollups(retailer_with_sales):
+    """Retailer totals, 30-day figures and best sellers are read from the daily sales rollups."""
+    user, products = retailer_with_sales
+    token = create_access_token({"sub": str(user.id)})
+    sync_checkouts = pool_metrics["sync"].checkouts
+    response = client.get("/retailer/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert pool_metrics["sync"].checkouts == sync_checkouts  # The profile lookup's async session serves the request
+    data = response.json()
+
+    assert data["total_bnpl_sales"] == 92000
+    assert data["bnpl_transactions_30d"] == 21
+    assert data["avg_ticket_size_30d"] == 91000 / 21
+    assert [
+        (item["name"], item["bnpl_sales_count"], item["bnpl_sales_amount"])
+        for item in data["best_selling_products"]
+    ] == [
+        ("Product 5", 6, 36000),
+        ("Product 4", 5, 25000),
+        ("Product 3", 4, 16000),
+        ("Product 2", 3, 9000),
+        ("Product 1", 2, 4000),
+    ]
+    assert data["best_selling_products"][0]["sku"] == f"PRD-{products[5].id:06d}"
+    assert data["best_selling_products"][1]["sku"] == "KETTLE-4"
+
+
+def test_sales_series_and_rebuild(db: Session, retailer_with_sales):
+    """Trend windows sum the rollups, which a bulk rebuild reproduces from the loans."""
+    user, products = retailer_with_sales
+    retailer_id = products[0].retailer_id
+    token = create_access_token({"sub": str(user.id)})
+    headers = {"Authorization": f"Bearer {token}"}
+    today = datetime.now(timezone.utc).date()
+
+    response = client.get("/retailer/sales", params={"start": str(today - timedelta(days=89))}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["periods"]) == 90
+    assert data["total_bnpl_sales_count"] == 22
+    assert data["total_bnpl_sales_amount"] == 92000
+    assert data["periods"][-1] == {"period": str(today), "bnpl_sales_count": 21, "bnpl_sales_amount": 91000}
+    assert data["periods"][-41]["bnpl_sales_count"] == 1
+
+    response = client.get("/retailer/sales", params={
+        "start": str(today.replace(day=1) - timedelta(days=40)),
+        "granularity": "month",
+    }, headers=headers)
+    periods = response.json()["periods"]
+    assert [period["period"][-2:] for period in periods] == ["01"] * len(periods)
+    assert sum(period["bnpl_sales_count"] for period in periods) == 22
+
+    response = client.get("/retailer/sales", params={"start": str(today), "end": str(today - timedelta(days=1))}, headers=headers)
+    assert response.status_code == 400
+
+    # The bulk rebuild gives the same rows as the incremental upserts
+    def rollup_rows():
+        return sorted(
+            (row.product_id, row.day, row.loan_count, row.total_amount)
+            for row in db.query(DailySalesRollup).filter(DailySalesRollup.retailer_id == retailer_id)
+        )
+
+    incremental = rollup_rows()
+    db.query(DailySalesRollup).filter(DailySalesRollup.retailer_id == retailer_id).delete()
+    db.commit()
+    rebuild_sales_rollups(db, start_day=today - timedelta(days=60))
+    assert rollup_rows() == incremental
+    assert get_sales_totals(db, retailer_id=retailer_id)["total_amount"] == Decimal("92000")
+
+
+def test_product_views_batched_into_conversion_rate(db: Session, retailer_with_sales):
+    """Detail views are counted in memory, flushed as upserts and used for the conversion rate."""
+    user, products = retailer_with_sales
+    retailer_id = products[0].retailer_id
+    token = create_access_token({"sub": str(user.id)})
+    headers = {"Authorization": f"Bearer {token}"}
+    flush_view_counts()
+
+    for _ in range(30):
+        assert client.get(f"/products/{products[5].id}", headers=headers).status_code == 200
+    assert view_counter.pending() == 30
+    assert get_view_totals(db, datetime.now(timezone.utc) - timedelta(hours=1), retailer_id=retailer_id) == 0
+
+    # Two flushes add up in the same product-hour row
+    assert flush_view_counts() == 30
+    for _ in range(12):
+        client.get(f"/products/{products[4].id}", headers=headers)
+    assert flush_view_counts() == 12
+    assert view_counter.pending() == 0
+
+    since = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert get_view_totals(db, since, retailer_id=retailer_id) == 42
+    assert get_view_totals(db, since, product_id=products[5].id) == 30
+
+    response = client.get("/retailer/stats", headers=headers)
+    assert response.json()["conversion_rate_30d"] == 21 / 42
+
+    # Other workers' counters add to the same rows
+    other_worker = ViewCounter()
+    other_worker.record(products[5].id, retailer_id)
+    assert other_worker.flush(db) == 1
+    assert get_view_totals(db, since, product_id=products[5].id) == 31
+
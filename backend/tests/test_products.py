@@ -0,0 +1,314 @@
+"""
+Tests for the product catalog.
+"""
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.core.database import SessionLocal, Base, engine
+from app.core.security import create_access_token
+from app.models import User, UserRole, Retailer, Lender, Product, CreditProfile
+from app.services import product_detail
+from app.services.catalog_import import CatalogImporter
+from app.services.catalog_index import CatalogIndex, CatalogProduct, bump_catalog_version, refresh_catalog
+from app.services.product_detail import CachedProductDetail, ProductDetailCache
+from app.services.view_counter import view_counter
+
+# Create test database
+Base.metadata.create_all(bind=engine)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db():
+    """Create a test database session."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
+def _user(db: Session, role: UserRole) -> User:
+    user = User(
+        name="Catalog User",
+        email=f"catalog-{uuid.uuid4().hex}@test.com",
+        password_hash="not-a-real-hash",
+        role=role,
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+def _catalog_product(product_id: int, price: str, min_score=None, name=None, age_days=0) -> CatalogProduct:
+    return CatalogProduct(
+        id=product_id,
+        retailer_id=1,
+        name=name or f"Product {product_id}",
+        description=None,
+        price=Decimal(price),
+        bnpl_eligible=True,
+        min_required_score=min_score,
+        stock=1,
+        sku=None,
+        created_at=datetime(2026, 1, 1) - timedelta(days=age_days),
+        updated_at=None,
+    )
+
+
+def test_catalog_index_eligibility_and_sorting():
+    """Eligible products are the ones up to the limit (binary search) whose score threshold is met."""
+    catalog = CatalogIndex(1, [
+        _catalog_product(1, "50000", name="delta", age_days=3),
+        _catalog_product(2, "10000", min_score=700, name="alpha", age_days=1),
+        _catalog_product(3, "200000", name="charlie"),
+        _catalog_product(4, "200000.01", name="bravo"),
+        _catalog_product(5, "30000", min_score=400, name="echo", age_days=2),
+    ])
+
+    assert [p.id for p in catalog.eligible(500, Decimal("200000"))] == [5, 1, 3]
+    assert [p.id for p in catalog.eligible(800, Decimal("200000"))] == [2, 5, 1, 3]
+    assert [p.id for p in catalog.eligible(None, Decimal("30000"))] == [2, 5]
+
+    products, total = catalog.page(800, Decimal("200000"), sort="price_desc", offset=1, limit=2)
+    assert ([p.id for p in products], total) == ([1, 5], 4)
+    assert [p.id for p in catalog.page(800, Decimal("200000"), sort="name")[0]] == [2, 3, 1, 5]
+    assert [p.id for p in catalog.page(800, Decimal("200000"), sort="newest")[0]] == [3, 2, 5, 1]
+    with pytest.raises(ValueError):
+        catalog.page(800, Decimal("200000"), sort="popular")
+
+
+def test_products_endpoint_follows_catalog_versions(db: Session):
+    """Product writes bump the catalog version; the writing worker and polling workers pick them up."""
+    retailer_user = _user(db, UserRole.RETAILER)
+    db.add(Retailer(user_id=retailer_user.id, business_name="Catalog Shop"))
+    customer = _user(db, UserRole.CUSTOMER)
+    db.add(CreditProfile(user_id=customer.id, score=500, tier="TIER_1", max_bnpl_limit=Decimal("200000")))
+    db.commit()
+
+    name = f"Catalog {uuid.uuid4().hex}"
+    response = client.post("/retailer/products", json={
+        "name": name, "price": "150000", "stock": 3, "min_required_score": 450,
+    }, headers=_headers(retailer_user))
+    assert response.status_code == 201
+    product_id = response.json()["id"]
+
+    def listed_ids(**params):
+        response = client.get("/products", params={"limit": 500, **params}, headers=_headers(customer))
+        assert response.status_code == 200
+        assert int(response.headers["X-Total-Count"]) >= len(response.json())
+        return [product["id"] for product in response.json()]
+
+    # Visible right away on the worker that made the write
+    assert product_id in listed_ids()
+    assert listed_ids(sort="price_desc") == listed_ids()[::-1]
+
+    # Out of stock: gone from the index
+    client.put(f"/retailer/products/{product_id}", json={"stock": 0}, headers=_headers(retailer_user))
+    assert product_id not in listed_ids()
+
+    # A write from another worker shows up once this worker polls the version
+    product = db.get(Product, product_id)
+    product.stock = 5
+    product.min_required_score = 600
+    bump_catalog_version(db)
+    db.commit()
+    refresh_catalog(db)
+    assert product_id not in listed_ids()  # Score 500 < 600
+
+    product.min_required_score = None
+    bump_catalog_version(db)
+    db.commit()
+    refresh_catalog(db)
+    assert product_id in listed_ids()
+
+    response = client.get("/products", params={"limit": 1}, headers=_headers(customer))
+    assert len(response.json()) == 1
+    assert client.get("/products", params={"sort": "random"}, headers=_headers(customer)).status_code == 422
+
+
+def test_product_search_ranked_and_eligible(db: Session):
+    """Search is ranked (name over description), filtered by eligibility and follows product writes."""
+    retailer_user = _user(db, UserRole.RETAILER)
+    db.add(Retailer(user_id=retailer_user.id, business_name="Search Shop"))
+    customer = _user(db, UserRole.CUSTOMER)
+    db.add(CreditProfile(user_id=customer.id, score=500, tier="TIER_1", max_bnpl_limit=Decimal("200000")))
+    db.commit()
+
+    word = f"zq{uuid.uuid4().hex[:10]}"
+
+    def create(**fields):
+        response = client.post("/retailer/products", json={"price": "1000", "stock": 1, **fields},
+                               headers=_headers(retailer_user))
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    in_description = create(name="Plain kettle", description=f"Comes with a {word} lid")
+    in_name = create(name=f"{word.upper()} blender", description="Kitchen")
+    too_expensive = create(name=f"{word} fridge", price="250000")
+    needs_score = create(name=f"{word} oven", min_required_score=700)
+    create(name="Unrelated toaster")
+
+    def search(q, **params):
+        response = client.get("/products/search", params={"q": q, **params}, headers=_headers(customer))
+        assert response.status_code == 200
+        return [product["id"] for product in response.json()], int(response.headers["X-Total-Count"])
+
+    assert search(word) == ([in_name, in_description], 2)
+    assert search(word[:6]) == ([in_name, in_description], 2)  # Prefix match
+    assert search(f"{word} blender") == ([in_name], 1)  # Every term must match
+    assert search(word, offset=1, limit=1) == ([in_description], 2)
+    assert search('" OR * (') == ([], 0)  # Query syntax is never passed through
+    assert too_expensive not in search(word)[0] and needs_score not in search(word)[0]
+
+    # Updates and deletes through the retailer endpoints update the index
+    client.put(f"/retailer/products/{in_description}", json={"description": "Comes with a lid"},
+               headers=_headers(retailer_user))
+    client.delete(f"/retailer/products/{in_name}", headers=_headers(retailer_user))
+    assert search(word) == ([], 0)
+    client.put(f"/retailer/products/{too_expensive}", json={"price": "150000"}, headers=_headers(retailer_user))
+    assert search(word) == ([too_expensive], 1)
+
+
+def test_catalog_import_csv_and_ndjson(db: Session):
+    """Imports upsert by SKU, skip invalid rows with a report and accept records split across chunks."""
+    retailer_user = _user(db, UserRole.RETAILER)
+    retailer = Retailer(user_id=retailer_user.id, business_name="Import Shop")
+    db.add(retailer)
+    db.commit()
+
+    csv_body = (
+        "sku,name,description,price,stock,min_required_score\n"
+        'A-1,Kettle,"Steel kettle,\n1.7 litres",45000,3,\n'
+        "A-2,Blender,,cheap,2,\n"  # Not a price
+        'A-3,"Rice ""cooker""",,80000,1,600\n'
+        ",No SKU,,1000,1,\n"
+    )
+    response = client.post("/retailer/products/import", content=csv_body,
+                           headers={**_headers(retailer_user), "Content-Type": "text/csv"})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["imported"], report["failed"]) == (4, 2, 2)
+    assert [(error["row"], error["sku"]) for error in report["errors"]] == [(2, "A-2"), (4, None)]
+
+    products = {p.sku: p for p in db.query(Product).filter(Product.retailer_id == retailer.id)}
+    assert set(products) == {"A-1", "A-3"}
+    assert products["A-1"].description == "Steel kettle,\n1.7 litres"
+    assert products["A-3"].name == 'Rice "cooker"' and products["A-3"].min_required_score == 600
+
+    # NDJSON re-import updates by SKU instead of duplicating
+    ndjson_body = (
+        '{"sku": "A-1", "name": "Kettle", "price": "42000", "stock": 5}\n'
+        "not json\n"
+        '{"sku": "A-4", "name": "Toaster", "price": 30000}\n'
+    )
+    response = client.post("/retailer/products/import", params={"format": "ndjson"}, content=ndjson_body,
+                           headers=_headers(retailer_user))
+    report = response.json()
+    assert (report["rows"], report["imported"], report["failed"]) == (3, 2, 1)
+    assert report["errors"][0]["row"] == 2
+    db.expire_all()
+    assert db.query(Product).filter(Product.retailer_id == retailer.id).count() == 3
+    kettle = db.query(Product).filter(Product.retailer_id == retailer.id, Product.sku == "A-1").one()
+    assert (kettle.price, kettle.stock) == (Decimal("42000"), 5)
+
+    # The same SKU through the product endpoints conflicts
+    response = client.post("/retailer/products", json={"name": "Other", "price": "1", "sku": "A-4"},
+                           headers=_headers(retailer_user))
+    assert response.status_code == 409
+
+    headers = _headers(retailer_user)
+    assert client.post("/retailer/products/import", content="name,price\nX,1\n",
+                       headers={**headers, "Content-Type": "text/csv"}).status_code == 400
+    assert client.post("/retailer/products/import", content="{}",
+                       headers={**headers, "Content-Type": "application/json"}).status_code == 415
+
+    # A large upload fed in small chunks, cutting lines and UTF-8 characters
+    body = "sku,name,price\n" + "".join(f"B-{i},Café item {i},{1000 + i}\n" for i in range(5000))
+    data = body.encode("utf-8")
+    importer = CatalogImporter(db, retailer.id, "csv", batch_size=1000)
+    for start in range(0, len(data), 4093):
+        importer.feed(data[start:start + 4093])
+    report = importer.finish()
+    assert (report.rows, report.imported, report.failed) == (5000, 5000, 0)
+    item = db.query(Product).filter(Product.retailer_id == retailer.id, Product.sku == "B-4999").one()
+    assert (item.name, item.price) == ("Café item 4999", Decimal("5999"))
+
+
+def test_product_detail_etag_and_cache(db: Session):
+    """Product details are cached per worker, revalidated with ETags and rebuilt after an update."""
+    retailer_user = _user(db, UserRole.RETAILER)
+    db.add(Retailer(user_id=retailer_user.id, business_name="Detail Shop"))
+    customer = _user(db, UserRole.CUSTOMER)
+    db.commit()
+
+    response = client.post("/retailer/products", json={"name": "Lamp", "price": "25000", "stock": 2, "sku": "L-1"},
+                           headers=_headers(retailer_user))
+    product_id = response.json()["id"]
+
+    pending = view_counter.pending()
+    response = client.get(f"/products/{product_id}", headers=_headers(customer))
+    assert response.status_code == 200
+    assert (response.json()["sku"], response.json()["retailer"]["name"]) == ("L-1", "Detail Shop")
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/products/{product_id}", headers={**_headers(customer), "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag and response.content == b""
+    assert view_counter.pending() == pending + 2  # Revalidations are views too
+
+    client.put(f"/retailer/products/{product_id}", json={"price": "27000"}, headers=_headers(retailer_user))
+    response = client.get(f"/products/{product_id}", headers={**_headers(customer), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["price"]["amount"] == 27000
+    assert response.headers["ETag"] != etag
+
+    # A lender rate change is served (with a new ETag) once the cached rate expires
+    etag = response.headers["ETag"]
+    lender = db.query(Lender).order_by(Lender.id).first()
+    if lender is None:
+        lender = Lender(user_id=_user(db, UserRole.LENDER).id, institution_name="Detail MFI")
+        db.add(lender)
+    previous_rate = lender.base_interest_rate
+    lender.base_interest_rate = Decimal("12.5")
+    db.commit()
+    try:
+        product_detail._interest_rate = None
+        response = client.get(f"/products/{product_id}", headers={**_headers(customer), "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["bnpl"]["interest_rate_percent_per_month"] == 12.5
+        assert response.headers["ETag"] != etag
+    finally:
+        lender.base_interest_rate = previous_rate if previous_rate is not None else Decimal("10")
+        db.commit()
+        product_detail._interest_rate = None
+
+    client.delete(f"/retailer/products/{product_id}", headers=_headers(retailer_user))
+    assert client.get(f"/products/{product_id}", headers=_headers(customer)).status_code == 404
+
+
+def test_product_detail_cache_is_bounded():
+    """The least recently used entries are evicted; entries of an older catalog version or rate are dropped."""
+    cache = ProductDetailCache(max_entries=2)
+    entry = lambda version: CachedProductDetail(
+        catalog_version=version, interest_rate=10.0, etag='"x"', retailer_id=1, detail=None
+    )
+
+    cache.put(1, entry(1))
+    cache.put(2, entry(1))
+    assert cache.get(1, 1, 10.0) is not None  # 2 is now the least recently used
+    cache.put(3, entry(1))
+    assert (cache.get(2, 1, 10.0), len(cache)) == (None, 2)
+    assert cache.get(3, 2, 10.0) is None and len(cache) == 1
+    assert cache.get(1, 1, 12.5) is None and len(cache) == 0